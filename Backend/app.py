@@ -1,6 +1,6 @@
 # app.py
-from flask import Flask, jsonify, request
-from pymongo import MongoClient
+from flask import Flask, jsonify, request, Response, stream_with_context
+from pymongo import UpdateOne
 import yfinance as yf
 from datetime import datetime
 import datetime as dt
@@ -12,7 +12,31 @@ import pandas as pd
 import numpy as np
 import requests
 import os
+import importlib.util
+import hmac
 from config import Config
+from scoring import blend_scores
+from models import Company, YahooFinanceAPI
+from history_store import PriceHistoryStore, merge_history, prices_readjusted, lookback_start
+from streaming_scorer import ScorerStateStore, advance_scorer
+from response_cache import ResponseCache
+from news_client import NewsAPIClient, CircuitBreaker, build_session
+import sentiment_engine
+from article_cache import ArticleSentimentCache
+from bulk_writer import BulkUpserter
+from company_query import ListingQuery, stream_listing, ensure_listing_indexes
+from export import EXPORT_FORMATS, iter_ndjson, iter_arrow
+from refresh_policy import ViewTracker
+from score_events import ScoreBroadcaster, ChangeStreamFeed
+from sector_stats import SectorStatsStore
+from score_history import ScoreHistoryStore
+from stress_test import ScoreUniverse, Scenario, UniverseCache, run_scenario, rank_results, summarize
+import serialization
+import mongo
+from metrics import registry, stage, record_cycle, instrument_flask, profiler
+import queue
+from refresh_engine import RefreshEngine, SourceLimiter
+from routes import api as catalog_api
 
 # Initialize Flask app
 app = Flask(__name__)
@@ -20,10 +44,123 @@ app = Flask(__name__)
 # Enable Cross-Origin Resource Sharing for the React app
 CORS(app)
 
+# Company catalog, Yahoo Finance passthrough and background sync routes (routes.py)
+app.register_blueprint(catalog_api, url_prefix='/api/catalog')
+
+# Per-route latency and request counts for /metrics
+instrument_flask(app)
+if Config.PROFILER_ENABLED:
+    profiler.start()
+
 # MongoDB connection
-client = MongoClient(Config.MONGO_URI)
-db = client.credit_intelligence
-companies_col = db.companies
+# Shared, lazily-connected database (one pool per process, see mongo.py)
+db = mongo.db
+
+# Pushes score changes to dashboards connected to /api/stream/scores
+score_broadcaster = ScoreBroadcaster(max_subscribers=Config.SCORE_STREAM_MAX_SUBSCRIBERS)
+
+# Company data queued for writing, published once the write succeeds
+pending_updates = {}
+pending_updates_lock = threading.Lock()
+
+# Serialized API responses, dropped whenever a company is rewritten
+response_cache = ResponseCache(max_entries=Config.RESPONSE_CACHE_SIZE, ttl=Config.RESPONSE_CACHE_TTL)
+
+def company_changed(company):
+    """
+    Applies a company write seen on the change stream, usually made by a
+    worker process: drops this process's cached responses and pushes the
+    change to connected dashboards. The scenario universe is left to expire
+    after SCENARIO_UNIVERSE_TTL, so a refresh cycle does not reload it once
+    per company.
+    """
+    response_cache.invalidate("companies", f"company:{company.get('name')}")
+    score_broadcaster.publish(company)
+
+def sector_changed(sector):
+    """Drops cached company responses whose percentile came from a sector that was just rebuilt."""
+    response_cache.invalidate_tag(f"sector:{sector.get('_id')}")
+
+def company_changes_missed():
+    """Drops every cached response after the change stream lost its place."""
+    response_cache.clear()
+    scenario_universe.invalidate()
+
+def init_stores():
+    """
+    Creates every Mongo-backed store on the shared database and empties the
+    in-memory state derived from it. Runs at import; call it again after
+    mongo.use_database() to start over on another database.
+    """
+    global companies_col, price_history, scorer_states, article_sentiment, view_tracker
+    global sector_stats, score_history, scenario_universe, score_change_feed, sector_change_feed, indexes_created
+    companies_col = db.companies
+    # Bars beyond the scoring lookback expire on the server
+    price_history = PriceHistoryStore(db, retention_days=Config.HISTORY_LOOKBACK_DAYS)
+    # Streaming scorer state, stored in each company document next to its score
+    scorer_states = ScorerStateStore(companies_col)
+    article_sentiment = ArticleSentimentCache(
+        db, window=Config.NEWS_SENTIMENT_WINDOW, max_age_days=Config.NEWS_SENTIMENT_MAX_AGE_DAYS
+    )
+    view_tracker = ViewTracker(db, flush_interval=Config.VIEW_FLUSH_SECONDS)
+    # Per-sector score distributions, kept current as companies are written
+    sector_stats = SectorStatsStore(db, companies_col)
+    # Every served score, with daily / weekly / monthly rollups for charts
+    score_history = ScoreHistoryStore(db, raw_retention_days=Config.SCORE_HISTORY_RAW_RETENTION_DAYS)
+    # Latest scoring inputs of every company as NumPy arrays, for what-if scenarios
+    scenario_universe = UniverseCache(lambda: ScoreUniverse.load(companies_col), ttl=Config.SCENARIO_UNIVERSE_TTL)
+    # Every API process follows the companies collection, so writes by worker.py reach its caches
+    score_change_feed = ChangeStreamFeed(companies_col, company_changed, on_resync=company_changes_missed)
+    # ...and the sector stats, whose rebuilds change the percentiles in company responses
+    sector_change_feed = ChangeStreamFeed(
+        sector_stats.collection, sector_changed, on_resync=company_changes_missed,
+        operations=("insert", "update", "replace", "delete"), exclude=("members",),
+    )
+    indexes_created = False
+    response_cache.clear()
+    with pending_updates_lock:
+        pending_updates.clear()
+
+def ensure_indexes():
+    """
+    Creates the ticker lookup and listing indexes, for /api/companies and the
+    catalog, once per process. Retried on the next call if any failed.
+    """
+    global indexes_created
+    if indexes_created:
+        return
+    created = ensure_listing_indexes(companies_col, key_field="ticker", score_field="score")
+    indexes_created = Company.ensure_indexes() and created
+
+def init_sources(news_session=None, rate_limited=True):
+    """
+    Creates the per-source limits and the NewsAPI client shared by all refresh
+    workers. `news_session` replaces the pooled HTTP session, and
+    rate_limited=False drops the per-second limits (concurrency limits stay).
+    """
+    global yahoo_limiter, news_api_limiter, news_client
+    yahoo_limiter = SourceLimiter(
+        "yahoo", Config.YAHOO_MAX_CONCURRENCY, Config.YAHOO_RATE_PER_SEC if rate_limited else None
+    )
+    news_api_limiter = SourceLimiter(
+        "newsapi", Config.NEWS_API_MAX_CONCURRENCY, Config.NEWS_API_RATE_PER_SEC if rate_limited else None
+    )
+    # Keep-alive client: one connection pool for every ticker's news requests
+    news_client = NewsAPIClient(
+        Config.NEWS_API_KEY,
+        base_url=Config.NEWS_API_URL,
+        session=news_session or build_session(pool_size=Config.NEWS_API_MAX_CONCURRENCY),
+        timeout=(Config.NEWS_API_CONNECT_TIMEOUT, Config.NEWS_API_READ_TIMEOUT),
+        limiter=news_api_limiter,
+        breaker=CircuitBreaker(Config.NEWS_API_BREAKER_THRESHOLD, Config.NEWS_API_BREAKER_RESET),
+        max_retries=Config.NEWS_API_MAX_RETRIES,
+        backoff_factor=Config.NEWS_API_BACKOFF_FACTOR,
+    )
+
+init_stores()
+init_sources()
+# Create the listing indexes at startup (also under gunicorn) without holding up the import
+threading.Thread(target=ensure_indexes, name="ensure-indexes", daemon=True).start()
 
 # List of companies (stock tickers) to track
 COMPANIES = [
@@ -60,95 +197,137 @@ def format_number(n, is_currency=False):
         return f"{n / 1e3:.2f}K"
     return f"{n:.2f}"
 
-def calculate_credit_score(close_price, ma50):
+def analyze_sentiment(text):
     """
-    Calculates a simplified credit score based on stock price relative to its 50-day moving average.
+    NEW: Performs a basic sentiment analysis on a text string
+    by counting positive and negative keywords (see sentiment_engine).
+    Returns the summed keyword score: positive words add, negative words subtract.
     """
-    # Avoid division by zero
-    if ma50 == 0:
-        return 70
-        
-    score = 70 + (close_price - ma50) / ma50 * 100
-    return max(0, min(100, score)) # Clamp score between 0 and 100
+    return sentiment_engine.score(text)
 
-def analyze_sentiment(text):
+def score_articles(articles):
     """
-    NEW: Performs a basic sentiment analysis on a text string
-    by counting positive and negative keywords.
-    Returns a score between -1 and 1.
+    Averages the headline sentiment of a list of NewsAPI articles on a 0-100 scale.
+    Returns None when there are no articles.
     """
-    positive_words = ["positive", "up", "growth", "gain", "strong", "bullish", "increase", "rise", "success", "boost", "soar", "rally"]
-    negative_words = ["negative", "down", "loss", "decline", "weak", "bearish", "decrease", "drop", "fall", "struggle", "plunge", "volatile"]
-    
-    score = 0
-    words = text.lower().split()
-    for word in words:
-        if word in positive_words:
-            score += 1
-        elif word in negative_words:
-            score -= 1
-            
-    return score
+    if not articles:
+        return None
+
+    # Score all headlines in one pass with the lexicon engine
+    headline_scores = sentiment_engine.score_batch([article.get('title') or '' for article in articles])
+    normalized_scores = [sentiment_engine.normalize_score(sentiment_score) for sentiment_score in headline_scores]
+    return sum(normalized_scores) / len(normalized_scores)
+
+def cached_news_sentiment(ticker_name, articles):
+    """
+    Adds newly fetched articles to the article sentiment cache and returns the
+    ticker's aggregate over its cached articles. Falls back to scoring the
+    fetched articles directly if the cache is unavailable.
+    """
+    try:
+        article_sentiment.store(ticker_name, articles)
+        return article_sentiment.aggregate(ticker_name)
+    except Exception as e:
+        print(f"Article sentiment cache unavailable for {ticker_name}: {e}")
+        return score_articles(articles)
+
+def news_since_params(ticker_name):
+    """NewsAPI `from` parameter for articles published since the last cached one."""
+    try:
+        return article_sentiment.since_params(ticker_name)
+    except Exception as e:
+        print(f"Article sentiment cache unavailable for {ticker_name}: {e}")
+        return {}
 
 def fetch_news_sentiment(ticker_name):
     """
     NEW: Fetches recent news from the News API and calculates a sentiment score.
-    Returns a sentiment score (0-100) based on news headlines.
+    Only articles published since the last cached one are requested; the score is
+    the average over the ticker's most recently published cached articles
+    (0-100), see ArticleSentimentCache.
     """
-    api_key = Config.NEWS_API_KEY
-    if not api_key:
+    if not Config.NEWS_API_KEY:
         print("News API key not found. Skipping news sentiment analysis.")
         return None
-        
-    url = "https://newsapi.org/v2/everything"
-    params = {
-        "q": ticker_name,
-        "language": "en",
-        "sortBy": "relevancy",
-        "pageSize": 10, # Fetch the 10 most relevant articles
-        "apiKey": api_key
-    }
-    
+
     try:
-        response = requests.get(url, params=params)
-        response.raise_for_status() # Raise an exception for bad status codes
-        data = response.json()
-        articles = data.get('articles', [])
-        
-        if not articles:
-            print(f"No News API articles found for {ticker_name}.")
-            return None
-            
-        total_sentiment_score = 0
-        article_count = 0
-        for article in articles:
-            headline = article.get('title', '')
-            # Use the basic sentiment analysis function
-            sentiment_score = analyze_sentiment(headline)
-            
-            # Map the score to a 0-100 scale for consistency
-            # score range from -10 to 10
-            normalized_score = 50 + (sentiment_score / 10) * 50
-            total_sentiment_score += normalized_score
-            article_count += 1
-            
-        if article_count > 0:
-            average_sentiment = total_sentiment_score / article_count
-            return average_sentiment
-        else:
-            return None
-            
+        # Fetch the newest articles, enough to fill the sentiment window
+        articles = news_client.fetch_articles(
+            ticker_name,
+            page_size=Config.NEWS_SENTIMENT_WINDOW,
+            sortBy="publishedAt",
+            **news_since_params(ticker_name),
+        )
     except requests.exceptions.RequestException as e:
         print(f"Error fetching News API news for {ticker_name}: {e}")
-        return None
+        articles = []
 
-def generate_sentiment_data(ticker_name):
+    sentiment = cached_news_sentiment(ticker_name, articles)
+    if sentiment is None:
+        print(f"No News API articles found for {ticker_name}.")
+    return sentiment
+
+def fetch_news_sentiment_batch(ticker_names, max_workers=None):
+    """
+    Fetches and scores headlines for many tickers concurrently.
+    Returns {ticker: sentiment score or None}.
+    """
+    if not Config.NEWS_API_KEY:
+        print("News API key not found. Skipping news sentiment analysis.")
+        return {ticker_name: None for ticker_name in ticker_names}
+
+    results = news_client.fetch_many(
+        ticker_names,
+        max_workers=max_workers or Config.NEWS_API_MAX_CONCURRENCY,
+        page_size=Config.NEWS_SENTIMENT_WINDOW,
+        params_by_query={ticker_name: news_since_params(ticker_name) for ticker_name in ticker_names},
+        sortBy="publishedAt",
+    )
+    return {ticker_name: cached_news_sentiment(ticker_name, articles or []) for ticker_name, articles in results.items()}
+
+class MarketSnapshot:
+    """
+    Market data for a single ticker, fetched once per refresh cycle and
+    shared by the scoring, sentiment and trend calculations.
+    """
+
+    def __init__(self, ticker_name, info, history):
+        self.ticker_name = ticker_name
+        self.info = info or {}
+        self.history = history
+
+    @classmethod
+    def fetch(cls, ticker_name, period="2y", history=None):
+        """
+        Downloads the info dict and price history in a single pass.
+        A `history` prefetched by a bulk download is used as-is.
+        """
+        with yahoo_limiter:
+            ticker = yf.Ticker(ticker_name)
+            with stage("info_fetch"):
+                info = ticker.info
+            if history is None:
+                with stage("history_fetch"):
+                    history = ticker.history(period=period)
+            hist = history
+        if not hist.empty:
+            hist = hist.tz_localize(None).sort_index()
+        return cls(ticker_name, info, hist)
+
+    def recent_history(self, days=30):
+        """Returns the bars from the last `days` calendar days of the history."""
+        if self.history.empty:
+            return self.history
+        cutoff = self.history.index[-1] - pd.Timedelta(days=days)
+        return self.history[self.history.index > cutoff]
+
+def generate_sentiment_data(snapshot):
     """
     Generates sentiment data based on the company's recent stock performance.
     """
+    ticker_name = snapshot.ticker_name
     try:
-        ticker = yf.Ticker(ticker_name)
-        hist = ticker.history(period="30d")
+        hist = snapshot.recent_history(days=30)
         if hist.empty:
             return []
             
@@ -185,169 +364,529 @@ def generate_sentiment_data(ticker_name):
         print(f"Error generating sentiment data for {ticker_name}: {e}")
         return []
 
-def generate_credit_trend(ticker_name):
+def generate_credit_trend(ticker_name, scorer):
     """
     Generates a historical credit score trend based on a weighted
     average of historical stock data and a simulated sentiment score.
+    The monthly points are kept up to date by the streaming scorer, so
+    nothing is recomputed over the full history.
     """
-    try:
-        ticker = yf.Ticker(ticker_name)
-        hist = ticker.history(period="2y")
-        if hist.empty or len(hist) < 50:
-            print(f"Insufficient historical data for {ticker_name}.")
-            return []
-            
-        hist = hist.tz_localize(None).sort_index()
-
-        # Calculate the 50-day moving average for the entire period
-        hist['MA50'] = hist['Close'].rolling(window=50).mean()
+    trend_data = scorer.credit_trend()
+    if not trend_data:
+        print(f"Insufficient historical data for {ticker_name}.")
+    return trend_data
 
-        # Calculate the base yfinance score
-        hist['YFinanceScore'] = hist.apply(
-            lambda row: calculate_credit_score(row['Close'], row['MA50']), axis=1)
-
-        # NEW: Simulate a sentiment score based on price movement
-        # Simple simulation: If price is above MA, sentiment is positive.
-        # This creates a trend that mirrors the stock performance.
-        hist['SimulatedSentiment'] = hist.apply(
-            lambda row: 80 if row['Close'] > row['MA50'] else 60, axis=1)
-
-        # NEW: Calculate the combined score for each day
-        hist['CombinedScore'] = (hist['YFinanceScore'] * 0.7) + (hist['SimulatedSentiment'] * 0.3)
+def prefetch_histories(companies, period="2y"):
+    """
+    Builds each company's price history from the stored bars plus a grouped
+    download starting at the last stored date, one batch of tickers at a
+    time. The re-downloaded last stored bar is checked against the stored
+    one: if a split or dividend has re-adjusted the prices, the ticker's
+    whole window is downloaded again and replaces the stored bars. Tickers
+    missing from a download are left out, so they fall back to a per-ticker
+    fetch instead of being scored on stale bars.
+    """
+    tickers = [c["ticker"] for c in companies]
+    since = lookback_start(Config.HISTORY_LOOKBACK_DAYS)
+    batch_size = Config.YAHOO_BULK_BATCH_SIZE
+    histories = {}
+    for i in range(0, len(tickers), batch_size):
+        batch = tickers[i:i + batch_size]
+        with stage("history_store"):
+            stored = price_history.load(batch, since=since)
+
+        # Group the batch by the date its download has to start from
+        groups = {}
+        for ticker_name in batch:
+            start = None
+            if ticker_name in stored:
+                start = stored[ticker_name].index[-1].strftime("%Y-%m-%d")
+            groups.setdefault(start, []).append(ticker_name)
+
+        readjusted = []
+        for start, group in groups.items():
+            with yahoo_limiter, stage("history_fetch"):
+                fresh = YahooFinanceAPI.get_bulk_history(group, period=period, start=start)
+
+            for ticker_name in group:
+                old_bars = stored.get(ticker_name)
+                new_bars = fresh.get(ticker_name)
+                if prices_readjusted(old_bars, new_bars):
+                    readjusted.append(ticker_name)
+                    continue
+                merged = merge_history(old_bars, new_bars)
+                if merged is None:
+                    continue
+                try:
+                    last_stored = old_bars.index[-1] if old_bars is not None else None
+                    with stage("history_store"):
+                        price_history.append(ticker_name, new_bars, after=last_stored)
+                except Exception as e:
+                    print(f"Error storing price history for {ticker_name}: {e}")
+                histories[ticker_name] = merged
+
+        if readjusted:
+            print(f"Prices re-adjusted for {', '.join(readjusted)}; downloading their full history again.")
+            with yahoo_limiter, stage("history_fetch"):
+                fresh = YahooFinanceAPI.get_bulk_history(readjusted, period=period)
+            for ticker_name in readjusted:
+                new_bars = fresh.get(ticker_name)
+                if new_bars is None:
+                    continue
+                try:
+                    with stage("history_store"):
+                        price_history.replace(ticker_name, new_bars)
+                except Exception as e:
+                    print(f"Error storing price history for {ticker_name}: {e}")
+                histories[ticker_name] = new_bars
+    return histories
+
+def refresh_company(company_info, history, company_writer):
+    """
+    Fetches market data for a single company, scores it and queues the result,
+    together with the scorer state, on `company_writer` (a BulkUpserter).
+    Returns True when the company was updated and False when it was skipped.
+    """
+    ticker_name = company_info["ticker"]
+    company_name = company_info["name"]
 
-        # Smooth the combined score with a rolling mean
-        hist['SmoothedScore'] = hist['CombinedScore'].rolling(window=30).mean()
+    # Fetch company info and historical data once for this cycle
+    snapshot = MarketSnapshot.fetch(ticker_name, history=history)
+    info = snapshot.info
+    hist = snapshot.history
 
-        # Resample on a monthly basis and get the last valid value for the month
-        monthly_trend = hist['SmoothedScore'].resample('M').last().dropna()
+    # A ticker missing from the grouped download was fetched on its own; store its
+    # bars too, so the next refresh only downloads what is new
+    if history is None and not hist.empty:
+        try:
+            with stage("history_store"):
+                price_history.replace(ticker_name, hist)
+        except Exception as e:
+            print(f"Error storing price history for {ticker_name}: {e}")
+    
+    # Calculate credit score and other metrics based on stock data.
+    if hist.empty or len(hist) < 50:
+        print(f"Insufficient historical data for {company_name} to calculate 50-day moving average.")
+        return False
+
+    # Advance the stored rolling-window state with the bars it has not seen yet
+    with stage("scoring"):
+        scorer = advance_scorer(scorer_states.load(ticker_name), hist['Close'])
+        latest = scorer.latest()
+    if latest is None or latest['ma50'] is None:
+        print(f"Insufficient historical data for {company_name} to calculate 50-day moving average.")
+        return False
+    ma50 = latest['ma50']
+    current_close = latest['close']
+    yfinance_score = latest['score']
+
+    with stage("news_sentiment"):
+        news_sentiment_score = fetch_news_sentiment(ticker_name)
+    
+    if news_sentiment_score is not None:
+        final_score = blend_scores(yfinance_score, news_sentiment_score)
+    else:
+        final_score = yfinance_score
+
+    score_factors = []
+    if current_close > ma50:
+        score_factors.append({"text": "Recent stock price is trending above the 50-day moving average, a sign of positive momentum.", "positive": True})
+    else:
+        score_factors.append({"text": "Stock price is trading below the 50-day moving average, indicating a potential bearish trend.", "positive": False})
+
+    if final_score >= 85:
+        score_factors.append({"text": "Exceptional performance has led to a high credit intelligence score.", "positive": True})
+    elif final_score >= 75:
+        score_factors.append({"text": "Solid performance metrics contribute to a good overall score.", "positive": True})
+    else:
+        score_factors.append({"text": "Recent market volatility has negatively impacted the score.", "positive": False})
+    
+    if news_sentiment_score is not None:
+        if news_sentiment_score > 70:
+            score_factors.append({"text": "Positive news sentiment from recent articles has boosted the score.", "positive": True})
+        elif news_sentiment_score < 50:
+            score_factors.append({"text": "Negative news sentiment from recent articles has impacted the score.", "positive": False})
+        else:
+            score_factors.append({"text": "Neutral news sentiment from recent articles contributed to the score.", "positive": True})
+
+    sector = info.get('sector', 'N/A')
+    score_factors.append({"text": f"The company's position in the {sector} sector provides stability.", "positive": True})
+
+    revenue = info.get('totalRevenue')
+    debt_to_equity = info.get('debtToEquity')
+    profit_margin = info.get('profitMargins')
+    return_on_equity = info.get('returnOnEquity')
+
+    # Annualized volatility of the last 30 daily returns, used to prioritise refreshes
+    returns = hist['Close'].pct_change().dropna().tail(30)
+    volatility = float(returns.std() * np.sqrt(252)) if len(returns) > 1 else None
+
+    with stage("sentiment"):
+        sentiment = generate_sentiment_data(snapshot)
+    with stage("trend"):
+        credit_trend = generate_credit_trend(ticker_name, scorer)
+
+    company_data = {
+        "name": company_name,
+        "ticker": ticker_name,
+        "sector": sector,
+        "marketCap": info.get('marketCap'),
+        "beta": info.get('beta'),
+        "volatility": volatility,
+        "lastUpdated": datetime.utcnow(),
+        "score": final_score,
+        "scoreFactors": score_factors,
+        "sentiment": sentiment,
+        "creditTrend": credit_trend,
+        # Raw inputs behind the score, loaded by the what-if scenario API
+        "scoreInputs": {
+            "close": float(current_close),
+            "ma50": float(ma50),
+            "newsSentiment": news_sentiment_score,
+            "debtToEquity": debt_to_equity,
+            "profitMargins": profit_margin,
+            "returnOnEquity": return_on_equity,
+        },
+        "metrics": {
+            "revenue": format_number(revenue, is_currency=True),
+            "debt_to_equity": f"{debt_to_equity:.2f}" if debt_to_equity is not None else "N/A",
+            "profit_margin": f"{profit_margin * 100:.2f}%" if profit_margin is not None else "N/A",
+            "return_on_equity": f"{return_on_equity * 100:.2f}%" if return_on_equity is not None else "N/A",
+        }
+    }
 
-        trend_data = []
-        for month, score in monthly_trend.tail(8).items():
-            trend_data.append({
-                "month": month.strftime("%b"),
-                "score": score,
-            })
-            
-        return trend_data
+    company_op = UpdateOne(
+        {"ticker": ticker_name},
+        {"$set": dict(company_data, **scorer_states.fields(scorer))},
+        upsert=True,
+    )
+    with pending_updates_lock:
+        pending_updates[company_name] = company_data
+    with stage("db_write"):
+        company_writer.add(company_op, tag=company_name)
+    print(f"Successfully scored data for {company_name}")
+    return True
+
+def companies_written(company_names):
+    """
+    Drops cached API responses for companies that were just written and
+    pushes their changes to connected dashboards.
+    """
+    response_cache.invalidate("companies", *[f"company:{name}" for name in company_names])
+    with pending_updates_lock:
+        written = [pending_updates.pop(name) for name in company_names if name in pending_updates]
+    for company_data in written:
+        score_broadcaster.publish(company_data)
+    try:
+        sectors = sector_stats.record(written)
+        response_cache.invalidate_tag(*[f"sector:{sector}" for sector in sectors])
     except Exception as e:
-        print(f"Error generating credit trend for {ticker_name}: {e}")
-        return []
+        print(f"Error updating sector stats: {e}")
+    try:
+        score_history.record(written)
+    except Exception as e:
+        print(f"Error recording score history: {e}")
 
-def fetch_and_store_data():
+def refresh_batch(companies, max_workers=None):
     """
-    Fetches stock data from yfinance and stores it in MongoDB.
-    This function will be called periodically by the scheduler.
+    Refreshes a batch of companies (a worker's claimed jobs): one grouped
+    history download, scoring on the RefreshEngine's thread pool and bulk
+    writes of the company documents. Returns the cycle report; its "results"
+    map gives each ticker's outcome, with failed writes counted as failures.
     """
-    print("Starting scheduled data update...")
-    for company_info in COMPANIES:
-        ticker_name = company_info["ticker"]
-        company_name = company_info["name"]
-
-        try:
-            # Fetch company info and historical data
-            ticker = yf.Ticker(ticker_name)
-            info = ticker.info
-            hist = ticker.history(period="2y")
-            
-            # Calculate credit score and other metrics based on stock data.
-            if hist.empty or len(hist) < 50:
-                print(f"Insufficient historical data for {company_name} to calculate 50-day moving average.")
-                continue
-
-            hist = hist.tz_localize(None)
-
-            ma50 = hist['Close'].rolling(window=50).mean()
-            current_close = hist['Close'].iloc[-1]
-            yfinance_score = calculate_credit_score(current_close, ma50.iloc[-1])
-
-            news_sentiment_score = fetch_news_sentiment(ticker_name)
-            
-            if news_sentiment_score is not None:
-                final_score = (yfinance_score * 0.7) + (news_sentiment_score * 0.3)
-            else:
-                final_score = yfinance_score
-
-            score_factors = []
-            if current_close > ma50.iloc[-1]:
-                score_factors.append({"text": "Recent stock price is trending above the 50-day moving average, a sign of positive momentum.", "positive": True})
-            else:
-                score_factors.append({"text": "Stock price is trading below the 50-day moving average, indicating a potential bearish trend.", "positive": False})
-
-            if final_score >= 85:
-                score_factors.append({"text": "Exceptional performance has led to a high credit intelligence score.", "positive": True})
-            elif final_score >= 75:
-                score_factors.append({"text": "Solid performance metrics contribute to a good overall score.", "positive": True})
-            else:
-                score_factors.append({"text": "Recent market volatility has negatively impacted the score.", "positive": False})
-            
-            if news_sentiment_score is not None:
-                if news_sentiment_score > 70:
-                    score_factors.append({"text": "Positive news sentiment from recent articles has boosted the score.", "positive": True})
-                elif news_sentiment_score < 50:
-                    score_factors.append({"text": "Negative news sentiment from recent articles has impacted the score.", "positive": False})
-                else:
-                    score_factors.append({"text": "Neutral news sentiment from recent articles contributed to the score.", "positive": True})
-
-            sector = info.get('sector', 'N/A')
-            score_factors.append({"text": f"The company's position in the {sector} sector provides stability.", "positive": True})
-
-            revenue = info.get('totalRevenue')
-            debt_to_equity = info.get('debtToEquity')
-            profit_margin = info.get('profitMargins')
-            return_on_equity = info.get('returnOnEquity')
-
-            company_data = {
-                "name": company_name,
-                "ticker": ticker_name,
-                "sector": sector,
-                "marketCap": info.get('marketCap'),
-                "lastUpdated": datetime.utcnow(),
-                "score": final_score,
-                "scoreFactors": score_factors,
-                "sentiment": generate_sentiment_data(ticker_name),
-                "creditTrend": generate_credit_trend(ticker_name),
-                "metrics": {
-                    "revenue": format_number(revenue, is_currency=True),
-                    "debt_to_equity": f"{debt_to_equity:.2f}" if debt_to_equity is not None else "N/A",
-                    "profit_margin": f"{profit_margin * 100:.2f}%" if profit_margin is not None else "N/A",
-                    "return_on_equity": f"{return_on_equity * 100:.2f}%" if return_on_equity is not None else "N/A",
-                }
-            }
-
-            companies_col.update_one(
-                {"ticker": ticker_name},
-                {"$set": company_data},
-                upsert=True
-            )
-            print(f"Successfully updated data for {company_name}")
-        
-        except Exception as e:
-            print(f"Error fetching data for {company_name}: {e}")
+    histories = prefetch_histories(companies)
+    company_writer = BulkUpserter(companies_col, Config.MONGO_BULK_BATCH_SIZE, on_success=companies_written)
+    engine = RefreshEngine(
+        lambda company_info: refresh_company(
+            company_info, histories.get(company_info["ticker"]), company_writer
+        ),
+        max_workers=max_workers or Config.REFRESH_WORKERS,
+    )
+    report = engine.run_cycle(companies)
+    with stage("db_write"):
+        company_writer.flush()
+    report["written"] = company_writer.written
+    report["writeErrors"] = company_writer.errors
+
+    # A company that was scored but never written has not been refreshed
+    tickers = {c["name"]: c["ticker"] for c in companies}
+    for write_error in company_writer.errors:
+        ticker_name = tickers.get(write_error["tag"])
+        if report["results"].get(ticker_name) != "updated":
+            continue
+        report["results"][ticker_name] = "failed"
+        report["updated"] -= 1
+        report["failed"] += 1
+        report["failures"].append({"ticker": ticker_name, "error": write_error["error"]})
+        with pending_updates_lock:
+            pending_updates.pop(write_error["tag"], None)
+
+    record_cycle(report)
+    print(
+        f"Refreshed {report['tickers']} companies: {report['updated']} updated, {report['skipped']} skipped, "
+        f"{report['failed']} failed, {report['written']} written in {report['durationSeconds']:.1f}s "
+        f"({report['tickersPerSecond']:.2f} tickers/sec, p95 {report['p95LatencySeconds']:.2f}s)"
+    )
+    return report
 
 # Routes for the Flask API
+@app.before_request
+def start_change_feed():
+    if Config.SCORE_CHANGE_STREAM:
+        score_change_feed.start()
+        sector_change_feed.start()
+
+def cached_json_response(entry):
+    """Builds a JSON response from a cache entry, answering 304 when the client's copy is current."""
+    response = Response(entry.body, mimetype="application/json")
+    response.set_etag(entry.etag)
+    response.last_modified = entry.last_modified
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
 @app.route('/api/companies', methods=['GET'])
 def get_companies():
-    companies_list = list(companies_col.find({}, {"_id": 0, "name": 1, "ticker": 1}))
-    return jsonify(companies_list)
+    """
+    Without listing parameters returns every company's name and ticker
+    (cached); other parameters, such as a ?_= cache-buster, are ignored.
+    With any of limit, after, sort, sector, minScore, maxScore or fields it
+    streams one page as {"items": [...], "nextCursor": ...}.
+    """
+    if not ListingQuery.requested(request.args):
+        def build():
+            companies_list = list(companies_col.find({}, {"_id": 0, "name": 1, "ticker": 1}))
+            return app.json.dumps(companies_list).encode("utf-8"), None
+
+        return cached_json_response(response_cache.get_or_build("companies", build))
+
+    try:
+        query = ListingQuery(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    ensure_indexes()
+    return Response(stream_with_context(stream_listing(companies_col, query, app.json.dumps)), mimetype="application/json")
 
 @app.route('/api/companies/<name>', methods=['GET'])
 def get_company_details(name):
-    company = companies_col.find_one({"name": name}, {"_id": 0})
-    if company:
-        if 'lastUpdated' in company and isinstance(company['lastUpdated'], datetime):
-            company['lastUpdated'] = company['lastUpdated'].strftime("%B %d, %Y")
-        return jsonify(company)
-    return jsonify({"error": "Company not found"}), 404
-
-# Run the initial data fetch and schedule future updates
-if __name__ == '__main__':
-    def start_scheduler():
+    def build():
+        company = companies_col.find_one({"name": name}, {"_id": 0, "scorerState": 0})
+        if not company:
+            return None
+        sector = company.get('sector') or 'N/A'
+        company['percentile'], sector_updated = sector_stats.percentile(sector, company.get('score'))
+        last_updated = company.get('lastUpdated')
+        if isinstance(last_updated, datetime):
+            company['lastUpdated'] = last_updated.strftime("%B %d, %Y")
+        else:
+            last_updated = None
+        # The percentile changes whenever a peer's score does, so the sector's rebuild time counts too
+        last_modified = max((t for t in (last_updated, sector_updated) if isinstance(t, datetime)), default=None)
+        return serialization.dumps(company), last_modified, [f"sector:{sector}"]
+
+    entry = response_cache.get_or_build(f"company:{name}", build)
+    if entry is None:
+        return jsonify({"error": "Company not found"}), 404
+    view_tracker.record(name)
+    return cached_json_response(entry)
+
+def parse_query_date(value, end_of_day=False):
+    """ISO date or datetime from a query parameter; a bare `to` date covers that whole day."""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"Invalid date '{value}', expected YYYY-MM-DD or an ISO datetime")
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(dt.timezone.utc).replace(tzinfo=None)
+    if end_of_day and len(value) == 10:
+        parsed += dt.timedelta(days=1) - dt.timedelta(microseconds=1)
+    return parsed
+
+@app.route('/api/companies/<name>/history', methods=['GET'])
+def get_company_history(name):
+    """
+    Score history for a company. ?from= and ?to= are ISO dates (default: the
+    last year); ?resolution= is auto (default), raw, day, week or month.
+    At most SCORE_HISTORY_MAX_POINTS of the latest points are returned;
+    "truncated" says whether older ones in the range were left out.
+    """
+    company = companies_col.find_one({"name": name}, {"_id": 0, "ticker": 1})
+    if not company:
+        return jsonify({"error": "Company not found"}), 404
+    try:
+        end = parse_query_date(request.args.get('to'), end_of_day=True) or datetime.utcnow()
+        start = parse_query_date(request.args.get('from')) or end - dt.timedelta(days=365)
+        resolution, points, truncated = score_history.query(
+            company["ticker"], start, end,
+            resolution=request.args.get('resolution', 'auto'),
+            limit=Config.SCORE_HISTORY_MAX_POINTS,
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return serialization.json_response({
+        "name": name,
+        "ticker": company["ticker"],
+        "resolution": resolution,
+        "from": start,
+        "to": end,
+        "points": points,
+        "truncated": truncated,
+    })
+
+@app.route('/api/sectors', methods=['GET'])
+def get_sectors():
+    """Score summary (count, mean, quartiles) of every sector."""
+    return serialization.json_response(sector_stats.list())
+
+@app.route('/api/sectors/<sector>', methods=['GET'])
+def get_sector(sector):
+    """A sector's score distribution and average credit trend; ?scores=true adds the sorted scores."""
+    stats = sector_stats.get(sector, include_scores=request.args.get('scores') == 'true')
+    if not stats:
+        return jsonify({"error": "Sector not found"}), 404
+    return serialization.json_response(stats)
+
+@app.route('/api/scenarios', methods=['POST'])
+def run_scenarios():
+    """
+    Re-scores every company under one or more what-if scenarios in a single
+    vectorized pass each. Body: a scenario object (see stress_test.Scenario)
+    or {"scenarios": [...]}; optional "limit" caps the ranked companies returned.
+    """
+    body = request.get_json(silent=True)
+    if not isinstance(body, dict):
+        return jsonify({"error": "Request body must be a JSON object"}), 400
+    specs = body.get("scenarios", [body])
+    if not isinstance(specs, list) or not specs:
+        return jsonify({"error": "scenarios must be a non-empty list"}), 400
+    if len(specs) > Config.SCENARIO_MAX_BATCH:
+        return jsonify({"error": f"At most {Config.SCENARIO_MAX_BATCH} scenarios per request"}), 400
+    try:
+        scenarios = [Scenario(spec) for spec in specs]
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    limit = body.get("limit")
+    if limit is not None:
+        try:
+            limit = int(limit)
+        except (TypeError, ValueError):
+            limit = 0
+        if limit < 1:
+            return jsonify({"error": "limit must be a positive integer"}), 400
+
+    universe = scenario_universe.get()
+    start = time.perf_counter()
+    results = []
+    for scenario in scenarios:
+        scores = run_scenario(universe, scenario)
+        results.append({
+            "name": scenario.name,
+            "weights": scenario.weights,
+            "summary": summarize(universe, scores),
+            "rankings": rank_results(universe, scores, limit),
+        })
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    if "scenarios" not in body:
+        return serialization.json_response(dict(results[0], universe=len(universe), elapsedMs=elapsed_ms))
+    return serialization.json_response({"universe": len(universe), "elapsedMs": elapsed_ms, "results": results})
+
+@app.route('/api/db/pool', methods=['GET'])
+def get_db_pool():
+    """MongoDB connection pool options and live per-server connection counts for this process."""
+    return jsonify(mongo.pool_info())
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus metrics: refresh stage and route latency histograms, counters and last-cycle stats."""
+    return Response(registry.render(), mimetype="text/plain; version=0.0.4")
+
+def profiler_authorized():
+    """True when PROFILER_TOKEN is set and the request carries it as a bearer token."""
+    if not Config.PROFILER_TOKEN:
+        return False
+    scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+    return scheme.lower() == 'bearer' and hmac.compare_digest(token.encode(), Config.PROFILER_TOKEN.encode())
+
+@app.route('/api/profiler', methods=['GET'])
+def get_profile():
+    """Collapsed stacks gathered by the sampling profiler (flamegraph input)."""
+    if not profiler_authorized():
+        return jsonify({"error": "Not found"}), 404
+    return Response(profiler.collapsed(), mimetype="text/plain", headers={"X-Profiler-Enabled": str(profiler.enabled).lower()})
+
+@app.route('/api/profiler', methods=['POST'])
+def toggle_profiler():
+    """Starts or stops the sampling profiler: ?enabled=true|false, ?reset=true clears samples."""
+    if not profiler_authorized():
+        return jsonify({"error": "Not found"}), 404
+    if request.args.get('reset') == 'true':
+        profiler.reset()
+    enabled = request.args.get('enabled')
+    if enabled == 'true':
+        profiler.start()
+    elif enabled == 'false':
+        profiler.stop()
+    return jsonify({"enabled": profiler.enabled})
+
+@app.route('/api/stream/scores', methods=['GET'])
+def stream_scores():
+    """
+    Server-Sent Events stream of score updates. Each `score` event carries a
+    compact diff: ticker, name, lastUpdated and only the fields that changed.
+    Optional ?tickers=AAPL,MSFT limits the stream to those tickers. Answers
+    503 once SCORE_STREAM_MAX_SUBSCRIBERS streams are open in this process.
+    """
+    tickers = {t.strip() for t in request.args.get('tickers', '').split(',') if t.strip()}
+    subscription = score_broadcaster.subscribe()
+    if subscription is None:
+        return jsonify({"error": "Too many open score streams, try again later"}), 503, {"Retry-After": "30"}
+
+    def events():
+        yield "retry: 5000\n\n"
         while True:
-            fetch_and_store_data()
-            time.sleep(60 * 60)
-            
-    scheduler_thread = threading.Thread(target=start_scheduler)
-    scheduler_thread.daemon = True
-    scheduler_thread.start()
-    
-    app.run(debug=True, use_reloader=False)
\ No newline at end of file
+            try:
+                event = subscription.get(timeout=Config.SCORE_STREAM_KEEPALIVE)
+            except queue.Empty:
+                yield ": keep-alive\n\n"
+                continue
+            if tickers and event["ticker"] not in tickers:
+                continue
+            yield f"event: score\ndata: {app.json.dumps(event)}\n\n"
+
+    response = Response(stream_with_context(events()), mimetype="text/event-stream")
+    # Runs even if the client leaves before the stream starts
+    response.call_on_close(lambda: score_broadcaster.unsubscribe(subscription))
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+@app.route('/api/export/companies', methods=['GET'])
+def export_companies():
+    """
+    Streams every company's score, credit trend and metrics in one response:
+    NDJSON by default, or ?format=arrow (IPC stream) / ?format=parquet.
+    """
+    fmt = request.args.get('format', 'ndjson')
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({"error": f"format must be one of: {', '.join(EXPORT_FORMATS)}"}), 400
+
+    if fmt == 'ndjson':
+        body = iter_ndjson(companies_col)
+    else:
+        if importlib.util.find_spec("pyarrow") is None:
+            return jsonify({"error": "Arrow/Parquet export requires pyarrow to be installed"}), 501
+        body = iter_arrow(companies_col, fmt)
+
+    response = Response(stream_with_context(body), mimetype=EXPORT_FORMATS[fmt])
+    extension = {'ndjson': 'ndjson', 'arrow': 'arrows', 'parquet': 'parquet'}[fmt]
+    response.headers['Content-Disposition'] = f'attachment; filename=companies.{extension}'
+    return response
+
+# Refreshes run in worker.py; `python app.py` can embed a worker for local development
+if __name__ == '__main__':
+    if Config.EMBEDDED_WORKER:
+        from worker import start_embedded_worker, build_policy
+        start_embedded_worker(COMPANIES, refresh_batch, policy=build_policy(companies_col, view_tracker))
+
+    app.run(debug=True, use_reloader=False)
@@ -0,0 +1,140 @@
+# article_cache.py
+from datetime import datetime, timedelta, timezone
+import hashlib
+from pymongo import ASCENDING, DESCENDING, UpdateOne
+import sentiment_engine
+
+# Articles are kept this many days past max_age_days before the TTL index drops them
+RETENTION_SLACK_DAYS = 1
+
+
+def article_key(article):
+    """Content hash identifying an article: URL plus headline and description."""
+    parts = [article.get("url") or "", article.get("title") or "", article.get("description") or ""]
+    return hashlib.sha1("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+def parse_published_at(value):
+    """Parses NewsAPI's ISO-8601 `publishedAt` into a naive UTC datetime."""
+    if not value:
+        return None
+    try:
+        published = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if published.tzinfo is not None:
+        published = published.astimezone(timezone.utc).replace(tzinfo=None)
+    return published
+
+
+class ArticleSentimentCache:
+    """
+    Stores the computed sentiment of every article seen for a ticker, keyed
+    by content hash, so headlines are scored once no matter how many cycles
+    return them.
+
+    A ticker's news score is the mean sentiment of its `window` most recently
+    published cached articles from the last `max_age_days`, so it reflects
+    recent news rather than NewsAPI's relevancy ranking, and lapses to None
+    once no article is recent enough. Articles are fetched newest first from
+    the publication time of the newest cached one (inclusive, so articles
+    sharing that second are not lost; the ones already cached are dropped by
+    their content hash): anything a full page leaves out is older than every
+    article on it, so it could not be among the `window` most recent.
+    Articles without a publication date are stored with publishedAt None;
+    they never move that cursor and age by scoredAt. A TTL index on scoredAt
+    deletes articles once they are too old to count.
+    """
+
+    def __init__(self, db, collection_name="article_sentiment", window=10, max_age_days=7):
+        self.collection = db[collection_name]
+        self.window = window
+        self.max_age_days = max_age_days
+        self._indexed = False
+
+    def cutoff(self):
+        """Oldest publication time still counted in the score."""
+        return datetime.utcnow() - timedelta(days=self.max_age_days)
+
+    def ensure_indexes(self):
+        if self._indexed:
+            return
+        self.collection.create_index([("ticker", ASCENDING), ("publishedAt", DESCENDING)])
+        # An article is scored no earlier than it is published, so it has aged
+        # out of the score by the time this expires it
+        self.collection.create_index(
+            "scoredAt", expireAfterSeconds=(self.max_age_days + RETENTION_SLACK_DAYS) * 24 * 60 * 60
+        )
+        self._indexed = True
+
+    def last_published(self, ticker):
+        """publishedAt of the newest cached article for `ticker`, or None."""
+        self.ensure_indexes()
+        doc = self.collection.find_one(
+            {"ticker": ticker, "publishedAt": {"$ne": None}},
+            {"_id": 0, "publishedAt": 1},
+            sort=[("publishedAt", DESCENDING)],
+        )
+        return doc["publishedAt"] if doc else None
+
+    def store(self, ticker, articles):
+        """Scores and stores articles not cached yet. Returns how many were new."""
+        if not articles:
+            return 0
+        self.ensure_indexes()
+
+        keyed = {}
+        for article in articles:
+            keyed.setdefault(f"{ticker}:{article_key(article)}", article)
+        cached = {doc["_id"] for doc in self.collection.find({"_id": {"$in": list(keyed)}}, {"_id": 1})}
+        new = {key: article for key, article in keyed.items() if key not in cached}
+        if not new:
+            return 0
+
+        raw_scores = sentiment_engine.score_batch([article.get("title") or "" for article in new.values()])
+        now = datetime.utcnow()
+        ops = []
+        for (key, article), raw_score in zip(new.items(), raw_scores):
+            ops.append(UpdateOne(
+                {"_id": key},
+                {"$setOnInsert": {
+                    "ticker": ticker,
+                    "url": article.get("url"),
+                    "title": article.get("title"),
+                    "publishedAt": parse_published_at(article.get("publishedAt")),
+                    "rawScore": raw_score,
+                    "sentiment": sentiment_engine.normalize_score(raw_score),
+                    "scoredAt": now,
+                }},
+                upsert=True,
+            ))
+        self.collection.bulk_write(ops, ordered=False)
+        return len(ops)
+
+    def aggregate(self, ticker):
+        """Mean sentiment (0-100) of the `window` most recent articles within max_age_days, or None."""
+        self.ensure_indexes()
+        cutoff = self.cutoff()
+        result = list(self.collection.aggregate([
+            {"$match": {"ticker": ticker, "$or": [
+                {"publishedAt": {"$gte": cutoff}},
+                {"publishedAt": None, "scoredAt": {"$gte": cutoff}},
+            ]}},
+            {"$sort": {"publishedAt": -1}},
+            {"$limit": self.window},
+            {"$group": {"_id": None, "sentiment": {"$avg": "$sentiment"}, "count": {"$sum": 1}}},
+        ]))
+        if not result or not result[0]["count"]:
+            return None
+        return result[0]["sentiment"]
+
+    def since_params(self, ticker):
+        """
+        NewsAPI `from` parameter asking only for articles published since the
+        last cached one, and never for ones too old to count in the score.
+        """
+        since = self.cutoff()
+        last = self.last_published(ticker)
+        if last is not None:
+            since = max(since, last)
+        return {"from": since.strftime("%Y-%m-%dT%H:%M:%S")}
@@ -0,0 +1,218 @@
+# backfill.py
+"""
+Offline backfill of historical credit trends.
+
+Computes the monthly credit score trend (same method as generate_credit_trend)
+for every ticker in a list file over a date range, fanning tickers out over a
+process pool. Prices are read from a local Parquet/CSV cache, one file per
+ticker; files that are missing or do not cover the requested range are
+downloaded from Yahoo Finance unless --offline is given. Progress is checkpointed to Mongo so an interrupted run can be resumed
+with --run-id.
+
+Usage:
+    python backfill.py tickers.txt --start 2015-01-01 --end 2024-12-31 \\
+        --price-cache ./price_cache [--workers 8] [--offline] [--run-id ID]
+"""
+import argparse
+import json
+import os
+import uuid
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+import pandas as pd
+from pymongo import UpdateOne
+
+from config import Config
+from mongo import create_client, database_for
+from scoring import monthly_credit_trend
+
+# Bars needed before the range start to warm up MA50 and the 30-bar smoothing
+WARMUP_DAYS = 150
+
+# Cache files without a coverage record count as covering this far past their
+# first and last bars (weekends and market holidays)
+COVERAGE_SLACK = pd.Timedelta(days=5)
+
+
+def read_ticker_file(path):
+    """One ticker per line; blank lines and # comments are ignored."""
+    with open(path) as f:
+        tickers = [line.split("#")[0].strip() for line in f]
+    return list(dict.fromkeys(t for t in tickers if t))
+
+
+def cache_path(cache_dir, ticker):
+    for extension in ("parquet", "csv"):
+        path = os.path.join(cache_dir, f"{ticker}.{extension}")
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def coverage_path(price_path):
+    """Sidecar recording the date range a cache file was downloaded for."""
+    return os.path.splitext(price_path)[0] + ".coverage.json"
+
+
+def read_prices(path):
+    if path.endswith(".parquet"):
+        prices = pd.read_parquet(path)
+    else:
+        prices = pd.read_csv(path, index_col=0, parse_dates=True)
+    prices.index = pd.to_datetime(prices.index)
+    if prices.index.tz is not None:
+        prices = prices.tz_localize(None)
+    return prices.sort_index()
+
+
+def cached_coverage(path, prices):
+    """(start, end) a cache file covers: its coverage record, else its bars plus COVERAGE_SLACK."""
+    try:
+        with open(coverage_path(path)) as f:
+            coverage = json.load(f)
+        return pd.Timestamp(coverage["start"]), pd.Timestamp(coverage["end"])
+    except (OSError, ValueError, KeyError):
+        if prices.empty:
+            return None
+        return prices.index[0] - COVERAGE_SLACK, prices.index[-1] + COVERAGE_SLACK
+
+
+def load_prices(cache_dir, ticker, start, end, offline):
+    """
+    Daily bars for `ticker` from the cache. A file that is missing or does not
+    cover start..end is downloaded again over the union of both ranges.
+    """
+    path = cache_path(cache_dir, ticker)
+    prices = read_prices(path) if path is not None else None
+    coverage = cached_coverage(path, prices) if prices is not None else None
+    if coverage is None or coverage[0] > start or coverage[1] < end:
+        if offline:
+            if prices is None:
+                raise FileNotFoundError(f"No cached prices for {ticker} in {cache_dir}")
+            raise ValueError(f"Cached prices for {ticker} do not cover {start:%Y-%m-%d} to {end:%Y-%m-%d}")
+        fetch_start, fetch_end = start, end
+        if coverage is not None:
+            fetch_start, fetch_end = min(start, coverage[0]), max(end, coverage[1])
+        path = download_prices(cache_dir, ticker, fetch_start, fetch_end)
+        prices = read_prices(path)
+    return prices.loc[start:end]
+
+
+def download_prices(cache_dir, ticker, start, end):
+    import yfinance as yf
+
+    hist = yf.Ticker(ticker).history(start=start, end=end + pd.Timedelta(days=1))
+    if hist.empty:
+        raise ValueError(f"No price data returned for {ticker}")
+    hist = hist.tz_localize(None)
+
+    os.makedirs(cache_dir, exist_ok=True)
+    try:
+        path = os.path.join(cache_dir, f"{ticker}.parquet")
+        hist.to_parquet(path)
+    except ImportError:
+        path = os.path.join(cache_dir, f"{ticker}.csv")
+        hist.to_csv(path)
+    with open(coverage_path(path), "w") as f:
+        json.dump({"start": start.strftime("%Y-%m-%d"), "end": end.strftime("%Y-%m-%d")}, f)
+    return path
+
+
+def backfill_ticker(ticker, start, end, cache_dir, offline):
+    """Runs in a worker process; returns (ticker, trend points)."""
+    prices = load_prices(cache_dir, ticker, start - pd.Timedelta(days=WARMUP_DAYS), end, offline)
+    if len(prices) < 50:
+        raise ValueError(f"Insufficient historical data for {ticker}")
+
+    monthly_trend = monthly_credit_trend(prices["Close"]).loc[start:end]
+    return ticker, [
+        {"date": month.to_pydatetime(), "month": month.strftime("%b"), "score": float(score)}
+        for month, score in monthly_trend.items()
+    ]
+
+
+def run(args):
+    db = database_for(create_client(args.mongo_uri))
+    runs = db.backfill_runs
+    results = db.credit_trend_backfill
+
+    start = pd.Timestamp(args.start)
+    end = pd.Timestamp(args.end)
+    tickers = read_ticker_file(args.tickers)
+
+    run_id = args.run_id or uuid.uuid4().hex
+    checkpoint = runs.find_one({"_id": run_id}) or {}
+    done = set(checkpoint.get("completed", []))
+    if checkpoint:
+        print(f"Resuming backfill {run_id}: {len(done)} of {len(tickers)} tickers already done.")
+    else:
+        runs.insert_one({
+            "_id": run_id,
+            "tickers": args.tickers,
+            "start": start.to_pydatetime(),
+            "end": end.to_pydatetime(),
+            "completed": [],
+            "failed": {},
+            "startedAt": datetime.utcnow(),
+        })
+        print(f"Starting backfill {run_id} for {len(tickers)} tickers.")
+
+    pending = [t for t in tickers if t not in done]
+    completed = 0
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = {
+            pool.submit(backfill_ticker, ticker, start, end, args.price_cache, args.offline): ticker
+            for ticker in pending
+        }
+        for future in as_completed(futures):
+            ticker = futures[future]
+            try:
+                _, trend = future.result()
+            except Exception as e:
+                print(f"Error backfilling {ticker}: {e}")
+                runs.update_one({"_id": run_id}, {"$set": {f"failed.{ticker}": str(e), "updatedAt": datetime.utcnow()}})
+                continue
+
+            results.bulk_write([UpdateOne(
+                {"runId": run_id, "ticker": ticker},
+                {"$set": {"runId": run_id, "ticker": ticker, "trend": trend, "computedAt": datetime.utcnow()}},
+                upsert=True,
+            )])
+            if args.update_companies:
+                db.companies.update_one(
+                    {"ticker": ticker},
+                    {"$set": {"creditTrend": [
+                        {"month": p["month"], "period": p["date"].strftime("%Y-%m"), "score": p["score"]}
+                        for p in trend[-8:]
+                    ]}},
+                )
+            runs.update_one(
+                {"_id": run_id},
+                {"$addToSet": {"completed": ticker}, "$unset": {f"failed.{ticker}": ""}, "$set": {"updatedAt": datetime.utcnow()}},
+            )
+            completed += 1
+            if completed % 100 == 0:
+                print(f"Backfilled {completed} of {len(pending)} tickers...")
+
+    runs.update_one({"_id": run_id}, {"$set": {"finishedAt": datetime.utcnow()}})
+    print(f"Backfill {run_id} finished: {completed} of {len(pending)} tickers computed.")
+    return run_id
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Backfill historical credit trends for a list of tickers.")
+    parser.add_argument("tickers", help="file with one ticker per line")
+    parser.add_argument("--start", required=True, help="first month to compute (YYYY-MM-DD)")
+    parser.add_argument("--end", default=datetime.utcnow().strftime("%Y-%m-%d"), help="last day to compute (YYYY-MM-DD)")
+    parser.add_argument("--price-cache", default="price_cache", help="directory of <TICKER>.parquet / <TICKER>.csv files")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="worker processes (default: all cores)")
+    parser.add_argument("--offline", action="store_true", help="never download; fail tickers missing from the cache")
+    parser.add_argument("--run-id", help="resume an earlier run instead of starting a new one")
+    parser.add_argument("--update-companies", action="store_true", help="also overwrite companies.creditTrend with the last 8 months")
+    parser.add_argument("--mongo-uri", default=Config.MONGO_URI)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    run(parse_args())
@@ -0,0 +1,84 @@
+"""
+Measures NewsAPIClient throughput against a local stub NewsAPI server.
+The stub adds a fixed latency per request and can answer a share of
+requests with 429 to exercise the retry path.
+
+Usage: python benchmarks/bench_news_client.py [tickers] [latency_ms] [error_rate]
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from news_client import NewsAPIClient, build_session
+
+HEADLINES = [
+    "Shares rise on strong growth outlook",
+    "Stock falls as analysts turn bearish",
+    "Company reports record gain in quarterly revenue",
+    "Regulators probe decline in margins",
+]
+
+
+def make_handler(latency, error_rate):
+    class StubNewsAPI(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            time.sleep(latency)
+            if random.random() < error_rate:
+                body = b'{"status": "error", "code": "rateLimited"}'
+                self.send_response(429)
+                self.send_header("Retry-After", "0")
+            else:
+                articles = [{"title": random.choice(HEADLINES), "url": f"https://example.com/{i}"} for i in range(10)]
+                body = json.dumps({"status": "ok", "articles": articles}).encode()
+                self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return StubNewsAPI
+
+
+def run(client, tickers, max_workers):
+    start = time.perf_counter()
+    results = client.fetch_many(tickers, max_workers=max_workers)
+    elapsed = time.perf_counter() - start
+    failed = sum(1 for articles in results.values() if articles is None)
+    return elapsed, failed
+
+
+def main(ticker_count=200, latency_ms=20, error_rate=0.0):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(latency_ms / 1000, error_rate))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/v2/everything"
+    tickers = [f"T{i:05d}" for i in range(ticker_count)]
+
+    print(f"{ticker_count} tickers, {latency_ms}ms stub latency, {error_rate:.0%} 429s")
+    print(f"{'workers':>7} {'seconds':>8} {'req/sec':>8} {'failed':>6}")
+    try:
+        for workers in (1, 4, 16, 32):
+            client = NewsAPIClient("stub", base_url=url, session=build_session(pool_size=workers), backoff_factor=0)
+            elapsed, failed = run(client, tickers, workers)
+            print(f"{workers:>7} {elapsed:>8.2f} {ticker_count / elapsed:>8.1f} {failed:>6}")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    main(
+        int(args[0]) if len(args) > 0 else 200,
+        float(args[1]) if len(args) > 1 else 20,
+        float(args[2]) if len(args) > 2 else 0.0,
+    )
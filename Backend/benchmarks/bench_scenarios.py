@@ -0,0 +1,71 @@
+"""
+Times what-if scenarios over a synthetic universe: one vectorized re-score
+per scenario plus ranking, as served by POST /api/scenarios.
+
+Usage: python benchmarks/bench_scenarios.py [companies] [scenarios]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from stress_test import Scenario, ScoreUniverse, rank_results, run_scenario
+
+SECTORS = ["Technology", "Energy", "Healthcare", "Financial Services", "Utilities"]
+
+
+def synthetic_universe(count, seed=42):
+    rng = np.random.default_rng(seed)
+    documents = []
+    for i in range(count):
+        ma50 = float(rng.uniform(20, 500))
+        documents.append({
+            "name": f"Company {i:05d}",
+            "ticker": f"T{i:05d}",
+            "sector": SECTORS[i % len(SECTORS)],
+            "score": 70.0,
+            "scoreInputs": {
+                "close": ma50 * float(rng.normal(1, 0.08)),
+                "ma50": ma50,
+                "newsSentiment": None if i % 10 == 0 else float(rng.uniform(30, 90)),
+                "debtToEquity": float(rng.uniform(0, 300)),
+                "profitMargins": float(rng.normal(0.1, 0.1)),
+                "returnOnEquity": float(rng.normal(0.15, 0.1)),
+            },
+        })
+    return ScoreUniverse(documents)
+
+
+def main(count=5000, scenario_count=200):
+    universe = synthetic_universe(count)
+    scenarios = [
+        Scenario({
+            "shocks": {"price": -i / scenario_count, "leverage": i / scenario_count},
+            "sectorShocks": {"Energy": {"price": -0.1}},
+            "weights": {"fundamentals": 0.2},
+        })
+        for i in range(scenario_count)
+    ]
+
+    start = time.perf_counter()
+    for scenario in scenarios:
+        scores = run_scenario(universe, scenario)
+    scoring = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for scenario in scenarios:
+        rank_results(universe, run_scenario(universe, scenario), limit=50)
+    ranked = time.perf_counter() - start
+
+    print(f"{count} companies, {scenario_count} scenarios")
+    print(f"re-score only:      {scoring / scenario_count * 1e3:8.3f} ms/scenario")
+    print(f"re-score + top 50:  {ranked / scenario_count * 1e3:8.3f} ms/scenario")
+    print(f"scored companies:   {int(np.count_nonzero(~np.isnan(scores)))}")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    main(int(args[0]) if args else 5000, int(args[1]) if len(args) > 1 else 200)
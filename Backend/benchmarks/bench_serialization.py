@@ -0,0 +1,92 @@
+"""
+Compares the old iterrows()/jsonify serialization of stock data and company
+details with the lean serialization path (tail-first, column-wise records,
+orjson when installed), reporting bytes/sec.
+
+Usage: python benchmarks/bench_serialization.py [bars ...]
+"""
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+
+import serialization
+from serialization import history_records
+from fixtures import synthetic_history, synthetic_info
+
+app = Flask(__name__)
+
+
+def old_records(hist):
+    return [
+        {
+            'date': date.strftime('%Y-%m-%d'),
+            'close': float(row['Close']),
+            'volume': int(row['Volume'])
+        }
+        for date, row in hist.iterrows()
+    ][-30:]
+
+
+def stock_payload(hist, records):
+    info = synthetic_info("AAPL")
+    return {'symbol': 'AAPL', 'market_cap': info['marketCap'], 'beta': info['beta'], 'historical_data': records}
+
+
+def company_document():
+    return {
+        "name": "Apple Inc.",
+        "ticker": "AAPL",
+        "sector": "Technology",
+        "score": 71.23456789,
+        "lastUpdated": "October 16, 2026",
+        "sentiment": [{"category": c, "positive": 80, "negative": 20} for c in ("News", "Social Media", "Reports")],
+        "creditTrend": [{"month": m, "score": 70.0 + i / 3} for i, m in enumerate("Mar Apr May Jun Jul Aug Sep Oct".split())],
+        "metrics": {"revenue": "$383.29B", "debt_to_equity": "1.81", "profit_margin": "25.31%", "return_on_equity": "156.08%"},
+    }
+
+
+def best_of(fn, repeat=20):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        body = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, len(body)
+
+
+def report(label, old, new):
+    (old_time, old_bytes), (new_time, new_bytes) = old, new
+    print(
+        f"{label:<28} {old_time * 1e3:>9.3f} {new_time * 1e3:>9.3f} {old_time / new_time:>7.1f}x "
+        f"{old_bytes / old_time / 1e6:>10.1f} {new_bytes / new_time / 1e6:>10.1f}"
+    )
+
+
+def main(bar_counts):
+    encoder = "orjson" if serialization.orjson else "json (orjson not installed)"
+    print(f"encoder: {encoder}")
+    print(f"{'payload':<28} {'old ms':>9} {'new ms':>9} {'speedup':>8} {'old MB/s':>10} {'new MB/s':>10}")
+    with app.app_context():
+        for bars in bar_counts:
+            hist = synthetic_history("AAPL", bars)
+            report(
+                f"stock data, {bars} bars",
+                best_of(lambda: app.json.response(stock_payload(hist, old_records(hist))).get_data()),
+                best_of(lambda: serialization.dumps(stock_payload(hist, history_records(hist)))),
+            )
+        company = company_document()
+        report(
+            "company details",
+            best_of(lambda: app.json.dumps(company).encode("utf-8"), repeat=2000),
+            best_of(lambda: serialization.dumps(company), repeat=2000),
+        )
+    assert json.loads(serialization.dumps(stock_payload(hist, history_records(hist))))["historical_data"] == old_records(hist)
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [252, 1260, 2520])
@@ -0,0 +1,252 @@
+"""
+Market and news fixtures plus fake Yahoo Finance, NewsAPI and Mongo backends
+for the offline benchmarks. Nothing here touches the network.
+
+Recorded fixtures are a gzipped JSON file of real OHLCV bars and headlines
+(see `record`); any symbol without a recording gets a deterministic synthetic
+random-walk history, so a suite can scale to thousands of tickers.
+"""
+import gzip
+import json
+import random
+import zlib
+
+import numpy as np
+import pandas as pd
+import requests
+
+HISTORY_BARS = 504
+TIMEZONE = "America/New_York"
+
+HEADLINE_TEMPLATES = [
+    "{name} shares rise on strong growth outlook",
+    "{name} stock falls as analysts turn bearish",
+    "{name} reports record gain in quarterly revenue",
+    "Regulators probe decline in {name} margins",
+    "{name} beats estimates, raises guidance",
+    "{name} faces lawsuit over accounting concerns",
+    "{name} announces buyback after profit surge",
+    "{name} slides on weak demand and layoffs",
+]
+
+INFO_TEMPLATE = {
+    "sector": "Technology",
+    "marketCap": 1.0e12,
+    "totalRevenue": 3.0e11,
+    "debtToEquity": 150.0,
+    "profitMargins": 0.2,
+    "returnOnEquity": 0.3,
+    "beta": 1.2,
+}
+
+
+def seed_for(symbol):
+    """Stable per-symbol seed (unlike hash(), independent of PYTHONHASHSEED)."""
+    return zlib.crc32(symbol.encode("utf-8"))
+
+
+def make_tickers(count):
+    """`count` company dicts shaped like app.COMPANIES."""
+    return [{"name": f"Company {i:05d}", "ticker": f"T{i:05d}"} for i in range(count)]
+
+
+def last_session():
+    """Yesterday's date: synthetic histories end there so the history store's lookback window covers them."""
+    return pd.Timestamp.today().normalize() - pd.Timedelta(days=1)
+
+
+def synthetic_history(symbol, bars=HISTORY_BARS, end=None):
+    """
+    Deterministic daily OHLCV random walk, indexed like yfinance output.
+    Prices depend only on the symbol; the dates end at `end` (default: yesterday).
+    """
+    end = last_session() if end is None else end
+    rng = np.random.default_rng(seed_for(symbol))
+    close = 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.015, bars)))
+    spread = np.abs(rng.normal(0, 0.005, bars)) * close
+    return pd.DataFrame(
+        {
+            "Open": close + rng.normal(0, 0.002, bars) * close,
+            "High": close + spread,
+            "Low": close - spread,
+            "Close": close,
+            "Volume": rng.integers(1_000_000, 50_000_000, bars),
+        },
+        index=pd.bdate_range(end=end, periods=bars, tz=TIMEZONE, name="Date"),
+    )
+
+
+def synthetic_info(symbol):
+    rng = random.Random(seed_for(symbol))
+    info = dict(INFO_TEMPLATE)
+    info["marketCap"] *= rng.uniform(0.05, 3)
+    info["totalRevenue"] *= rng.uniform(0.05, 1.5)
+    info["debtToEquity"] *= rng.uniform(0.2, 2)
+    info["profitMargins"] *= rng.uniform(-0.5, 1.5)
+    return info
+
+
+def synthetic_headlines(symbol, count=10):
+    rng = random.Random(seed_for(symbol))
+    return [rng.choice(HEADLINE_TEMPLATES).format(name=symbol) for _ in range(count)]
+
+
+class FixtureSet:
+    """
+    Price histories, info dicts and headlines by symbol. Recorded entries
+    are used when present, synthetic ones otherwise.
+    """
+
+    def __init__(self, histories=None, infos=None, headlines=None, bars=HISTORY_BARS):
+        self.histories = histories or {}
+        self.infos = infos or {}
+        self.headlines = headlines or {}
+        self.bars = bars
+
+    def history(self, symbol):
+        if symbol not in self.histories:
+            self.histories[symbol] = synthetic_history(symbol, self.bars)
+        return self.histories[symbol]
+
+    def info(self, symbol):
+        return self.infos.get(symbol) or synthetic_info(symbol)
+
+    def articles(self, symbol):
+        titles = self.headlines.get(symbol) or synthetic_headlines(symbol)
+        return [
+            {
+                "title": title,
+                "url": f"https://example.com/{symbol}/{i}",
+                "publishedAt": (last_session() + pd.Timedelta(hours=i)).isoformat() + "Z",
+            }
+            for i, title in enumerate(titles)
+        ]
+
+    def aliased(self, companies):
+        """
+        Maps each benchmark ticker onto a recorded symbol (round-robin) so a
+        small recording can drive a large ticker universe.
+        """
+        recorded = sorted(self.histories)
+        if not recorded:
+            return self
+        aliases = FixtureSet(bars=self.bars)
+        for i, company in enumerate(companies):
+            source = recorded[i % len(recorded)]
+            aliases.histories[company["ticker"]] = self.histories[source]
+            aliases.infos[company["ticker"]] = self.infos.get(source)
+            aliases.headlines[company["ticker"]] = self.headlines.get(source)
+        return aliases
+
+    @classmethod
+    def load(cls, path):
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            data = json.load(f)
+        histories = {}
+        for symbol, bars in data["histories"].items():
+            frame = pd.DataFrame(bars["values"], columns=bars["columns"])
+            frame.index = pd.to_datetime(bars["index"], utc=True).tz_convert(TIMEZONE).rename("Date")
+            histories[symbol] = frame
+        return cls(histories, data.get("infos"), data.get("headlines"))
+
+    def save(self, path):
+        histories = {
+            symbol: {
+                "columns": list(frame.columns),
+                "index": [ts.isoformat() for ts in frame.index],
+                "values": frame.to_numpy().tolist(),
+            }
+            for symbol, frame in self.histories.items()
+        }
+        with gzip.open(path, "wt", encoding="utf-8") as f:
+            json.dump({"histories": histories, "infos": self.infos, "headlines": self.headlines}, f)
+
+
+def record(symbols, path, period="2y", news_api_key=None):
+    """Records live Yahoo Finance (and optionally NewsAPI) data for `symbols` into `path`."""
+    import yfinance as yf
+    from news_client import NewsAPIClient
+
+    fixtures = FixtureSet()
+    news = NewsAPIClient(news_api_key) if news_api_key else None
+    for symbol in symbols:
+        ticker = yf.Ticker(symbol)
+        fixtures.histories[symbol] = ticker.history(period=period)
+        info = ticker.info
+        fixtures.infos[symbol] = {key: info.get(key) for key in INFO_TEMPLATE}
+        if news is not None:
+            fixtures.headlines[symbol] = [a.get("title") or "" for a in news.fetch_articles(symbol)]
+    fixtures.save(path)
+    return fixtures
+
+
+class FakeTicker:
+    """Stands in for yf.Ticker, serving `info` and `history()` from a FixtureSet."""
+
+    fixtures = FixtureSet()
+
+    def __init__(self, symbol):
+        self.ticker = symbol
+
+    @property
+    def info(self):
+        return self.fixtures.info(self.ticker)
+
+    def history(self, period=None, start=None, **kwargs):
+        frame = self.fixtures.history(self.ticker)
+        if start is not None:
+            frame = frame[frame.index.tz_localize(None) >= pd.Timestamp(start)]
+        return frame.copy()
+
+
+def fake_download(fixtures):
+    """A yf.download replacement returning the grouped (ticker, field) frame."""
+    def download(symbols, period=None, start=None, group_by="ticker", **kwargs):
+        frames = {symbol: FakeTicker(symbol).history(start=start) for symbol in symbols}
+        return pd.concat(frames, axis=1)
+
+    FakeTicker.fixtures = fixtures
+    return download
+
+
+class FakeResponse:
+    def __init__(self, payload, status_code=200):
+        self._payload = payload
+        self.status_code = status_code
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(f"{self.status_code} from fake NewsAPI", response=self)
+
+    def json(self):
+        return self._payload
+
+
+class FakeNewsSession:
+    """A requests.Session stand-in answering NewsAPI /everything queries from fixtures."""
+
+    def __init__(self, fixtures):
+        self.fixtures = fixtures
+        self.calls = 0
+
+    def get(self, url, params=None, timeout=None):
+        self.calls += 1
+        symbol = (params or {}).get("q", "")
+        articles = self.fixtures.articles(symbol)[: int((params or {}).get("pageSize", 10))]
+        return FakeResponse({"status": "ok", "totalResults": len(articles), "articles": articles})
+
+
+def fake_database():
+    """
+    An in-memory Mongo database (mongomock). The time-series price_history
+    and score_history collections are pre-created as plain collections, which
+    mongomock requires.
+    """
+    try:
+        import mongomock
+    except ImportError:
+        raise SystemExit("The offline benchmarks need mongomock: pip install -r benchmarks/requirements.txt")
+    db = mongomock.MongoClient().credit_intelligence
+    db.create_collection("price_history")
+    db.create_collection("score_history")
+    return db
@@ -0,0 +1,307 @@
+"""
+Offline benchmark suite: times the scoring helpers, the refresh worker's
+batched refresh of every ticker and the API routes at several universe sizes against fake Yahoo Finance, NewsAPI
+and Mongo backends, and writes a JSON report that later runs can be compared
+against. Nothing touches the network or a real database.
+
+Usage:
+    python benchmarks/run_suite.py [--sizes 5 500 5000] [--repeat 5]
+                                   [--fixtures recorded.json.gz] [--output report.json]
+                                   [--compare baseline.json]
+    python benchmarks/run_suite.py --record AAPL MSFT --fixtures recorded.json.gz
+"""
+import argparse
+import contextlib
+from datetime import datetime, timezone
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from fixtures import (
+    FakeNewsSession, FakeTicker, FixtureSet, fake_database, fake_download, make_tickers, record,
+)
+
+
+def timed(fn, repeat):
+    """Runs fn() `repeat` times and returns the wall-clock seconds of each run."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def summarize(name, tickers, samples, **extra):
+    ordered = sorted(samples)
+    mean = sum(ordered) / len(ordered)
+    result = {
+        "benchmark": name,
+        "tickers": tickers,
+        "repeat": len(ordered),
+        "meanSeconds": mean,
+        "minSeconds": ordered[0],
+        "maxSeconds": ordered[-1],
+        "p95Seconds": ordered[max(0, int(np.ceil(0.95 * len(ordered))) - 1)],
+    }
+    result.update(extra)
+    return result
+
+
+@contextlib.contextmanager
+def quiet():
+    """Silences the per-company progress prints while timing."""
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+class OfflineBackend:
+    """
+    Runs the app against the fakes: yf.Ticker / yf.download, a NewsAPI
+    client backed by FakeNewsSession, and a fresh in-memory database made
+    the process's shared one, so every store app.init_stores() builds (and
+    any collection it missed) lives in memory. Upstream rate limits are
+    disabled (concurrency limits are kept), so the numbers measure this code
+    rather than the configured request budget.
+    """
+
+    def __init__(self, fixtures, companies):
+        import app
+        import models
+        import mongo
+        from config import Config
+
+        self.app = app
+        self.fixtures = fixtures
+        self.companies = companies
+        self.news_session = FakeNewsSession(fixtures)
+
+        app.yf.Ticker = FakeTicker
+        models.yf.download = fake_download(fixtures)
+        Config.NEWS_API_KEY = "offline"
+        # mongomock has no change streams
+        Config.SCORE_CHANGE_STREAM = False
+
+        mongo.use_database(fake_database())
+        app.init_stores()
+        app.init_sources(news_session=self.news_session, rate_limited=False)
+        self.client = app.app.test_client()
+
+
+def bench_scoring(backend, size, repeat):
+    """
+    calculate_credit_score, the streaming scorer (rebuilt from the full
+    history, and advanced by the latest bar as a refresh does) plus
+    generate_credit_trend, and analyze_sentiment over `size` tickers.
+    """
+    from scoring import calculate_credit_score
+    from streaming_scorer import StreamingScorer, advance_scorer
+
+    app = backend.app
+    symbols = [c["ticker"] for c in backend.companies]
+    histories = {s: backend.fixtures.history(s).tz_localize(None) for s in symbols}
+    moving_averages = {s: h["Close"].rolling(window=50).mean() for s, h in histories.items()}
+    headlines = [a["title"] for s in symbols for a in backend.fixtures.articles(s)]
+    primed = {s: advance_scorer(StreamingScorer(), h["Close"].iloc[:-1]) for s, h in histories.items()}
+
+    def score_all():
+        for s in symbols:
+            calculate_credit_score(histories[s]["Close"], moving_averages[s])
+
+    def rebuild_all():
+        for s in symbols:
+            app.generate_credit_trend(s, advance_scorer(StreamingScorer(), histories[s]["Close"]))
+
+    def advance_all():
+        for s in symbols:
+            scorer = StreamingScorer.from_dict(primed[s].to_dict())
+            app.generate_credit_trend(s, advance_scorer(scorer, histories[s]["Close"].iloc[-1:]))
+
+    def sentiment_all():
+        for headline in headlines:
+            app.analyze_sentiment(headline)
+
+    return [
+        summarize("calculate_credit_score", size, timed(score_all, repeat), bars=len(histories[symbols[0]])),
+        summarize("credit_trend:rebuild", size, timed(rebuild_all, repeat)),
+        summarize("credit_trend:advance", size, timed(advance_all, repeat)),
+        summarize("analyze_sentiment", size, timed(sentiment_all, repeat), headlines=len(headlines)),
+    ]
+
+
+def stage_totals():
+    from metrics import REFRESH_STAGE_SECONDS
+    return {key[0]: total for key, (count, total) in REFRESH_STAGE_SECONDS.totals().items()}
+
+
+def drain(worker):
+    """Runs the worker's claim-and-refresh loop until no job is due."""
+    batches = 0
+    while True:
+        jobs = worker.queue.claim_batch(worker.worker_id, worker.batch_size)
+        if not jobs:
+            return batches
+        worker.run_batch(jobs)
+        batches += 1
+
+
+def bench_refresh(backend, size):
+    """
+    Refreshes every ticker the way worker.py does (batches of claimed jobs
+    through app.refresh_batch): a cold pass against an empty database, then
+    a warm (incremental) one with every job due again.
+    """
+    from config import Config
+    from job_queue import LocalJobQueue
+    from worker import RefreshWorker
+
+    queue = LocalJobQueue(lease_seconds=Config.JOB_LEASE_SECONDS)
+    worker = RefreshWorker(
+        queue,
+        {c["ticker"]: c for c in backend.companies},
+        backend.app.refresh_batch,
+        threads=Config.REFRESH_WORKERS,
+        batch_size=Config.JOB_BATCH_SIZE,
+    )
+    tickers = [c["ticker"] for c in backend.companies]
+    queue.sync(tickers)
+
+    results = []
+    for name in ("worker:cold", "worker:warm"):
+        if name == "worker:warm":
+            for ticker in tickers:
+                queue.enqueue(ticker)
+        before = stage_totals()
+        calls = backend.news_session.calls
+        batches = []
+        with quiet():
+            samples = timed(lambda: batches.append(drain(worker)), 1)
+        after = stage_totals()
+        # Summed across refresh threads, so the total can exceed the wall-clock time
+        stages = {stage: round(after[stage] - before.get(stage, 0.0), 6) for stage in sorted(after)}
+        results.append(summarize(
+            name, size, samples,
+            tickersPerSecond=size / samples[0],
+            batches=batches[0],
+            batchSize=worker.batch_size,
+            newsApiCalls=backend.news_session.calls - calls,
+            stageSeconds=stages,
+        ))
+    return results
+
+
+def bench_routes(backend, size, repeat):
+    """Each route cold (response cache cleared before every request) and warm."""
+    app = backend.app
+    name = backend.companies[size // 2]["name"]
+    routes = [
+        ("GET /api/companies", "/api/companies"),
+        ("GET /api/companies?limit=50", "/api/companies?limit=50&sort=score"),
+        ("GET /api/companies/<name>", f"/api/companies/{name}"),
+        ("GET /api/export/companies", "/api/export/companies"),
+    ]
+    results = []
+    for label, url in routes:
+        sizes = []
+
+        def request():
+            response = backend.client.get(url)
+            assert response.status_code == 200, (url, response.status_code)
+            sizes.append(len(response.get_data()))
+
+        def cold_request():
+            app.response_cache.clear()
+            request()
+
+        results.append(summarize(f"{label}:cold", size, timed(cold_request, repeat), responseBytes=sizes[-1]))
+        request()
+        results.append(summarize(f"{label}:warm", size, timed(request, repeat), responseBytes=sizes[-1]))
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(sizes, repeat, fixtures):
+    report = {
+        "createdAt": datetime.now(timezone.utc).isoformat(),
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "repeat": repeat,
+        "results": [],
+    }
+    for size in sizes:
+        random.seed(0)
+        companies = make_tickers(size)
+        backend = OfflineBackend(fixtures.aliased(companies), companies)
+        print(f"{size} tickers...", file=sys.stderr)
+        report["results"] += bench_scoring(backend, size, repeat)
+        report["results"] += bench_refresh(backend, size)
+        report["results"] += bench_routes(backend, size, repeat)
+    return report
+
+
+def print_table(report, baseline=None):
+    previous = {(r["benchmark"], r["tickers"]): r for r in (baseline or {}).get("results", [])}
+    header = f"{'benchmark':<40} {'tickers':>7} {'mean s':>10} {'p95 s':>10}"
+    print(header + (f" {'baseline':>10} {'speedup':>8}" if baseline else ""))
+    for r in report["results"]:
+        line = f"{r['benchmark']:<40} {r['tickers']:>7} {r['meanSeconds']:>10.4f} {r['p95Seconds']:>10.4f}"
+        old = previous.get((r["benchmark"], r["tickers"]))
+        if old:
+            line += f" {old['meanSeconds']:>10.4f} {old['meanSeconds'] / r['meanSeconds']:>7.2f}x"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmark suite for the credit scoring backend")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[5, 500, 5000], help="universe sizes to run")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per micro-benchmark and route")
+    parser.add_argument("--fixtures", help="recorded fixture file (.json.gz); synthetic data when omitted")
+    parser.add_argument("--output", help="write the JSON report here")
+    parser.add_argument("--compare", help="baseline JSON report to compare against")
+    parser.add_argument("--record", nargs="+", metavar="SYMBOL", help="record live fixtures for these symbols into --fixtures")
+    args = parser.parse_args()
+
+    if args.record:
+        if not args.fixtures:
+            parser.error("--record needs --fixtures to say where to write them")
+        record(args.record, args.fixtures, news_api_key=os.environ.get("NEWS_API_KEY"))
+        print(f"Recorded {len(args.record)} symbols to {args.fixtures}")
+        return
+
+    fixtures = FixtureSet.load(args.fixtures) if args.fixtures else FixtureSet()
+    report = run(args.sizes, args.repeat, fixtures)
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_table(report, baseline)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+# bulk_writer.py
+import threading
+from pymongo.errors import BulkWriteError, PyMongoError
+
+
+class BulkUpserter:
+    """
+    Collects write operations (e.g. UpdateOne upserts) from many threads and
+    flushes them with unordered bulk_write calls of `batch_size` ops.
+
+    Each op is added with a tag (e.g. the company name) so failures can be
+    reported per op; `on_success(tags)` is called with the tags of the ops
+    that were written in each flush.
+    """
+
+    def __init__(self, collection, batch_size=500, on_success=None):
+        self.collection = collection
+        self.batch_size = max(1, batch_size)
+        self.on_success = on_success
+        self.errors = []
+        self.written = 0
+        self._pending = []
+        self._lock = threading.Lock()
+
+    def add(self, op, tag=None):
+        with self._lock:
+            self._pending.append((op, tag))
+            if len(self._pending) < self.batch_size:
+                return
+            batch, self._pending = self._pending, []
+        self._write(batch)
+
+    def flush(self):
+        """Writes everything still pending. Returns the errors collected so far."""
+        with self._lock:
+            batch, self._pending = self._pending, []
+        if batch:
+            self._write(batch)
+        return self.errors
+
+    def _write(self, batch):
+        ops = [op for op, _ in batch]
+        failed = {}
+        try:
+            self.collection.bulk_write(ops, ordered=False)
+        except BulkWriteError as e:
+            for write_error in e.details.get("writeErrors", []):
+                failed[write_error["index"]] = write_error.get("errmsg", str(write_error))
+        except PyMongoError as e:
+            failed = {i: str(e) for i in range(len(batch))}
+
+        succeeded = []
+        with self._lock:
+            for i, (_, tag) in enumerate(batch):
+                if i in failed:
+                    print(f"Error writing {tag or 'document'} to {self.collection.name}: {failed[i]}")
+                    self.errors.append({"tag": tag, "error": failed[i]})
+                else:
+                    succeeded.append(tag)
+            self.written += len(succeeded)
+
+        if succeeded and self.on_success is not None:
+            self.on_success(succeeded)
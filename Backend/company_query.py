@@ -0,0 +1,225 @@
+# company_query.py
+import base64
+import json
+import re
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import ConnectionFailure, OperationFailure, PyMongoError
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 500
+
+# Query parameters that ask for a paged listing; anything else (e.g. a ?_= cache-buster) is ignored
+LISTING_PARAMS = ("limit", "after", "sort", "sector", "minScore", "maxScore", "fields")
+
+# An index on the same keys already exists under other options (e.g. unique)
+INDEX_CONFLICT_CODES = (85, 86)
+
+# Left out of listings unless explicitly requested with ?fields=
+HEAVY_FIELDS = ("historical_data", "creditTrend", "sentiment", "scoreFactors", "scorerState")
+
+FIELD_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*(\.[A-Za-z0-9_]+)*$")
+
+
+def encode_cursor(value, doc_id):
+    raw = json.dumps([value, str(doc_id)]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token):
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        value, doc_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return value, ObjectId(doc_id)
+    except (ValueError, TypeError, InvalidId):
+        raise ValueError("Invalid cursor")
+
+
+class ListingQuery:
+    """
+    Parses company listing query parameters:
+
+    - limit: page size (default 100, max 500)
+    - after: opaque cursor returned as nextCursor by the previous page
+    - sort: name, score or sector; prefix with '-' for descending
+    - sector: one or more comma-separated sectors
+    - minScore / maxScore: inclusive score range
+    - fields: comma-separated fields to return
+
+    Raises ValueError for invalid parameters.
+    """
+
+    @staticmethod
+    def requested(args):
+        """True when `args` contain any listing parameter."""
+        return any(name in args for name in LISTING_PARAMS)
+
+    def __init__(self, args, score_field="score"):
+        self.score_field = score_field
+        sort_fields = {"name": "name", "score": score_field, "sector": "sector"}
+
+        try:
+            self.limit = int(args.get("limit", DEFAULT_LIMIT))
+        except ValueError:
+            raise ValueError("limit must be an integer")
+        if not 1 <= self.limit <= MAX_LIMIT:
+            raise ValueError(f"limit must be between 1 and {MAX_LIMIT}")
+
+        sort = args.get("sort", "name")
+        self.descending = sort.startswith("-")
+        sort_name = sort.lstrip("-")
+        if sort_name not in sort_fields:
+            raise ValueError(f"sort must be one of: {', '.join(sort_fields)}")
+        self.sort_field = sort_fields[sort_name]
+
+        self.sectors = [s.strip() for s in args.get("sector", "").split(",") if s.strip()]
+
+        self.min_score = self._float_arg(args, "minScore")
+        self.max_score = self._float_arg(args, "maxScore")
+
+        self.fields = list(dict.fromkeys(f.strip() for f in args.get("fields", "").split(",") if f.strip()))
+        for field in self.fields:
+            if not FIELD_RE.match(field):
+                raise ValueError(f"Invalid field: {field}")
+        self._check_paths(self.projection())
+
+        self.after = decode_cursor(args["after"]) if args.get("after") else None
+
+    @staticmethod
+    def _float_arg(args, name):
+        value = args.get(name)
+        if value in (None, ""):
+            return None
+        try:
+            return float(value)
+        except ValueError:
+            raise ValueError(f"{name} must be a number")
+
+    @staticmethod
+    def _check_paths(projection):
+        """
+        Rejects projections Mongo would refuse (a path and one of its
+        sub-paths), since that error would only show up mid-stream.
+        """
+        paths = sorted(projection)
+        for parent, child in zip(paths, paths[1:]):
+            if child.startswith(parent + "."):
+                raise ValueError(f"fields {parent} and {child} overlap")
+
+    def mongo_filter(self):
+        conditions = []
+        if self.sectors:
+            conditions.append({"sector": {"$in": self.sectors}})
+        score_range = {}
+        if self.min_score is not None:
+            score_range["$gte"] = self.min_score
+        if self.max_score is not None:
+            score_range["$lte"] = self.max_score
+        if score_range:
+            conditions.append({self.score_field: score_range})
+        if self.after is not None:
+            conditions.append({"$or": self._after_clauses(*self.after)})
+        if not conditions:
+            return {}
+        return conditions[0] if len(conditions) == 1 else {"$and": conditions}
+
+    def _after_clauses(self, value, doc_id):
+        """
+        Keyset condition for the documents after (value, doc_id). Mongo sorts
+        null / missing values before every other value, so they come first
+        ascending and last descending; comparison operators never match them.
+        """
+        op = "$lt" if self.descending else "$gt"
+        if value is None:
+            clauses = [{self.sort_field: None, "_id": {op: doc_id}}]
+            if not self.descending:
+                clauses.append({self.sort_field: {"$ne": None}})
+            return clauses
+        clauses = [
+            {self.sort_field: {op: value}},
+            {self.sort_field: value, "_id": {op: doc_id}},
+        ]
+        if self.descending:
+            clauses.append({self.sort_field: None})
+        return clauses
+
+    def projection(self):
+        if self.fields:
+            projection = {field: 1 for field in self.fields}
+            projection[self.sort_field] = 1
+            return projection
+        return {field: 0 for field in HEAVY_FIELDS}
+
+    def sort_spec(self):
+        direction = DESCENDING if self.descending else ASCENDING
+        return [(self.sort_field, direction), ("_id", direction)]
+
+    def output(self, doc):
+        """Strips the fields that were only fetched for pagination."""
+        doc = dict(doc)
+        doc.pop("_id", None)
+        if self.fields and self.sort_field not in self.fields:
+            doc.pop(self.sort_field, None)
+        return doc
+
+
+def stream_listing(collection, query, dumps):
+    """
+    Yields a JSON object {"items": [...], "nextCursor": ...} chunk by chunk
+    straight from the Mongo cursor, so a page is never held in memory.
+    `dumps` serializes one document (e.g. app.json.dumps).
+    """
+    cursor = collection.find(query.mongo_filter(), query.projection()) \
+        .sort(query.sort_spec()) \
+        .limit(query.limit + 1)
+
+    yield '{"items":['
+    last = None
+    has_more = False
+    for i, doc in enumerate(cursor):
+        if i == query.limit:
+            has_more = True
+            break
+        yield ("," if i else "") + dumps(query.output(doc))
+        last = doc
+    cursor.close()
+
+    next_cursor = None
+    if has_more and last is not None:
+        next_cursor = encode_cursor(last.get(query.sort_field), last["_id"])
+    yield '],"nextCursor":' + json.dumps(next_cursor) + '}'
+
+
+LISTING_INDEXES = [
+    [("name", ASCENDING), ("_id", ASCENDING)],
+    [("sector", ASCENDING), ("_id", ASCENDING)],
+    [("sector", ASCENDING), ("name", ASCENDING), ("_id", ASCENDING)],
+]
+
+
+def ensure_listing_indexes(collection, key_field="ticker", score_field="score"):
+    """
+    Creates the lookup and compound listing indexes. Failures are reported,
+    not raised; returns False if any index could not be created. Stops at
+    the first connection failure rather than waiting it out once per index.
+    """
+    indexes = [[(key_field, ASCENDING)]] + LISTING_INDEXES + [
+        [(score_field, ASCENDING), ("_id", ASCENDING)],
+        [("sector", ASCENDING), (score_field, ASCENDING), ("_id", ASCENDING)],
+    ]
+    created = True
+    for keys in indexes:
+        try:
+            collection.create_index(keys)
+        except OperationFailure as e:
+            if e.code not in INDEX_CONFLICT_CODES:
+                print(f"Error creating index {keys} on {collection.name}: {e}")
+                created = False
+        except ConnectionFailure as e:
+            print(f"Error creating indexes on {collection.name}: {e}")
+            return False
+        except PyMongoError as e:
+            print(f"Error creating index {keys} on {collection.name}: {e}")
+            created = False
+    return created
@@ -5,5 +5,103 @@ load_dotenv()
 
 class Config:
     MONGO_URI = os.environ.get('MONGO_URI') or 'mongodb://localhost:27017/credit_intelligence'
+    # Database name; defaults to credit_intelligence whatever database MONGO_URI names
+    MONGO_DB_NAME = os.environ.get('MONGO_DB_NAME')
+    # Shared client pool, timeouts, read preference and write concern (unset = pymongo default)
+    MONGO_MAX_POOL_SIZE = int(os.environ.get('MONGO_MAX_POOL_SIZE', 50))
+    MONGO_MIN_POOL_SIZE = int(os.environ.get('MONGO_MIN_POOL_SIZE', 0))
+    MONGO_MAX_IDLE_TIME_MS = int(os.environ['MONGO_MAX_IDLE_TIME_MS']) if os.environ.get('MONGO_MAX_IDLE_TIME_MS') else None
+    MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.environ['MONGO_WAIT_QUEUE_TIMEOUT_MS']) if os.environ.get('MONGO_WAIT_QUEUE_TIMEOUT_MS') else None
+    MONGO_CONNECT_TIMEOUT_MS = int(os.environ.get('MONGO_CONNECT_TIMEOUT_MS', 5000))
+    MONGO_SOCKET_TIMEOUT_MS = int(os.environ['MONGO_SOCKET_TIMEOUT_MS']) if os.environ.get('MONGO_SOCKET_TIMEOUT_MS') else None
+    MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.environ.get('MONGO_SERVER_SELECTION_TIMEOUT_MS', 10000))
+    MONGO_READ_PREFERENCE = os.environ.get('MONGO_READ_PREFERENCE', 'primary')
+    # e.g. "1" or "majority"
+    MONGO_WRITE_CONCERN = os.environ.get('MONGO_WRITE_CONCERN')
+    MONGO_APP_NAME = os.environ.get('MONGO_APP_NAME', 'credtech-backend')
     NEWS_API_KEY = os.environ.get('NEWS_API_KEY')
     YAHOO_FINANCE_BASE_URL = 'https://query1.finance.yahoo.com/v8/finance/chart/'
+
+    # Companies / scorer states written per bulk_write during a refresh cycle
+    MONGO_BULK_BATCH_SIZE = int(os.environ.get('MONGO_BULK_BATCH_SIZE', 500))
+
+    # Refresh engine: worker pool size and per-source concurrency / rate limits
+    REFRESH_WORKERS = int(os.environ.get('REFRESH_WORKERS', 8))
+    YAHOO_MAX_CONCURRENCY = int(os.environ.get('YAHOO_MAX_CONCURRENCY', 4))
+    YAHOO_RATE_PER_SEC = float(os.environ.get('YAHOO_RATE_PER_SEC', 2))
+    # Days of daily bars kept in the price history store and used for scoring
+    HISTORY_LOOKBACK_DAYS = int(os.environ.get('HISTORY_LOOKBACK_DAYS', 730))
+    YAHOO_BULK_BATCH_SIZE = int(os.environ.get('YAHOO_BULK_BATCH_SIZE', 100))
+    NEWS_API_MAX_CONCURRENCY = int(os.environ.get('NEWS_API_MAX_CONCURRENCY', 2))
+    NEWS_API_RATE_PER_SEC = float(os.environ.get('NEWS_API_RATE_PER_SEC', 1))
+
+    # NewsAPI HTTP client: pooled session, timeouts, retries and circuit breaker
+    NEWS_API_URL = os.environ.get('NEWS_API_URL', 'https://newsapi.org/v2/everything')
+    NEWS_API_CONNECT_TIMEOUT = float(os.environ.get('NEWS_API_CONNECT_TIMEOUT', 3.05))
+    NEWS_API_READ_TIMEOUT = float(os.environ.get('NEWS_API_READ_TIMEOUT', 10))
+    NEWS_API_MAX_RETRIES = int(os.environ.get('NEWS_API_MAX_RETRIES', 3))
+    NEWS_API_BACKOFF_FACTOR = float(os.environ.get('NEWS_API_BACKOFF_FACTOR', 0.5))
+    NEWS_API_BREAKER_THRESHOLD = int(os.environ.get('NEWS_API_BREAKER_THRESHOLD', 5))
+    NEWS_API_BREAKER_RESET = float(os.environ.get('NEWS_API_BREAKER_RESET', 60))
+
+    # A ticker's news score averages its most recently published cached articles:
+    # at most NEWS_SENTIMENT_WINDOW of them, none older than NEWS_SENTIMENT_MAX_AGE_DAYS
+    NEWS_SENTIMENT_WINDOW = int(os.environ.get('NEWS_SENTIMENT_WINDOW', 10))
+    NEWS_SENTIMENT_MAX_AGE_DAYS = int(os.environ.get('NEWS_SENTIMENT_MAX_AGE_DAYS', 7))
+
+    # Cached /api/companies responses (seconds / max entries)
+    RESPONSE_CACHE_TTL = int(os.environ.get('RESPONSE_CACHE_TTL', 300))
+    RESPONSE_CACHE_SIZE = int(os.environ.get('RESPONSE_CACHE_SIZE', 1024))
+
+    # Refresh workers (worker.py): per-ticker intervals, job queue and scheduler lock
+    REFRESH_INTERVAL_SECONDS = int(os.environ.get('REFRESH_INTERVAL_SECONDS', 60 * 60))
+    # e.g. "AAPL=900,NVDA=1800"
+    REFRESH_INTERVALS = {
+        ticker.strip(): int(seconds)
+        for ticker, seconds in (
+            item.split('=') for item in os.environ.get('REFRESH_INTERVALS', '').split(',') if '=' in item
+        )
+    }
+    WORKER_THREADS = int(os.environ.get('WORKER_THREADS', 4))
+    JOB_LEASE_SECONDS = int(os.environ.get('JOB_LEASE_SECONDS', 600))
+    JOB_POLL_SECONDS = float(os.environ.get('JOB_POLL_SECONDS', 5))
+    # Jobs a worker claims at once and refreshes with one grouped download and bulk writes
+    JOB_BATCH_SIZE = int(os.environ.get('JOB_BATCH_SIZE', 50))
+    SCHEDULER_TICK_SECONDS = float(os.environ.get('SCHEDULER_TICK_SECONDS', 30))
+    SCHEDULER_LOCK_TTL = int(os.environ.get('SCHEDULER_LOCK_TTL', 90))
+    # Run an in-process worker when starting the API with `python app.py`
+    EMBEDDED_WORKER = os.environ.get('EMBEDDED_WORKER', 'true').lower() == 'true'
+
+    # Refresh policy: shorter intervals for volatile / frequently viewed tickers,
+    # and no refreshes while US markets are closed
+    REFERENCE_VOLATILITY = float(os.environ.get('REFERENCE_VOLATILITY', 0.3))
+    MIN_REFRESH_SECONDS = int(os.environ.get('MIN_REFRESH_SECONDS', 300))
+    MAX_REFRESH_SECONDS = int(os.environ.get('MAX_REFRESH_SECONDS', 4 * 60 * 60))
+    REFRESH_MARKET_HOURS_ONLY = os.environ.get('REFRESH_MARKET_HOURS_ONLY', 'true').lower() == 'true'
+    VIEW_FLUSH_SECONDS = int(os.environ.get('VIEW_FLUSH_SECONDS', 30))
+
+    # Server-sent score updates: keep-alive interval and Mongo change stream feed
+    SCORE_STREAM_KEEPALIVE = float(os.environ.get('SCORE_STREAM_KEEPALIVE', 15))
+    # Open /api/stream/scores connections per API process; each one holds a worker thread,
+    # so keep this below gunicorn's --threads
+    SCORE_STREAM_MAX_SUBSCRIBERS = int(os.environ.get('SCORE_STREAM_MAX_SUBSCRIBERS', 16))
+    SCORE_CHANGE_STREAM = os.environ.get('SCORE_CHANGE_STREAM', 'true').lower() == 'true'
+
+    # Start the sampling profiler at startup (it can also be toggled via POST /api/profiler)
+    PROFILER_ENABLED = os.environ.get('PROFILER_ENABLED', 'false').lower() == 'true'
+    # Token required by /api/profiler (as "Authorization: Bearer <token>"); unset hides the routes
+    PROFILER_TOKEN = os.environ.get('PROFILER_TOKEN')
+
+    # Background company syncs: executor size, freshness window and job bookkeeping
+    SYNC_WORKERS = int(os.environ.get('SYNC_WORKERS', 4))
+    SYNC_MAX_AGE_SECONDS = int(os.environ.get('SYNC_MAX_AGE_SECONDS', 15 * 60))
+    SYNC_JOB_LEASE_SECONDS = int(os.environ.get('SYNC_JOB_LEASE_SECONDS', 120))
+    SYNC_JOB_RETENTION_SECONDS = int(os.environ.get('SYNC_JOB_RETENTION_SECONDS', 24 * 60 * 60))
+
+    # What-if scenario API: how long the in-memory universe is reused and scenarios per request
+    SCENARIO_UNIVERSE_TTL = int(os.environ.get('SCENARIO_UNIVERSE_TTL', 60))
+    SCENARIO_MAX_BATCH = int(os.environ.get('SCENARIO_MAX_BATCH', 500))
+
+    # Score history: how long raw points are kept (rollups are kept) and the most points per response
+    SCORE_HISTORY_RAW_RETENTION_DAYS = int(os.environ.get('SCORE_HISTORY_RAW_RETENTION_DAYS', 90))
+    SCORE_HISTORY_MAX_POINTS = int(os.environ.get('SCORE_HISTORY_MAX_POINTS', 1000))
@@ -0,0 +1,136 @@
+# export.py
+from datetime import datetime
+import json
+
+# Fields downstream risk jobs need from every company
+EXPORT_PROJECTION = {
+    "_id": 0,
+    "name": 1,
+    "ticker": 1,
+    "sector": 1,
+    "score": 1,
+    "lastUpdated": 1,
+    "creditTrend": 1,
+    "metrics": 1,
+}
+
+METRIC_FIELDS = ("revenue", "debt_to_equity", "profit_margin", "return_on_equity")
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "arrow": "application/vnd.apache.arrow.stream",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+def export_cursor(collection, batch_size):
+    return collection.find({}, EXPORT_PROJECTION).sort("ticker", 1).batch_size(batch_size)
+
+
+def iter_ndjson(collection, batch_size=500):
+    """Yields one JSON line per company, straight from the Mongo cursor."""
+    def default(value):
+        if isinstance(value, datetime):
+            return value.isoformat() + "Z"
+        return str(value)
+
+    for doc in export_cursor(collection, batch_size):
+        yield json.dumps(doc, default=default, separators=(",", ":")) + "\n"
+
+
+def arrow_schema(pa):
+    return pa.schema([
+        ("name", pa.string()),
+        ("ticker", pa.string()),
+        ("sector", pa.string()),
+        ("score", pa.float64()),
+        ("lastUpdated", pa.timestamp("ms")),
+        ("creditTrend", pa.list_(pa.struct([("month", pa.string()), ("score", pa.float64())]))),
+        ("metrics", pa.struct([(field, pa.string()) for field in METRIC_FIELDS])),
+    ])
+
+
+def to_columns(docs):
+    """Turns a batch of company documents into column lists for the Arrow schema."""
+    return {
+        "name": [d.get("name") for d in docs],
+        "ticker": [d.get("ticker") for d in docs],
+        "sector": [d.get("sector") for d in docs],
+        "score": [float(d["score"]) if d.get("score") is not None else None for d in docs],
+        "lastUpdated": [d.get("lastUpdated") if isinstance(d.get("lastUpdated"), datetime) else None for d in docs],
+        "creditTrend": [
+            [{"month": p.get("month"), "score": float(p["score"]) if p.get("score") is not None else None}
+             for p in d.get("creditTrend") or []]
+            for d in docs
+        ],
+        "metrics": [{field: (d.get("metrics") or {}).get(field) for field in METRIC_FIELDS} for d in docs],
+    }
+
+
+class ChunkSink:
+    """Write-only file object that hands written bytes back to a generator."""
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data):
+        data = bytes(data)
+        self.chunks.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def writable(self):
+        return True
+
+    def seekable(self):
+        return False
+
+    def drain(self):
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def iter_arrow(collection, fmt="arrow", batch_size=1000):
+    """
+    Yields an Arrow IPC stream or a Parquet file, one record batch (row group
+    for Parquet) per `batch_size` companies. Requires pyarrow.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = arrow_schema(pa)
+    sink = ChunkSink()
+    if fmt == "parquet":
+        writer = pq.ParquetWriter(pa.PythonFile(sink, mode="w"), schema)
+        write = writer.write_table
+    else:
+        writer = pa.ipc.new_stream(sink, schema)
+        write = writer.write_batch
+
+    def write_docs(docs):
+        batch = pa.RecordBatch.from_pydict(to_columns(docs), schema=schema)
+        write(pa.Table.from_batches([batch]) if fmt == "parquet" else batch)
+
+    docs = []
+    for doc in export_cursor(collection, batch_size):
+        docs.append(doc)
+        if len(docs) >= batch_size:
+            write_docs(docs)
+            docs = []
+            yield sink.drain()
+    if docs:
+        write_docs(docs)
+    writer.close()
+    yield sink.drain()
@@ -0,0 +1,160 @@
+# history_store.py
+from datetime import datetime, timedelta
+import threading
+import pandas as pd
+from pymongo import ASCENDING
+from pymongo.errors import CollectionInvalid, OperationFailure, PyMongoError
+
+PRICE_COLUMNS = {"Open": "open", "High": "high", "Low": "low", "Close": "close", "Volume": "volume"}
+
+# Relative change in a re-downloaded close that means Yahoo has re-adjusted the history
+ADJUSTMENT_TOLERANCE = 1e-4
+# Bars are kept this many days beyond the retention window before they expire
+RETENTION_SLACK_DAYS = 7
+
+
+class PriceHistoryStore:
+    """
+    Persists daily OHLCV bars per ticker so each refresh only has to ask
+    Yahoo for bars after the last stored date.
+
+    Bars live in a MongoDB time-series collection (timeField `date`,
+    metaField `ticker`) when the server supports it, otherwise in a regular
+    collection indexed on (ticker, date). Bars are appended as they complete:
+    the most recent bar of a download may still be forming, so it is never
+    stored and is simply fetched again on the next refresh.
+
+    Yahoo's prices are split- and dividend-adjusted, so a corporate action
+    rewrites every earlier bar. Callers detect that with `prices_readjusted`
+    and `replace` the ticker's stored window with a fresh download.
+
+    With `retention_days`, bars older than that (plus a week of slack) are
+    expired by the server: through the time-series collection's
+    expireAfterSeconds, or a TTL index on `date` for a regular collection.
+    """
+
+    def __init__(self, db, collection_name="price_history", retention_days=None):
+        self.db = db
+        self.collection_name = collection_name
+        self.collection = db[collection_name]
+        self.retention_days = retention_days
+        self._ready = False
+        self._lock = threading.Lock()
+
+    def ensure_collection(self):
+        """Creates the collection and its index on first use."""
+        if self._ready:
+            return
+        with self._lock:
+            if self._ready:
+                return
+            if self.collection_name not in self.db.list_collection_names():
+                try:
+                    self.db.create_collection(
+                        self.collection_name,
+                        timeseries={"timeField": "date", "metaField": "ticker", "granularity": "hours"},
+                    )
+                except (CollectionInvalid, OperationFailure) as e:
+                    print(f"Time-series collections unavailable, using a regular collection: {e}")
+            self.collection.create_index([("ticker", ASCENDING), ("date", ASCENDING)])
+            if self.retention_days:
+                self.ensure_expiry()
+            self._ready = True
+
+    def ensure_expiry(self):
+        """Sets the server-side expiry of old bars (also on collections created before it existed)."""
+        expire_after = int(timedelta(days=self.retention_days + RETENTION_SLACK_DAYS).total_seconds())
+        try:
+            info = next(iter(self.db.list_collections(filter={"name": self.collection_name})), None)
+            if info is not None and info.get("type") == "timeseries":
+                self.db.command("collMod", self.collection_name, expireAfterSeconds=expire_after)
+            else:
+                self.collection.create_index([("date", ASCENDING)], expireAfterSeconds=expire_after)
+        except (PyMongoError, NotImplementedError) as e:
+            print(f"Error setting price history expiry, old bars will not be pruned: {e}")
+
+    def load(self, tickers, since):
+        """
+        Returns {ticker: DataFrame} of stored bars on or after `since`, with
+        the same columns as yfinance's Ticker.history().
+        """
+        self.ensure_collection()
+        cursor = self.collection.find(
+            {"ticker": {"$in": list(tickers)}, "date": {"$gte": since}},
+            {"_id": 0},
+        )
+        docs = list(cursor)
+        if not docs:
+            return {}
+
+        frame = pd.DataFrame(docs).rename(columns={v: k for k, v in PRICE_COLUMNS.items()})
+        histories = {}
+        for ticker, bars in frame.groupby("ticker"):
+            bars = bars.drop(columns="ticker").set_index("date").sort_index()
+            bars.index.name = None
+            histories[ticker] = bars[~bars.index.duplicated(keep="last")]
+        return histories
+
+    def append(self, ticker, bars, after=None):
+        """
+        Stores completed bars from a fresh download. The last row is treated as
+        still forming and skipped; rows on or before `after` are already stored.
+        Returns the number of bars written.
+        """
+        bars = bars.iloc[:-1]
+        if after is not None:
+            bars = bars[bars.index > after]
+        if bars.empty:
+            return 0
+
+        self.ensure_collection()
+        docs = []
+        for date, row in zip(bars.index, bars.to_dict("records")):
+            doc = {"ticker": ticker, "date": date.to_pydatetime()}
+            for column, field in PRICE_COLUMNS.items():
+                if column in row and pd.notna(row[column]):
+                    doc[field] = float(row[column])
+            docs.append(doc)
+        self.collection.insert_many(docs, ordered=False)
+        return len(docs)
+
+    def replace(self, ticker, bars):
+        """Drops every stored bar of `ticker` and stores `bars` in their place."""
+        self.ensure_collection()
+        self.collection.delete_many({"ticker": ticker})
+        return self.append(ticker, bars)
+
+
+def merge_history(stored, fresh):
+    """
+    Combines stored bars with a fresh download, preferring the fresh rows.
+    Returns None without fresh bars: the stored ones alone would miss the
+    latest bar, so the caller has to fetch the ticker another way.
+    """
+    if fresh is None or fresh.empty:
+        return None
+    if stored is None or stored.empty:
+        return fresh
+    columns = [c for c in PRICE_COLUMNS if c in stored.columns]
+    combined = pd.concat([stored[columns], fresh[columns]])
+    return combined[~combined.index.duplicated(keep="last")].sort_index()
+
+
+def prices_readjusted(stored, fresh, tolerance=ADJUSTMENT_TOLERANCE):
+    """
+    True when a fresh download disagrees with the stored closes on the dates
+    both cover, i.e. a split or dividend has re-adjusted the history.
+    """
+    if stored is None or fresh is None:
+        return False
+    overlap = stored.index.intersection(fresh.index)
+    if overlap.empty:
+        return False
+    old = stored.loc[overlap, "Close"].astype(float)
+    new = fresh.loc[overlap, "Close"].astype(float)
+    return bool(((new - old).abs() > old.abs() * tolerance).any())
+
+
+def lookback_start(days):
+    """Earliest bar date needed to score with `days` of history."""
+    return datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=days)
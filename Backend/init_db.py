@@ -1,13 +1,12 @@
-from pymongo import MongoClient
 from datetime import datetime
-import os
 from dotenv import load_dotenv
+from mongo import get_db
+from company_query import ensure_listing_indexes
 
 load_dotenv()
 
-# Connect to MongoDB
-client = MongoClient(os.getenv('MONGO_URI', 'mongodb://localhost:27017/'))
-db = client['credit_intelligence']
+# Connect to the same database as the API and refresh worker
+db = get_db()
 
 # Clear existing data
 db.companies.delete_many({})
@@ -122,5 +121,8 @@ print(f"Inserted {len(result.inserted_ids)} companies into database")
 # Create indexes
 db.companies.create_index("name", unique=True)
 db.companies.create_index("symbol", unique=True)
+# Listing indexes for /api/catalog/companies and /api/companies (the API also creates them at startup)
+ensure_listing_indexes(db.companies, key_field="symbol", score_field="creditScore")
+ensure_listing_indexes(db.companies, key_field="ticker", score_field="score")
 
 print("Database initialization complete!")
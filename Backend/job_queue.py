@@ -0,0 +1,244 @@
+# job_queue.py
+from datetime import datetime, timedelta
+import heapq
+import threading
+from pymongo import ASCENDING, ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+# Cap on the retry delay after a failed refresh
+MAX_RETRY_DELAY = 60 * 60
+
+
+def retry_delay(attempts):
+    return min(MAX_RETRY_DELAY, 30 * 2 ** max(0, attempts - 1))
+
+
+class MongoJobQueue:
+    """
+    Refresh job queue stored in Mongo, one document per ticker:
+
+        {_id: ticker, status: "scheduled" | "running", runAt, leaseUntil,
+         worker, attempts, lastRunAt, lastError}
+
+    Workers claim due jobs atomically with find_one_and_update. A claimed job
+    holds a lease; if its worker dies, the job becomes claimable again once
+    the lease expires. Completing a job schedules the ticker's next run.
+    """
+
+    def __init__(self, db, collection_name="refresh_jobs", lease_seconds=600):
+        self.collection = db[collection_name]
+        self.lease_seconds = lease_seconds
+        self._indexed = False
+
+    def ensure_indexes(self):
+        if self._indexed:
+            return
+        self.collection.create_index([("status", ASCENDING), ("runAt", ASCENDING)])
+        self.collection.create_index([("status", ASCENDING), ("leaseUntil", ASCENDING)])
+        self._indexed = True
+
+    def sync(self, tickers):
+        """Adds jobs for new tickers (due now) and drops jobs for removed ones."""
+        self.ensure_indexes()
+        now = datetime.utcnow()
+        ops = [
+            UpdateOne(
+                {"_id": ticker},
+                {"$setOnInsert": {"status": "scheduled", "runAt": now, "attempts": 0}},
+                upsert=True,
+            )
+            for ticker in tickers
+        ]
+        if ops:
+            self.collection.bulk_write(ops, ordered=False)
+        self.collection.delete_many({"_id": {"$nin": list(tickers)}})
+
+    def enqueue(self, ticker, run_at=None):
+        """Schedules `ticker` to run at `run_at` (default: now) unless it is running."""
+        self.collection.update_one(
+            {"_id": ticker, "status": {"$ne": "running"}},
+            {"$set": {"status": "scheduled", "runAt": run_at or datetime.utcnow()}},
+            upsert=False,
+        )
+
+    def claim(self, worker_id):
+        """Claims the most overdue job, or returns None when nothing is due."""
+        self.ensure_indexes()
+        now = datetime.utcnow()
+        return self.collection.find_one_and_update(
+            {"$or": [
+                {"status": "scheduled", "runAt": {"$lte": now}},
+                {"status": "running", "leaseUntil": {"$lt": now}},
+            ]},
+            {
+                "$set": {
+                    "status": "running",
+                    "worker": worker_id,
+                    "startedAt": now,
+                    "leaseUntil": now + timedelta(seconds=self.lease_seconds),
+                },
+                "$inc": {"attempts": 1},
+            },
+            sort=[("runAt", ASCENDING)],
+            return_document=ReturnDocument.AFTER,
+        )
+
+    def claim_batch(self, worker_id, limit):
+        """Claims up to `limit` due jobs, most overdue first."""
+        jobs = []
+        while len(jobs) < limit:
+            job = self.claim(worker_id)
+            if job is None:
+                break
+            jobs.append(job)
+        return jobs
+
+    def complete(self, job, next_run_at):
+        self.collection.update_one(
+            {"_id": job["_id"], "worker": job["worker"]},
+            {"$set": {
+                "status": "scheduled",
+                "runAt": next_run_at,
+                "attempts": 0,
+                "lastRunAt": datetime.utcnow(),
+                "lastError": None,
+            }},
+        )
+
+    def fail(self, job, error):
+        """Reschedules a failed job with exponential backoff."""
+        now = datetime.utcnow()
+        self.collection.update_one(
+            {"_id": job["_id"], "worker": job["worker"]},
+            {"$set": {
+                "status": "scheduled",
+                "runAt": now + timedelta(seconds=retry_delay(job.get("attempts", 1))),
+                "lastError": str(error),
+            }},
+        )
+
+    def remove(self, job):
+        """Deletes a claimed job, e.g. one whose ticker is no longer tracked."""
+        self.collection.delete_one({"_id": job["_id"], "worker": job["worker"]})
+
+
+class LocalJobQueue:
+    """In-process stand-in for MongoJobQueue with the same interface."""
+
+    def __init__(self, lease_seconds=600):
+        self.lease_seconds = lease_seconds
+        self._jobs = {}
+        self._heap = []
+        self._lock = threading.Lock()
+
+    def _push(self, ticker, run_at):
+        job = self._jobs[ticker]
+        job.update(status="scheduled", runAt=run_at)
+        heapq.heappush(self._heap, (run_at, ticker))
+
+    def sync(self, tickers):
+        now = datetime.utcnow()
+        with self._lock:
+            for ticker in tickers:
+                if ticker not in self._jobs:
+                    self._jobs[ticker] = {"_id": ticker, "attempts": 0}
+                    self._push(ticker, now)
+            for ticker in set(self._jobs) - set(tickers):
+                del self._jobs[ticker]
+
+    def enqueue(self, ticker, run_at=None):
+        with self._lock:
+            job = self._jobs.get(ticker)
+            if job is not None and job["status"] != "running":
+                self._push(ticker, run_at or datetime.utcnow())
+
+    def claim(self, worker_id):
+        now = datetime.utcnow()
+        with self._lock:
+            for job in self._jobs.values():
+                if job["status"] == "running" and job["leaseUntil"] < now:
+                    self._push(job["_id"], job["runAt"])
+            while self._heap and self._heap[0][0] <= now:
+                run_at, ticker = heapq.heappop(self._heap)
+                job = self._jobs.get(ticker)
+                # Skip heap entries superseded by a later enqueue or removal
+                if job is None or job["status"] != "scheduled" or job["runAt"] != run_at:
+                    continue
+                job.update(
+                    status="running",
+                    worker=worker_id,
+                    startedAt=now,
+                    leaseUntil=now + timedelta(seconds=self.lease_seconds),
+                    attempts=job["attempts"] + 1,
+                )
+                return dict(job)
+            return None
+
+    def claim_batch(self, worker_id, limit):
+        jobs = []
+        while len(jobs) < limit:
+            job = self.claim(worker_id)
+            if job is None:
+                break
+            jobs.append(job)
+        return jobs
+
+    def complete(self, job, next_run_at):
+        with self._lock:
+            current = self._jobs.get(job["_id"])
+            if current is None or current.get("worker") != job["worker"]:
+                return
+            current.update(attempts=0, lastRunAt=datetime.utcnow(), lastError=None)
+            self._push(job["_id"], next_run_at)
+
+    def fail(self, job, error):
+        with self._lock:
+            current = self._jobs.get(job["_id"])
+            if current is None or current.get("worker") != job["worker"]:
+                return
+            current["lastError"] = str(error)
+            self._push(job["_id"], datetime.utcnow() + timedelta(seconds=retry_delay(current["attempts"])))
+
+    def remove(self, job):
+        with self._lock:
+            current = self._jobs.get(job["_id"])
+            if current is not None and current.get("worker") == job["worker"]:
+                del self._jobs[job["_id"]]
+
+
+class MongoLeaderLock:
+    """
+    Lease-based lock so only one scheduler process enqueues jobs. The holder
+    must call acquire() again before `ttl` seconds pass to keep the lease.
+    """
+
+    def __init__(self, db, name, owner, ttl=60, collection_name="scheduler_locks"):
+        self.collection = db[collection_name]
+        self.name = name
+        self.owner = owner
+        self.ttl = ttl
+
+    def acquire(self):
+        now = datetime.utcnow()
+        try:
+            self.collection.find_one_and_update(
+                {"_id": self.name, "$or": [{"owner": self.owner}, {"expiresAt": {"$lt": now}}]},
+                {"$set": {"owner": self.owner, "expiresAt": now + timedelta(seconds=self.ttl)}},
+                upsert=True,
+            )
+            return True
+        except DuplicateKeyError:
+            return False
+
+    def release(self):
+        self.collection.delete_one({"_id": self.name, "owner": self.owner})
+
+
+class LocalLeaderLock:
+    """Single-process stand-in for MongoLeaderLock: always the leader."""
+
+    def acquire(self):
+        return True
+
+    def release(self):
+        pass
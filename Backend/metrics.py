@@ -0,0 +1,259 @@
+# metrics.py
+"""
+Minimal in-process metrics registry rendered in the Prometheus text
+exposition format, plus an optional sampling profiler.
+"""
+from collections import Counter as TallyCounter
+from contextlib import contextmanager
+import math
+import os
+import sys
+import threading
+import time
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300)
+
+
+def format_labels(names, values):
+    if not names:
+        return ""
+    pairs = []
+    for name, value in zip(names, values):
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        pairs.append(f'{name}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+def format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value))
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, "")) for name in self.label_names)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.extend(self._render_sample(key, value))
+        return lines
+
+    def _render_sample(self, key, value):
+        return [f"{self.name}{format_labels(self.label_names, key)} {format_value(value)}"]
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state["counts"][i] += 1
+            state["sum"] += value
+            state["count"] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def totals(self):
+        """{label values: (count, sum)} for every series observed so far."""
+        with self._lock:
+            return {key: (state["count"], state["sum"]) for key, state in self._values.items()}
+
+    def _render_sample(self, key, state):
+        lines = []
+        names = self.label_names + ("le",)
+        for bound, count in zip(self.buckets, state["counts"]):
+            lines.append(f"{self.name}_bucket{format_labels(names, key + (format_value(bound),))} {count}")
+        labels = format_labels(self.label_names, key)
+        lines.append(f"{self.name}_sum{labels} {format_value(state['sum'])}")
+        lines.append(f"{self.name}_count{labels} {state['count']}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name, help_text, labels=()):
+        return self.register(Counter(name, help_text, labels))
+
+    def gauge(self, name, help_text, labels=()):
+        return self.register(Gauge(name, help_text, labels))
+
+    def histogram(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, help_text, labels, buckets))
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+# Refresh cycle instrumentation
+REFRESH_STAGE_SECONDS = registry.histogram(
+    "refresh_stage_seconds", "Time spent in each refresh stage per ticker or batch.", labels=("stage",))
+REFRESH_TICKERS = registry.counter(
+    "refresh_tickers_total", "Tickers processed by the refresh, by result.", labels=("result",))
+LAST_CYCLE = registry.gauge(
+    "refresh_last_cycle", "Statistics of the last completed refresh cycle.", labels=("stat",))
+
+# HTTP instrumentation
+HTTP_REQUEST_SECONDS = registry.histogram(
+    "http_request_duration_seconds", "Flask request latency.", labels=("route", "method", "status"))
+HTTP_REQUESTS = registry.counter(
+    "http_requests_total", "Flask requests served.", labels=("route", "method", "status"))
+
+
+def stage(name):
+    """Context manager timing one refresh stage."""
+    return REFRESH_STAGE_SECONDS.time(stage=name)
+
+
+def record_cycle(report):
+    """Publishes a RefreshEngine cycle report as gauges and counters."""
+    for result in ("updated", "skipped", "failed"):
+        REFRESH_TICKERS.inc(report.get(result, 0), result=result)
+    for stat, field in (
+        ("duration_seconds", "durationSeconds"),
+        ("tickers_per_second", "tickersPerSecond"),
+        ("p95_latency_seconds", "p95LatencySeconds"),
+        ("tickers", "tickers"),
+        ("failed", "failed"),
+    ):
+        LAST_CYCLE.set(report.get(field, 0), stat=stat)
+    LAST_CYCLE.set(time.time(), stat="finished_timestamp")
+
+
+def instrument_flask(app):
+    """Records latency and count for every Flask request, labelled by URL rule."""
+    from flask import g, request
+
+    @app.before_request
+    def start_timer():
+        g.metrics_start = time.perf_counter()
+
+    @app.after_request
+    def record_request(response):
+        start = g.pop("metrics_start", None)
+        if start is not None:
+            route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+            labels = {"route": route, "method": request.method, "status": response.status_code}
+            HTTP_REQUEST_SECONDS.observe(time.perf_counter() - start, **labels)
+            HTTP_REQUESTS.inc(**labels)
+        return response
+
+
+class SamplingProfiler:
+    """
+    Samples the stacks of all threads every `interval` seconds while enabled
+    and aggregates them as collapsed stacks ("frame;frame;frame count"),
+    which flamegraph tools read directly.
+    """
+
+    def __init__(self, interval=0.01, max_depth=40):
+        self.interval = interval
+        self.max_depth = max_depth
+        self.samples = TallyCounter()
+        self._thread = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        with self._lock:
+            if self.enabled:
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        with self._lock:
+            self._stop.set()
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join()
+
+    def reset(self):
+        with self._lock:
+            self.samples = TallyCounter()
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < self.max_depth:
+                    code = frame.f_code
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}:{frame.f_lineno}")
+                    frame = frame.f_back
+                with self._lock:
+                    self.samples[";".join(reversed(stack))] += 1
+
+    def collapsed(self):
+        with self._lock:
+            items = self.samples.most_common()
+        return "".join(f"{stack} {count}\n" for stack, count in items)
+
+
+profiler = SamplingProfiler()
@@ -1,19 +1,30 @@
-from pymongo import MongoClient
-from config import Config
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
 import yfinance as yf
+import pandas as pd
 from datetime import datetime
+from company_query import stream_listing, ensure_listing_indexes
+from serialization import history_records
 
-client = MongoClient(Config.MONGO_URI)
-db = client.get_default_database()
+from mongo import db
 
 class Company:
     @staticmethod
     def get_all():
-        return list(db.companies.find({}, {'_id': 0}))
+        return list(db.companies.find({}, {'_id': 0, 'scorerState': 0}))
     
+    @staticmethod
+    def stream_page(query, dumps):
+        """Streams one page of a ListingQuery as JSON chunks"""
+        return stream_listing(db.companies, query, dumps)
+
+    @staticmethod
+    def ensure_indexes():
+        return ensure_listing_indexes(db.companies, key_field='symbol', score_field='creditScore')
+
     @staticmethod
     def get_by_name(name):
-        return db.companies.find_one({'name': name}, {'_id': 0})
+        return db.companies.find_one({'name': name}, {'_id': 0, 'scorerState': 0})
     
     @staticmethod
     def create(company_data):
@@ -26,7 +37,73 @@ class Company:
         update_data['updated_at'] = datetime.utcnow()
         return db.companies.update_one({'name': name}, {'$set': update_data})
 
+    @staticmethod
+    def upsert_many(companies_data, key='name', batch_size=500, ordered=False):
+        """
+        Creates or updates many companies with bulk writes of `batch_size`
+        ops (unordered by default), matching on `key`. Returns counts plus
+        the per-document write errors.
+        """
+        now = datetime.utcnow()
+        result = {'matched': 0, 'modified': 0, 'upserted': 0, 'errors': []}
+        for start in range(0, len(companies_data), batch_size):
+            batch = companies_data[start:start + batch_size]
+            ops = []
+            for company_data in batch:
+                update_data = dict(company_data, updated_at=now)
+                update_data.pop('created_at', None)
+                ops.append(UpdateOne(
+                    {key: company_data[key]},
+                    {'$set': update_data, '$setOnInsert': {'created_at': now}},
+                    upsert=True
+                ))
+            try:
+                details = db.companies.bulk_write(ops, ordered=ordered).bulk_api_result
+            except BulkWriteError as e:
+                details = e.details
+                for error in details.get('writeErrors', []):
+                    result['errors'].append({
+                        key: batch[error['index']].get(key),
+                        'error': error.get('errmsg', str(error))
+                    })
+            result['matched'] += details.get('nMatched', 0)
+            result['modified'] += details.get('nModified', 0)
+            result['upserted'] += details.get('nUpserted', 0)
+        return result
+
 class YahooFinanceAPI:
+    @staticmethod
+    def stock_fields(symbol, info, hist):
+        return {
+            'symbol': symbol,
+            'current_price': info.get('currentPrice', 0),
+            'market_cap': info.get('marketCap', 0),
+            'pe_ratio': info.get('trailingPE', 0),
+            'dividend_yield': info.get('dividendYield', 0),
+            'beta': info.get('beta', 1),
+            'volume': info.get('volume', 0),
+            'historical_data': history_records(hist, tail=30)
+        }
+
+    @staticmethod
+    def company_fields(symbol, info):
+        return {
+            'name': info.get('longName', symbol),
+            'sector': info.get('sector', 'Unknown'),
+            'industry': info.get('industry', 'Unknown'),
+            'description': info.get('longBusinessSummary', ''),
+            'employees': info.get('fullTimeEmployees', 0),
+            'website': info.get('website', ''),
+            'country': info.get('country', ''),
+            'market_cap': info.get('marketCap', 0),
+            'enterprise_value': info.get('enterpriseValue', 0),
+            'revenue': info.get('totalRevenue', 0),
+            'profit_margin': info.get('profitMargins', 0),
+            'debt_to_equity': info.get('debtToEquity', 0),
+            'current_ratio': info.get('currentRatio', 0),
+            'return_on_equity': info.get('returnOnEquity', 0)
+        }
+
     @staticmethod
     def get_stock_data(symbol, period='1y'):
         try:
@@ -34,47 +111,81 @@ class YahooFinanceAPI:
             hist = ticker.history(period=period)
             info = ticker.info
             
+            return YahooFinanceAPI.stock_fields(symbol, info, hist)
+        except Exception as e:
+            return {'error': str(e)}
+
+    @staticmethod
+    def get_sync_data(symbol, period='1y'):
+        """
+        Company info and stock data from a single Ticker, so ticker.info is
+        scraped once. Returns {'info': ..., 'data': ...} or {'error': ...}.
+        """
+        try:
+            ticker = yf.Ticker(symbol)
+            info = ticker.info
+            hist = ticker.history(period=period)
+
             return {
-                'symbol': symbol,
-                'current_price': info.get('currentPrice', 0),
-                'market_cap': info.get('marketCap', 0),
-                'pe_ratio': info.get('trailingPE', 0),
-                'dividend_yield': info.get('dividendYield', 0),
-                'beta': info.get('beta', 1),
-                'volume': info.get('volume', 0),
-                'historical_data': [
-                    {
-                        'date': date.strftime('%Y-%m-%d'),
-                        'close': float(row['Close']),
-                        'volume': int(row['Volume'])
-                    }
-                    for date, row in hist.iterrows()
-                ][-30:]
+                'info': YahooFinanceAPI.company_fields(symbol, info),
+                'data': YahooFinanceAPI.stock_fields(symbol, info, hist),
             }
         except Exception as e:
             return {'error': str(e)}
     
+    @staticmethod
+    def get_bulk_history(symbols, period='1y', interval='1d', start=None):
+        """
+        Downloads price history for many symbols in one grouped request and
+        splits it into a {symbol: DataFrame} mapping with the same columns as
+        Ticker.history(). When `start` is given it replaces `period`.
+        Symbols that returned no data are left out.
+        """
+        symbols = list(dict.fromkeys(symbols))
+        if not symbols:
+            return {}
+
+        window = {'start': start} if start is not None else {'period': period}
+        try:
+            data = yf.download(
+                symbols,
+                interval=interval,
+                group_by='ticker',
+                auto_adjust=True,
+                threads=True,
+                progress=False,
+                **window,
+            )
+        except Exception as e:
+            print(f"Error downloading bulk history for {len(symbols)} symbols: {e}")
+            return {}
+
+        if data is None or data.empty:
+            return {}
+
+        if isinstance(data.columns, pd.MultiIndex):
+            available = set(data.columns.get_level_values(0))
+            frames = {symbol: data[symbol] for symbol in symbols if symbol in available}
+        else:
+            # Single-symbol downloads come back without the ticker level
+            frames = {symbols[0]: data}
+
+        histories = {}
+        for symbol, frame in frames.items():
+            frame = frame.dropna(how='all')
+            if frame.empty:
+                continue
+            if frame.index.tz is not None:
+                frame = frame.tz_localize(None)
+            histories[symbol] = frame.sort_index()
+        return histories
+
     @staticmethod
     def get_company_info(symbol):
         try:
             ticker = yf.Ticker(symbol)
             info = ticker.info
             
-            return {
-                'name': info.get('longName', symbol),
-                'sector': info.get('sector', 'Unknown'),
-                'industry': info.get('industry', 'Unknown'),
-                'description': info.get('longBusinessSummary', ''),
-                'employees': info.get('fullTimeEmployees', 0),
-                'website': info.get('website', ''),
-                'country': info.get('country', ''),
-                'market_cap': info.get('marketCap', 0),
-                'enterprise_value': info.get('enterpriseValue', 0),
-                'revenue': info.get('totalRevenue', 0),
-                'profit_margin': info.get('profitMargins', 0),
-                'debt_to_equity': info.get('debtToEquity', 0),
-                'current_ratio': info.get('currentRatio', 0),
-                'return_on_equity': info.get('returnOnEquity', 0)
-            }
+            return YahooFinanceAPI.company_fields(symbol, info)
         except Exception as e:
             return {'error': str(e)}
@@ -0,0 +1,210 @@
+# mongo.py
+"""
+The process-wide MongoClient. app.py, models.py, routes.py and worker.py all
+go through `db`, so the API, the blueprint and the scheduler share one
+connection pool and one database.
+
+The client is created on first use rather than at import time and is
+re-created in a forked child (e.g. a gunicorn worker started with --preload),
+so every process gets its own pool and none inherits its parent's sockets.
+"""
+import os
+import threading
+
+from pymongo import MongoClient, WriteConcern
+from pymongo.database import Database
+from pymongo.monitoring import ConnectionPoolListener
+
+from config import Config
+from metrics import registry
+
+DEFAULT_DATABASE = "credit_intelligence"
+
+MONGO_POOL_CONNECTIONS = registry.gauge(
+    "mongo_pool_connections", "Open and checked-out connections per server", ("address", "state")
+)
+MONGO_POOL_EVENTS = registry.counter(
+    "mongo_pool_events_total", "Connection pool events per server", ("address", "event")
+)
+
+
+class PoolStats(ConnectionPoolListener):
+    """Tracks open and in-use connections per server from pymongo's pool events."""
+
+    def __init__(self):
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def _update(self, address, event, open_delta=0, in_use_delta=0):
+        address = f"{address[0]}:{address[1]}"
+        with self._lock:
+            stats = self._stats.setdefault(address, {"open": 0, "inUse": 0, "events": {}})
+            stats["open"] += open_delta
+            stats["inUse"] += in_use_delta
+            stats["events"][event] = stats["events"].get(event, 0) + 1
+            open_count, in_use = stats["open"], stats["inUse"]
+        MONGO_POOL_CONNECTIONS.set(open_count, address=address, state="open")
+        MONGO_POOL_CONNECTIONS.set(in_use, address=address, state="in_use")
+        MONGO_POOL_EVENTS.inc(address=address, event=event)
+
+    def snapshot(self):
+        with self._lock:
+            return {address: dict(stats, events=dict(stats["events"])) for address, stats in self._stats.items()}
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+    def pool_created(self, event):
+        self._update(event.address, "pool_created")
+
+    def pool_ready(self, event):
+        self._update(event.address, "pool_ready")
+
+    def pool_cleared(self, event):
+        self._update(event.address, "pool_cleared")
+
+    def pool_closed(self, event):
+        self._update(event.address, "pool_closed")
+
+    def connection_created(self, event):
+        self._update(event.address, "connection_created", open_delta=1)
+
+    def connection_ready(self, event):
+        self._update(event.address, "connection_ready")
+
+    def connection_closed(self, event):
+        self._update(event.address, "connection_closed", open_delta=-1)
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        self._update(event.address, "check_out_failed")
+
+    def connection_checked_out(self, event):
+        self._update(event.address, "checked_out", in_use_delta=1)
+
+    def connection_checked_in(self, event):
+        self._update(event.address, "checked_in", in_use_delta=-1)
+
+
+pool_stats = PoolStats()
+
+
+def client_options():
+    """MongoClient keyword options from Config; unset ones keep pymongo's defaults."""
+    options = {
+        "maxPoolSize": Config.MONGO_MAX_POOL_SIZE,
+        "minPoolSize": Config.MONGO_MIN_POOL_SIZE,
+        "maxIdleTimeMS": Config.MONGO_MAX_IDLE_TIME_MS,
+        "waitQueueTimeoutMS": Config.MONGO_WAIT_QUEUE_TIMEOUT_MS,
+        "connectTimeoutMS": Config.MONGO_CONNECT_TIMEOUT_MS,
+        "socketTimeoutMS": Config.MONGO_SOCKET_TIMEOUT_MS,
+        "serverSelectionTimeoutMS": Config.MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        "readPreference": Config.MONGO_READ_PREFERENCE,
+        "appname": Config.MONGO_APP_NAME,
+    }
+    return {name: value for name, value in options.items() if value is not None}
+
+
+def write_concern():
+    w = Config.MONGO_WRITE_CONCERN
+    if w is None:
+        return None
+    return WriteConcern(w=int(w) if w.isdigit() else w)
+
+
+def create_client(uri=None):
+    """A new MongoClient for `uri` (default: MONGO_URI) with the configured pool options."""
+    return MongoClient(uri or Config.MONGO_URI, event_listeners=[pool_stats], **client_options())
+
+
+def database_for(client):
+    """MONGO_DB_NAME, else credit_intelligence (a database named in the URI is not used)."""
+    name = Config.MONGO_DB_NAME or DEFAULT_DATABASE
+    return client.get_database(name, write_concern=write_concern())
+
+
+_client = None
+_database = None
+_pid = None
+_lock = threading.Lock()
+
+
+def get_client():
+    """This process's shared MongoClient, created on first use (and again after a fork)."""
+    global _client, _database, _pid
+    if _pid == os.getpid():
+        return _client
+    with _lock:
+        if _pid != os.getpid():
+            # A client inherited across fork() is unusable; its pool belongs to the parent
+            pool_stats.reset()
+            _client = create_client()
+            _database = database_for(_client)
+            _pid = os.getpid()
+        return _client
+
+
+def use_database(database):
+    """
+    Makes `database` (e.g. an in-memory mongomock one for the offline
+    benchmarks) this process's shared database, so nothing reaches MONGO_URI.
+    """
+    global _client, _database, _pid
+    with _lock:
+        _client, _database, _pid = database.client, database, os.getpid()
+
+
+def get_db():
+    get_client()
+    return _database
+
+
+def pool_info():
+    """Configured pool options plus live per-server connection counts."""
+    return {"options": client_options(), "servers": pool_stats.snapshot()}
+
+
+class LazyCollection:
+    """A collection handle that resolves against the current process's client on each use."""
+
+    def __init__(self, name):
+        self.name = name
+        self._resolved = (None, None)
+
+    def resolve(self):
+        database, collection = self._resolved
+        current = get_db()
+        if database is not current:
+            collection = current[self.name]
+            self._resolved = (current, collection)
+        return collection
+
+    def __getattr__(self, attr):
+        return getattr(self.resolve(), attr)
+
+    def __getitem__(self, name):
+        return LazyCollection(f"{self.name}.{name}")
+
+
+class LazyDatabase:
+    """
+    Stands in for the shared Database at import time: `db.companies` and
+    `db["companies"]` return LazyCollections; Database methods and properties
+    (list_collection_names, create_collection, ...) are forwarded.
+    """
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        if hasattr(Database, name):
+            return getattr(get_db(), name)
+        return LazyCollection(name)
+
+    def __getitem__(self, name):
+        return LazyCollection(name)
+
+
+db = LazyDatabase()
@@ -0,0 +1,180 @@
+# news_client.py
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+
+# Responses worth retrying, and the longest wait between attempts
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+MAX_BACKOFF = 60
+
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """Raised instead of calling the API while the circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures and rejects calls
+    for `reset_timeout` seconds. After that a single trial call is let
+    through (half-open); success closes the breaker, failure re-opens it.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=60):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at >= self.reset_timeout:
+                return "half-open"
+            return "open"
+
+    def before_call(self):
+        with self._lock:
+            if self._opened_at is None:
+                return
+            if time.monotonic() - self._opened_at < self.reset_timeout or self._trial_in_flight:
+                raise CircuitOpenError("NewsAPI circuit breaker is open")
+            self._trial_in_flight = True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+
+
+def build_session(pool_size=10):
+    """
+    Creates a keep-alive requests.Session with a connection pool sized for
+    `pool_size` concurrent requests. Retries are done by NewsAPIClient, so
+    each attempt goes through its rate limiter.
+    """
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def retry_after(response):
+    """Seconds asked for by a Retry-After header (delta or HTTP date), or None."""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    if value.strip().isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+class NewsAPIClient:
+    """
+    NewsAPI client sharing one pooled session across all threads, with
+    connect/read timeouts, a circuit breaker and an optional rate limiter
+    (any context manager, e.g. refresh_engine.SourceLimiter).
+    Connection errors, timeouts, 429 and 5xx responses are retried up to
+    `max_retries` times with exponential backoff, honouring Retry-After.
+    Every attempt takes its own rate-limit slot and the backoff sleeps
+    outside the limiter. `base_url` can point at a local stub server.
+    """
+
+    def __init__(self, api_key, base_url="https://newsapi.org/v2/everything", session=None,
+                 timeout=(3.05, 10), limiter=None, breaker=None, max_retries=3, backoff_factor=0.5):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.session = session or build_session()
+        self.timeout = timeout
+        self.limiter = limiter
+        self.breaker = breaker or CircuitBreaker()
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+
+    def _get(self, params):
+        if self.limiter is None:
+            return self.session.get(self.base_url, params=params, timeout=self.timeout)
+        with self.limiter:
+            return self.session.get(self.base_url, params=params, timeout=self.timeout)
+
+    def _backoff(self, attempt, response=None):
+        delay = self.backoff_factor * 2 ** attempt
+        if response is not None:
+            delay = max(delay, retry_after(response) or 0)
+        return min(delay, MAX_BACKOFF)
+
+    def fetch_articles(self, query, page_size=10, **extra_params):
+        """Returns the article dicts for `query`; raises RequestException on failure."""
+        params = {
+            "q": query,
+            "language": "en",
+            "sortBy": "relevancy",
+            "pageSize": page_size,
+            "apiKey": self.api_key,
+        }
+        params.update(extra_params)
+
+        self.breaker.before_call()
+        try:
+            for attempt in range(self.max_retries + 1):
+                try:
+                    response = self._get(params)
+                except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                    if attempt == self.max_retries:
+                        raise
+                    time.sleep(self._backoff(attempt))
+                    continue
+                if response.status_code not in RETRY_STATUSES or attempt == self.max_retries:
+                    break
+                time.sleep(self._backoff(attempt, response))
+            response.raise_for_status()
+            data = response.json()
+        except (requests.exceptions.RequestException, ValueError):
+            self.breaker.record_failure()
+            raise
+        self.breaker.record_success()
+        return data.get("articles", [])
+
+    def fetch_many(self, queries, max_workers=8, page_size=10, params_by_query=None, **extra_params):
+        """
+        Fetches articles for many queries concurrently. Returns
+        {query: articles}, with None for queries that failed.
+        `params_by_query` adds per-query parameters (e.g. NewsAPI's `from`).
+        """
+        queries = list(dict.fromkeys(queries))
+        params_by_query = params_by_query or {}
+
+        def fetch(query):
+            params = dict(extra_params, **params_by_query.get(query, {}))
+            try:
+                return self.fetch_articles(query, page_size=page_size, **params)
+            except requests.exceptions.RequestException as e:
+                print(f"Error fetching News API news for {query}: {e}")
+                return None
+
+        if not queries:
+            return {}
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(queries))), thread_name_prefix="news") as pool:
+            return dict(zip(queries, pool.map(fetch, queries)))
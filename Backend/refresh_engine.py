@@ -0,0 +1,131 @@
+# refresh_engine.py
+import threading
+import time
+import math
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket. `rate` tokens are added per second up to
+    `capacity`; acquire() blocks until a token is available.
+    A rate of 0 or None disables the limit.
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(1, math.ceil(rate or 1))
+        self._tokens = float(self.capacity)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens=1):
+        if not self.rate:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class SourceLimiter:
+    """
+    Bounds both the number of in-flight calls and the request rate for a
+    single upstream source (e.g. Yahoo Finance or NewsAPI).
+    Use as a context manager around each upstream call.
+    """
+
+    def __init__(self, name, max_concurrency, rate_per_sec, burst=None):
+        self.name = name
+        self._semaphore = threading.BoundedSemaphore(max(1, max_concurrency))
+        self._bucket = TokenBucket(rate_per_sec, burst)
+
+    def __enter__(self):
+        self._semaphore.acquire()
+        try:
+            self._bucket.acquire()
+        except BaseException:
+            self._semaphore.release()
+            raise
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._semaphore.release()
+        return False
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers (0 if empty)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+class RefreshEngine:
+    """
+    Runs a per-company refresh function concurrently on a bounded thread pool
+    and builds a report for each cycle.
+
+    `refresh_fn(company_info)` should return True when the company was
+    updated, False when it was skipped, and raise on failure. The report's
+    "results" maps each ticker to "updated", "skipped" or "failed".
+    """
+
+    def __init__(self, refresh_fn, max_workers=8):
+        self.refresh_fn = refresh_fn
+        self.max_workers = max(1, max_workers)
+
+    def _timed_refresh(self, company_info):
+        start = time.perf_counter()
+        try:
+            updated = self.refresh_fn(company_info)
+            return updated, None, time.perf_counter() - start
+        except Exception as e:
+            return False, e, time.perf_counter() - start
+
+    def run_cycle(self, companies):
+        cycle_start = time.perf_counter()
+        latencies = []
+        failures = []
+        results = {}
+        updated_count = 0
+        skipped_count = 0
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="refresh") as pool:
+            futures = {pool.submit(self._timed_refresh, c): c for c in companies}
+            for future in as_completed(futures):
+                company_info = futures[future]
+                updated, error, latency = future.result()
+                latencies.append(latency)
+                if error is not None:
+                    print(f"Error fetching data for {company_info['name']}: {error}")
+                    failures.append({"ticker": company_info["ticker"], "error": str(error)})
+                    results[company_info["ticker"]] = "failed"
+                elif updated:
+                    updated_count += 1
+                    results[company_info["ticker"]] = "updated"
+                else:
+                    skipped_count += 1
+                    results[company_info["ticker"]] = "skipped"
+
+        duration = time.perf_counter() - cycle_start
+        return {
+            "tickers": len(companies),
+            "updated": updated_count,
+            "skipped": skipped_count,
+            "failed": len(failures),
+            "failures": failures,
+            "results": results,
+            "durationSeconds": duration,
+            "tickersPerSecond": len(companies) / duration if duration > 0 else 0.0,
+            "p95LatencySeconds": percentile(latencies, 95),
+            "maxLatencySeconds": max(latencies) if latencies else 0.0,
+        }
@@ -0,0 +1,190 @@
+# refresh_policy.py
+from collections import Counter
+from datetime import datetime, time as dtime, timedelta, timezone
+import math
+import threading
+import time
+from zoneinfo import ZoneInfo
+from pymongo import ASCENDING, UpdateOne
+
+MARKET_TZ = ZoneInfo("America/New_York")
+MARKET_OPEN = dtime(9, 30)
+MARKET_CLOSE = dtime(16, 0)
+
+# Delay after the close for the final refresh of the day, so the closing bar is captured
+AFTER_CLOSE_DELAY = timedelta(minutes=5)
+
+
+def to_market_time(utc_naive):
+    return utc_naive.replace(tzinfo=timezone.utc).astimezone(MARKET_TZ)
+
+
+def to_utc_naive(market_dt):
+    return market_dt.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def is_market_open(now):
+    """True during regular US equity hours (weekdays 9:30-16:00 New York; holidays not modelled)."""
+    local = to_market_time(now)
+    return local.weekday() < 5 and MARKET_OPEN <= local.time() < MARKET_CLOSE
+
+
+def next_market_open(now):
+    """Next regular session open after `now` (naive UTC in, naive UTC out)."""
+    local = to_market_time(now)
+    day = local.date()
+    if local.time() >= MARKET_OPEN:
+        day += timedelta(days=1)
+    while day.weekday() >= 5:
+        day += timedelta(days=1)
+    return to_utc_naive(datetime.combine(day, MARKET_OPEN, tzinfo=MARKET_TZ))
+
+
+def market_close(now):
+    """Today's close for a time inside the session (naive UTC)."""
+    local = to_market_time(now)
+    return to_utc_naive(datetime.combine(local.date(), MARKET_CLOSE, tzinfo=MARKET_TZ))
+
+
+class ViewTracker:
+    """
+    Counts dashboard views per company in memory and periodically flushes
+    them into hourly buckets in Mongo, so every API process contributes
+    without a write per request. Buckets expire after `retention_days`.
+    """
+
+    def __init__(self, db, collection_name="company_views", flush_interval=30, retention_days=7):
+        self.collection = db[collection_name]
+        self.flush_interval = flush_interval
+        self.retention_days = retention_days
+        self._counts = Counter()
+        self._last_flush = time.monotonic()
+        self._indexed = False
+        self._lock = threading.Lock()
+
+    def ensure_indexes(self):
+        if self._indexed:
+            return
+        self.collection.create_index([("hour", ASCENDING)], expireAfterSeconds=self.retention_days * 86400)
+        self.collection.create_index([("name", ASCENDING), ("hour", ASCENDING)])
+        self._indexed = True
+
+    def record(self, name):
+        with self._lock:
+            self._counts[name] += 1
+            due = time.monotonic() - self._last_flush >= self.flush_interval
+        if due:
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Error flushing view counts: {e}")
+
+    def flush(self):
+        with self._lock:
+            counts, self._counts = self._counts, Counter()
+            self._last_flush = time.monotonic()
+        if not counts:
+            return
+        self.ensure_indexes()
+        hour = datetime.utcnow().replace(minute=0, second=0, microsecond=0)
+        self.collection.bulk_write([
+            UpdateOne(
+                {"_id": f"{name}:{hour:%Y%m%d%H}"},
+                {"$inc": {"count": count}, "$setOnInsert": {"name": name, "hour": hour}},
+                upsert=True,
+            )
+            for name, count in counts.items()
+        ], ordered=False)
+
+    def counts(self, hours=24):
+        """Views per company name over the last `hours`."""
+        since = datetime.utcnow() - timedelta(hours=hours)
+        return {
+            doc["_id"]: doc["views"]
+            for doc in self.collection.aggregate([
+                {"$match": {"hour": {"$gte": since}}},
+                {"$group": {"_id": "$name", "views": {"$sum": "$count"}}},
+            ])
+        }
+
+
+class CompanyStats:
+    """
+    Volatility, beta and recent view counts for all companies, reloaded from
+    Mongo at most every `ttl` seconds and shared by all worker threads.
+    """
+
+    def __init__(self, companies_col, view_tracker=None, ttl=60):
+        self.companies_col = companies_col
+        self.view_tracker = view_tracker
+        self.ttl = ttl
+        self._loaded_at = None
+        self._risk = {}
+        self._views = {}
+        self._lock = threading.Lock()
+
+    def _reload(self):
+        risk = {
+            doc["ticker"]: (doc.get("volatility"), doc.get("beta"))
+            for doc in self.companies_col.find({}, {"_id": 0, "ticker": 1, "volatility": 1, "beta": 1})
+            if "ticker" in doc
+        }
+        views = self.view_tracker.counts() if self.view_tracker is not None else {}
+        self._risk, self._views = risk, views
+        self._loaded_at = time.monotonic()
+
+    def get(self, ticker, name):
+        """Returns (volatility, beta, views) for a company."""
+        with self._lock:
+            if self._loaded_at is None or time.monotonic() - self._loaded_at > self.ttl:
+                try:
+                    self._reload()
+                except Exception as e:
+                    print(f"Error loading refresh statistics: {e}")
+                    self._loaded_at = time.monotonic()
+            volatility, beta = self._risk.get(ticker, (None, None))
+            return volatility, beta, self._views.get(name, 0)
+
+
+class RefreshPolicy:
+    """
+    Decides when a ticker is next due. The base interval shrinks for
+    volatile tickers (annualized volatility, or beta when that is unknown)
+    and for frequently viewed ones, is clamped to [min_interval,
+    max_interval], and refreshes are deferred to the next open while the
+    market is closed, with one last run just after the close.
+    """
+
+    def __init__(self, base_interval_fn, stats=None, reference_volatility=0.3,
+                 min_interval=300, max_interval=4 * 60 * 60, market_hours_only=True):
+        self.base_interval_fn = base_interval_fn
+        self.stats = stats
+        self.reference_volatility = reference_volatility
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.market_hours_only = market_hours_only
+
+    def interval(self, ticker, name=None):
+        seconds = self.base_interval_fn(ticker)
+        if self.stats is None:
+            return seconds
+
+        volatility, beta, views = self.stats.get(ticker, name)
+        if not volatility and beta:
+            volatility = abs(beta) * self.reference_volatility
+        if volatility:
+            seconds *= min(2.0, max(0.5, self.reference_volatility / volatility))
+        seconds /= 1 + math.log10(1 + views)
+        return min(self.max_interval, max(self.min_interval, seconds))
+
+    def next_run(self, ticker, name=None, now=None):
+        now = now or datetime.utcnow()
+        due = now + timedelta(seconds=self.interval(ticker, name))
+        if not self.market_hours_only:
+            return due
+        if not is_market_open(now):
+            return next_market_open(now)
+        close = market_close(now)
+        if due >= close:
+            return close + AFTER_CLOSE_DELAY
+        return due
@@ -0,0 +1,117 @@
+# response_cache.py
+from collections import OrderedDict
+from datetime import datetime
+import hashlib
+import threading
+import time
+
+
+class CachedResponse:
+    """A serialized JSON body with the validators sent alongside it."""
+
+    def __init__(self, body, last_modified=None, tags=()):
+        self.body = body
+        self.etag = hashlib.sha1(body).hexdigest()
+        self.last_modified = last_modified or datetime.utcnow()
+        self.tags = tuple(tags)
+        self.created = time.monotonic()
+
+
+class ResponseCache:
+    """
+    In-process LRU cache of serialized response bodies with a TTL.
+
+    Entries are dropped explicitly when the scheduler writes new data; the
+    TTL bounds staleness for processes that did not see the write (e.g.
+    other gunicorn workers). Entries can carry tags (e.g. "sector:Technology")
+    for data they depend on besides their own key, dropped together with
+    invalidate_tag(). Every invalidation bumps a generation counter, so a
+    body built from data read before an invalidation is not cached.
+    """
+
+    def __init__(self, max_entries=1024, ttl=300):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._tagged = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    @property
+    def generation(self):
+        with self._lock:
+            return self._generation
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if self.ttl and time.monotonic() - entry.created > self.ttl:
+                self._drop(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, body, last_modified=None, tags=(), generation=None):
+        """
+        Caches and returns a response. With `generation` (read before the body
+        was built) the entry is only cached if nothing was invalidated since.
+        """
+        entry = CachedResponse(body, last_modified, tags)
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return entry
+            self._drop(key)
+            self._entries[key] = entry
+            for tag in entry.tags:
+                self._tagged.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+        return entry
+
+    def _drop(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry.tags:
+            keys = self._tagged.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tagged[tag]
+
+    def get_or_build(self, key, build):
+        """
+        Returns the cached entry for `key`, calling `build()` on a miss.
+        `build` returns (body_bytes, last_modified) or (body_bytes,
+        last_modified, tags), or None for responses that should not be cached.
+        """
+        entry = self.get(key)
+        if entry is not None:
+            return entry
+        generation = self.generation
+        built = build()
+        if built is None:
+            return None
+        return self.set(key, *built, generation=generation)
+
+    def invalidate(self, *keys):
+        with self._lock:
+            self._generation += 1
+            for key in keys:
+                self._drop(key)
+
+    def invalidate_tag(self, *tags):
+        """Drops every entry carrying one of `tags`."""
+        with self._lock:
+            self._generation += 1
+            for tag in tags:
+                for key in list(self._tagged.get(tag, ())):
+                    self._drop(key)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self._tagged.clear()
@@ -1,22 +1,48 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, jsonify, request, Response, current_app, stream_with_context, url_for
 from models import Company, YahooFinanceAPI
+from mongo import db
+from company_query import ListingQuery
+from serialization import json_response
+from sync_jobs import SyncJobs
+from config import Config
 import json
-from datetime import datetime
+from datetime import datetime, timedelta
 
 api = Blueprint('api', __name__)
 
+indexes_created = False
+
+# Background Yahoo Finance syncs, single-flight per symbol
+sync_jobs = SyncJobs(
+    db,
+    max_workers=Config.SYNC_WORKERS,
+    lease_seconds=Config.SYNC_JOB_LEASE_SECONDS,
+    retention_seconds=Config.SYNC_JOB_RETENTION_SECONDS,
+)
+
 @api.route('/companies', methods=['GET'])
 def get_companies():
-    """Get all companies from database"""
-    companies = Company.get_all()
-    return jsonify(companies)
+    """List companies with cursor pagination, filtering and field projection"""
+    global indexes_created
+    try:
+        query = ListingQuery(request.args, score_field='creditScore')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    if not indexes_created:
+        indexes_created = Company.ensure_indexes()
+
+    return Response(
+        stream_with_context(Company.stream_page(query, current_app.json.dumps)),
+        mimetype='application/json'
+    )
 
 @api.route('/companies/<name>', methods=['GET'])
 def get_company(name):
     """Get specific company details"""
     company = Company.get_by_name(name)
     if company:
-        return jsonify(company)
+        return json_response(company, http_dates=True)
     return jsonify({'error': 'Company not found'}), 404
 
 @api.route('/companies', methods=['POST'])
@@ -40,42 +66,66 @@ def get_yahoo_data(symbol):
     """Get stock data from Yahoo Finance"""
     period = request.args.get('period', '1y')
     data = YahooFinanceAPI.get_stock_data(symbol, period)
-    return jsonify(data)
+    return json_response(data, http_dates=True)
+
+def sync_from_yahoo(name, symbol):
+    """Fetch fresh Yahoo Finance data for a company and store it (runs on the sync executor)"""
+    snapshot = YahooFinanceAPI.get_sync_data(symbol)
+    if 'error' in snapshot:
+        raise RuntimeError(f"Failed to fetch data from Yahoo Finance: {snapshot['error']}")
+    yahoo_info, yahoo_data = snapshot['info'], snapshot['data']
 
-@api.route('/companies/<name>/sync', methods=['POST'])
-def sync_company_data(name):
-    """Sync company data with Yahoo Finance"""
-    company = Company.get_by_name(name)
-    if not company:
-        return jsonify({'error': 'Company not found'}), 404
-    
-    symbol = company.get('symbol')
-    if not symbol:
-        return jsonify({'error': 'No symbol provided for company'}), 400
-    
-    # Get fresh data from Yahoo
-    yahoo_info = YahooFinanceAPI.get_company_info(symbol)
-    yahoo_data = YahooFinanceAPI.get_stock_data(symbol)
-    
-    if 'error' in yahoo_info or 'error' in yahoo_data:
-        return jsonify({'error': 'Failed to fetch data from Yahoo Finance'}), 500
-    
-    # Update company with fresh data
     update_data = {
         'market_cap': yahoo_info.get('market_cap', 0),
         'sector': yahoo_info.get('sector', 'Unknown'),
         'current_price': yahoo_data.get('current_price', 0),
         'pe_ratio': yahoo_data.get('pe_ratio', 0),
         'beta': yahoo_data.get('beta', 1),
-        'historical_data': yahoo_data.get('historical_data', [])
+        'historical_data': yahoo_data.get('historical_data', []),
+        'synced_at': datetime.utcnow()
     }
-    
     Company.update(name, update_data)
+    return update_data
+
+def job_status(job, **extra):
+    """Public view of a sync job"""
+    status = {'jobId': job['_id'], **{k: v for k, v in job.items() if k != '_id'}}
+    status['statusUrl'] = url_for('api.get_sync_job', job_id=job['_id'])
+    status.update(extra)
+    return status
+
+@api.route('/companies/<name>/sync', methods=['POST'])
+def sync_company_data(name):
+    """Queue a Yahoo Finance sync for a company; poll the returned job for the result"""
+    company = Company.get_by_name(name)
+    if not company:
+        return jsonify({'error': 'Company not found'}), 404
     
-    return jsonify({
-        'message': 'Company data synced successfully',
-        'data': update_data
-    })
+    # Companies scored by the refresh worker carry a ticker rather than a symbol
+    symbol = company.get('symbol') or company.get('ticker')
+    if not symbol:
+        return jsonify({'error': 'No symbol provided for company'}), 400
+
+    # Skip the upstream fetch when the last sync is recent enough (?force=true overrides)
+    synced_at = company.get('synced_at')
+    max_age = timedelta(seconds=Config.SYNC_MAX_AGE_SECONDS)
+    if request.args.get('force') != 'true' and synced_at and datetime.utcnow() - synced_at < max_age:
+        job = sync_jobs.skipped(name, symbol, f'Synced less than {Config.SYNC_MAX_AGE_SECONDS} seconds ago')
+        return json_response(job_status(job), http_dates=True)
+
+    # Concurrent syncs of the same symbol share one job
+    job, created = sync_jobs.submit(name, symbol, lambda: sync_from_yahoo(name, symbol))
+    response = json_response(job_status(job, coalesced=not created), status=202, http_dates=True)
+    response.headers['Location'] = url_for('api.get_sync_job', job_id=job['_id'])
+    return response
+
+@api.route('/sync-jobs/<job_id>', methods=['GET'])
+def get_sync_job(job_id):
+    """Status of a company sync job"""
+    job = sync_jobs.get(job_id)
+    if not job:
+        return jsonify({'error': 'Sync job not found'}), 404
+    return json_response(job_status(job), http_dates=True)
 
 @api.route('/health', methods=['GET'])
 def health_check():
@@ -0,0 +1,179 @@
+# score_events.py
+from datetime import datetime
+import queue
+import threading
+import time
+from pymongo.errors import OperationFailure, PyMongoError
+
+# Reconnect delays after the change stream drops (seconds, doubling per failure)
+RECONNECT_DELAY = 1
+MAX_RECONNECT_DELAY = 60
+# Change streams are unsupported (standalone server); retrying cannot help
+CHANGE_STREAM_UNSUPPORTED = 40573
+# The resume token has aged out of the oplog; the stream must start afresh
+CHANGE_STREAM_HISTORY_LOST = (280, 286)
+
+# Company fields pushed to dashboards when they change
+PUSHED_FIELDS = ("score", "sector", "marketCap", "scoreFactors", "sentiment", "creditTrend", "metrics")
+
+
+def format_last_updated(value):
+    """Same display format as /api/companies/<name>."""
+    return value.strftime("%B %d, %Y") if isinstance(value, datetime) else value
+
+
+class ScoreBroadcaster:
+    """
+    In-process pub/sub for score updates. Remembers the last pushed fields
+    per ticker and only publishes the ones that changed, so each event is a
+    compact diff. Every subscriber gets a bounded queue; a slow client loses
+    its oldest events rather than holding up the others. At most
+    `max_subscribers` can be subscribed at once.
+    """
+
+    def __init__(self, max_queue=100, max_subscribers=None):
+        self.max_queue = max_queue
+        self.max_subscribers = max_subscribers
+        self._subscribers = set()
+        self._last = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self):
+        """A new subscriber queue, or None when max_subscribers are already subscribed."""
+        q = queue.Queue(maxsize=self.max_queue)
+        with self._lock:
+            if self.max_subscribers is not None and len(self._subscribers) >= self.max_subscribers:
+                return None
+            self._subscribers.add(q)
+        return q
+
+    def unsubscribe(self, q):
+        with self._lock:
+            self._subscribers.discard(q)
+
+    @property
+    def subscriber_count(self):
+        with self._lock:
+            return len(self._subscribers)
+
+    def diff(self, company):
+        """Changed pushed fields for a company document, or None when nothing changed."""
+        ticker = company.get("ticker")
+        current = {field: company.get(field) for field in PUSHED_FIELDS if field in company}
+        with self._lock:
+            previous = self._last.get(ticker, {})
+            changes = {field: value for field, value in current.items() if previous.get(field) != value}
+            self._last[ticker] = dict(previous, **current)
+        if not changes:
+            return None
+        return {
+            "ticker": ticker,
+            "name": company.get("name"),
+            "lastUpdated": format_last_updated(company.get("lastUpdated")),
+            "changes": changes,
+        }
+
+    def publish(self, company):
+        event = self.diff(company)
+        if event is None:
+            return None
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for q in subscribers:
+            while True:
+                try:
+                    q.put_nowait(event)
+                    break
+                except queue.Full:
+                    try:
+                        q.get_nowait()
+                    except queue.Empty:
+                        pass
+        return event
+
+
+class ChangeStreamFeed:
+    """
+    Follows a Mongo change stream on a collection (e.g. companies) and calls
+    `listener(document)` for each change of the given `operations`: with the
+    current document, minus the `exclude`d fields, or with just its _id for a
+    delete. Writes made by separate worker processes thus reach every API
+    process.
+
+    When the stream drops it reconnects with exponential backoff, resuming
+    after the last change seen. If that point is no longer in the oplog the
+    stream starts afresh and `on_resync()` is called, since changes may have
+    been missed. Change streams need a replica set (Atlas always has one);
+    on a standalone server the feed stops and only in-process writes are seen.
+    """
+
+    def __init__(self, collection, listener, on_resync=None, operations=("insert", "update", "replace"),
+                 exclude=("scorerState",)):
+        self.collection = collection
+        self.listener = listener
+        self.on_resync = on_resync
+        self.operations = list(operations)
+        self.exclude = exclude
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=f"change-stream-{self.collection.name}", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        pipeline = [{"$match": {"operationType": {"$in": self.operations}}}]
+        if self.exclude:
+            # Large fields (the scorer state, sector score lists) nothing downstream reads
+            pipeline.append({"$project": {f"fullDocument.{field}": 0 for field in self.exclude}})
+        resume_token = None
+        failures = 0
+        while True:
+            try:
+                with self.collection.watch(
+                    pipeline, full_document="updateLookup", resume_after=resume_token
+                ) as stream:
+                    resume_token = stream.resume_token
+                    failures = 0
+                    for change in stream:
+                        resume_token = stream.resume_token
+                        if change.get("operationType") == "delete":
+                            self._dispatch(change.get("documentKey"))
+                        else:
+                            self._dispatch(change.get("fullDocument"))
+            except OperationFailure as e:
+                if e.code == CHANGE_STREAM_UNSUPPORTED:
+                    print(f"Change stream on {self.collection.name} unavailable, using in-process updates only: {e}")
+                    return
+                if e.code in CHANGE_STREAM_HISTORY_LOST:
+                    print(f"Change stream on {self.collection.name} cannot resume, starting afresh: {e}")
+                    resume_token = None
+                    self._resync()
+                error = e
+            except PyMongoError as e:
+                error = e
+
+            failures += 1
+            delay = min(MAX_RECONNECT_DELAY, RECONNECT_DELAY * 2 ** (failures - 1))
+            print(f"Change stream on {self.collection.name} interrupted ({error}); reconnecting in {delay}s")
+            time.sleep(delay)
+
+    def _dispatch(self, document):
+        if not document:
+            return
+        try:
+            self.listener(document)
+        except Exception as e:
+            print(f"Error handling change to {document.get('name') or document.get('_id')}: {e}")
+
+    def _resync(self):
+        if self.on_resync is None:
+            return
+        try:
+            self.on_resync()
+        except Exception as e:
+            print(f"Error resyncing after a change stream gap: {e}")
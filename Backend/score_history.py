@@ -0,0 +1,160 @@
+# score_history.py
+from datetime import datetime, timedelta
+import threading
+from pymongo import ASCENDING, DESCENDING, InsertOne, UpdateOne
+from pymongo.errors import CollectionInvalid, OperationFailure
+
+RESOLUTIONS = ("raw", "day", "week", "month")
+
+# Widest span each rollup serves when ?resolution=auto, keeping charts to a few hundred points
+AUTO_SPANS = (("day", timedelta(days=400)), ("week", timedelta(weeks=400)))
+
+
+def bucket_start(at, resolution):
+    """Start of the day / week (Monday) / month containing `at`."""
+    day = at.replace(hour=0, minute=0, second=0, microsecond=0)
+    if resolution == "day":
+        return day
+    if resolution == "week":
+        return day - timedelta(days=day.weekday())
+    if resolution == "month":
+        return day.replace(day=1)
+    raise ValueError(f"unknown resolution {resolution}")
+
+
+def pick_resolution(start, end):
+    """The finest rollup that covers start..end in a few hundred points."""
+    span = end - start
+    for resolution, widest in AUTO_SPANS:
+        if span <= widest:
+            return resolution
+    return "month"
+
+
+class ScoreHistoryStore:
+    """
+    Every score written for a company, kept as a time series plus daily,
+    weekly and monthly rollups so charts over long ranges read a few hundred
+    points instead of recomputing from prices.
+
+    Raw points live in a MongoDB time-series collection (timeField `at`,
+    metaField `ticker`) and expire after `raw_retention_days`; when
+    time-series collections are unavailable a regular collection indexed on
+    (ticker, at) is used. Rollups are one document per ticker, resolution and
+    bucket, updated in place by a pipeline update as points arrive; `last`
+    only moves to a point at or after the bucket's `lastAt`, so points that
+    arrive out of order leave it alone.
+    """
+
+    def __init__(self, db, collection_name="score_history", rollup_collection_name="score_rollups",
+                 raw_retention_days=90):
+        self.db = db
+        self.collection_name = collection_name
+        self.collection = db[collection_name]
+        self.rollups = db[rollup_collection_name]
+        self.raw_retention_days = raw_retention_days
+        self._ready = False
+        self._lock = threading.Lock()
+
+    def ensure_collection(self):
+        """Creates the collections and their indexes on first use."""
+        if self._ready:
+            return
+        with self._lock:
+            if self._ready:
+                return
+            if self.collection_name not in self.db.list_collection_names():
+                try:
+                    self.db.create_collection(
+                        self.collection_name,
+                        timeseries={"timeField": "at", "metaField": "ticker", "granularity": "hours"},
+                        expireAfterSeconds=self.raw_retention_days * 86400,
+                    )
+                except (CollectionInvalid, OperationFailure) as e:
+                    print(f"Time-series collections unavailable, using a regular collection: {e}")
+            self.collection.create_index([("ticker", ASCENDING), ("at", ASCENDING)])
+            self.rollups.create_index([("ticker", ASCENDING), ("resolution", ASCENDING), ("start", ASCENDING)])
+            self._ready = True
+
+    def rollup_ops(self, ticker, at, score):
+        ops = []
+        for resolution in RESOLUTIONS[1:]:
+            start = bucket_start(at, resolution)
+            # Every expression sees the bucket as it was before this point
+            ops.append(UpdateOne(
+                {"_id": f"{ticker}:{resolution}:{start:%Y-%m-%d}"},
+                [{"$set": {
+                    "ticker": ticker,
+                    "resolution": resolution,
+                    "start": start,
+                    "count": {"$add": [{"$ifNull": ["$count", 0]}, 1]},
+                    "sum": {"$add": [{"$ifNull": ["$sum", 0]}, score]},
+                    "min": {"$min": ["$min", score]},
+                    "max": {"$max": ["$max", score]},
+                    "last": {"$cond": [{"$gte": [at, {"$ifNull": ["$lastAt", at]}]}, score, "$last"]},
+                    "lastAt": {"$max": ["$lastAt", at]},
+                }}],
+                upsert=True,
+            ))
+        return ops
+
+    def record(self, companies):
+        """
+        Appends the score of each written company document (ticker, score,
+        lastUpdated) and folds it into the rollups. Returns the points written.
+        """
+        points = [
+            (c["ticker"], c.get("lastUpdated") or datetime.utcnow(), float(c["score"]))
+            for c in companies if c.get("ticker") and c.get("score") is not None
+        ]
+        if not points:
+            return 0
+        self.ensure_collection()
+        self.collection.bulk_write(
+            [InsertOne({"ticker": ticker, "at": at, "score": score}) for ticker, at, score in points],
+            ordered=False,
+        )
+        ops = [op for ticker, at, score in points for op in self.rollup_ops(ticker, at, score)]
+        self.rollups.bulk_write(ops, ordered=False)
+        return len(points)
+
+    def query(self, ticker, start, end, resolution="auto", limit=1000):
+        """
+        Score points for `ticker` between `start` and `end` at the given
+        resolution ('auto' picks one from the span), oldest first. Rollup
+        points carry the bucket's mean as `score` plus min, max, last and
+        count. When the range holds more than `limit` points the most recent
+        `limit` are returned. Returns (resolution, points, truncated).
+        """
+        if resolution == "auto":
+            resolution = pick_resolution(start, end)
+        if resolution not in RESOLUTIONS:
+            raise ValueError(f"resolution must be one of: auto, {', '.join(RESOLUTIONS)}")
+        self.ensure_collection()
+
+        # Newest first so the limit keeps the latest points, then back to chart order
+        if resolution == "raw":
+            docs = list(self.collection.find(
+                {"ticker": ticker, "at": {"$gte": start, "$lte": end}},
+                {"_id": 0, "at": 1, "score": 1},
+            ).sort("at", DESCENDING).limit(limit + 1))
+            truncated = len(docs) > limit
+            return resolution, docs[:limit][::-1], truncated
+
+        docs = list(self.rollups.find(
+            {"ticker": ticker, "resolution": resolution, "start": {"$gte": bucket_start(start, resolution), "$lte": end}},
+            {"_id": 0, "start": 1, "count": 1, "sum": 1, "min": 1, "max": 1, "last": 1},
+        ).sort("start", DESCENDING).limit(limit + 1))
+        truncated = len(docs) > limit
+        points = [
+            {
+                "at": doc["start"],
+                "score": doc["sum"] / doc["count"],
+                "min": doc["min"],
+                "max": doc["max"],
+                "last": doc["last"],
+                "count": doc["count"],
+            }
+            for doc in reversed(docs[:limit])
+        ]
+        return resolution, points, truncated
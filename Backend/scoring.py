@@ -0,0 +1,64 @@
+# scoring.py
+import numpy as np
+import pandas as pd
+
+# Weights used to blend the price-based score with a sentiment score
+PRICE_WEIGHT = 0.7
+SENTIMENT_WEIGHT = 0.3
+
+
+def calculate_credit_score(close_price, ma50):
+    """
+    Calculates a simplified credit score based on stock price relative to its 50-day moving average.
+    Accepts scalars, or NumPy arrays / pandas Series to score a whole history at once
+    (array inputs return an ndarray). Like the scalar path, a row with no MA50 yet
+    (NaN) scores 100: min(100, NaN) is 100.
+    """
+    if np.ndim(close_price) == 0 and np.ndim(ma50) == 0:
+        # Avoid division by zero
+        if ma50 == 0:
+            return 70
+
+        score = 70 + (close_price - ma50) / ma50 * 100
+        return max(0, min(100, score)) # Clamp score between 0 and 100
+
+    close_price = np.asarray(close_price, dtype=float)
+    ma50 = np.asarray(ma50, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        score = 70 + (close_price - ma50) / ma50 * 100
+    score = np.where(np.isnan(score), 100.0, np.clip(score, 0, 100))
+    return np.where(ma50 == 0, 70.0, score)
+
+
+def simulated_sentiment(close_price, ma50):
+    """
+    Simulates a sentiment score from price movement: 80 when the price is
+    above its 50-day moving average, 60 otherwise. Works on scalars or arrays.
+    """
+    if np.ndim(close_price) == 0 and np.ndim(ma50) == 0:
+        return 80 if close_price > ma50 else 60
+    return np.where(np.asarray(close_price) > np.asarray(ma50), 80, 60)
+
+
+def blend_scores(price_score, sentiment_score):
+    """Weighted blend of a price-based score and a sentiment score."""
+    return (price_score * PRICE_WEIGHT) + (sentiment_score * SENTIMENT_WEIGHT)
+
+
+def monthly_credit_trend(close):
+    """
+    Monthly credit score trend from a daily Close series: the last smoothed
+    score of each month, where the daily score blends the MA50 price score
+    with the simulated sentiment and is smoothed over 30 bars.
+    """
+    # Calculate the 50-day moving average for the entire period
+    ma50 = close.rolling(window=50).mean()
+
+    # Combine the price score and the simulated sentiment for each day
+    combined = blend_scores(calculate_credit_score(close, ma50), simulated_sentiment(close, ma50))
+
+    # Smooth the combined score with a rolling mean
+    smoothed = pd.Series(combined, index=close.index).rolling(window=30).mean()
+
+    # Resample on a monthly basis and get the last valid value for the month
+    return smoothed.resample('M').last().dropna()
@@ -0,0 +1,274 @@
+# sector_stats.py
+from datetime import datetime
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+SECTOR_PROJECTION = {"_id": 0, "ticker": 1, "sector": 1, "score": 1, "creditTrend": 1, "lastUpdated": 1}
+MONTHS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+
+
+def trend_periods(trend, today=None):
+    """
+    "YYYY-MM" of each point of a company's creditTrend. Points written
+    before trends carried a "period" only have the month name; those are
+    dated by walking back from the latest such month on or before today,
+    since a trend lists consecutive months oldest first.
+    """
+    today = today or datetime.utcnow()
+    periods = []
+    year, month = today.year, today.month + 1
+    for point in reversed(trend):
+        if point.get("period"):
+            periods.append(point["period"])
+            year, month = int(point["period"][:4]), int(point["period"][5:7])
+            continue
+        target = MONTHS.index(point["month"]) + 1 if point.get("month") in MONTHS else None
+        if target is None:
+            periods.append(None)
+            continue
+        # The latest `target` month strictly before (year, month)
+        year = year if target < month else year - 1
+        month = target
+        periods.append(f"{year:04d}-{month:02d}")
+    return periods[::-1]
+
+
+def sector_trend(trends):
+    """Average creditTrend across a sector's companies, month by month, oldest first."""
+    totals = {}
+    for trend in trends:
+        trend = trend or []
+        for point, period in zip(trend, trend_periods(trend)):
+            if period is None or point.get("score") is None:
+                continue
+            month_total = totals.setdefault(period, [0.0, 0])
+            month_total[0] += point["score"]
+            month_total[1] += 1
+    return [
+        {
+            "month": datetime.strptime(period, "%Y-%m").strftime("%b"),
+            "period": period,
+            "score": total / count,
+            "companies": count,
+        }
+        for period, (total, count) in sorted(totals.items())
+    ]
+
+
+def sector_name(company):
+    return company.get("sector") or "N/A"
+
+
+def member_entry(company, written_at):
+    """A company's entry in its sector's `members`: ticker, score, write time and credit trend."""
+    return {
+        "t": company["ticker"],
+        "s": company["score"],
+        "at": company.get("lastUpdated") or written_at,
+        "trend": company.get("creditTrend") or [],
+    }
+
+
+MEMBERS = {"$ifNull": ["$members", []]}
+SCORES = "$members.s"
+
+
+def _quantile_expr(q):
+    """Linear-interpolated quantile of the sorted `members` scores (null when there are none)."""
+    last = {"$subtract": [{"$size": "$members"}, 1]}
+    return {"$let": {
+        "vars": {"pos": {"$multiply": [last, q]}},
+        "in": {"$let": {
+            "vars": {"lo": {"$floor": "$$pos"}},
+            "in": {"$let": {
+                "vars": {
+                    "low": {"$arrayElemAt": [SCORES, {"$toInt": "$$lo"}]},
+                    "high": {"$arrayElemAt": [SCORES, {"$toInt": {"$min": [{"$add": ["$$lo", 1]}, last]}}]},
+                },
+                "in": {"$add": ["$$low", {"$multiply": [{"$subtract": ["$$high", "$$low"]}, {"$subtract": ["$$pos", "$$lo"]}]}]},
+            }},
+        }},
+    }}
+
+
+def _summary_stage(sector, updated_at):
+    """Pipeline stage recomputing a sector's summary from its sorted `members`."""
+    return {"$set": {
+        "sector": sector,
+        "count": {"$size": "$members"},
+        "mean": {"$avg": SCORES},
+        "min": {"$arrayElemAt": [SCORES, 0]},
+        "p25": _quantile_expr(0.25),
+        "median": _quantile_expr(0.5),
+        "p75": _quantile_expr(0.75),
+        "max": {"$arrayElemAt": [SCORES, -1]},
+        "updatedAt": updated_at,
+    }}
+
+
+def _without(ticker):
+    return {"$filter": {"input": MEMBERS, "as": "m", "cond": {"$ne": ["$$m.t", ticker]}}}
+
+
+def upsert_member(sector, entry, updated_at):
+    """
+    Pipeline update replacing a ticker's entry in a sector: the old entry is
+    dropped and the new one inserted at its sorted position, in one atomic
+    write, and the summary is recomputed server-side.
+    """
+    score = entry["s"]
+    inserted = {"$let": {
+        "vars": {"others": _without(entry["t"])},
+        "in": {"$concatArrays": [
+            {"$filter": {"input": "$$others", "as": "m", "cond": {"$lt": ["$$m.s", score]}}},
+            {"$literal": [entry]},
+            {"$filter": {"input": "$$others", "as": "m", "cond": {"$gte": ["$$m.s", score]}}},
+        ]},
+    }}
+    return [{"$set": {"members": inserted}}, _summary_stage(sector, updated_at)]
+
+
+def remove_member(sector, ticker, updated_at):
+    """Pipeline update dropping a ticker's entry from a sector and recomputing the summary."""
+    return [{"$set": {"members": _without(ticker)}}, _summary_stage(sector, updated_at)]
+
+
+def not_newer(sector, ticker, at):
+    """Matches the sector unless it holds an entry for `ticker` written after `at`."""
+    return {"_id": sector, "members": {"$not": {"$elemMatch": {"t": ticker, "at": {"$gt": at}}}}}
+
+
+class SectorStatsStore:
+    """
+    Materialized `sector_stats` collection, one document per sector, written
+    by the processes that refresh scores and read by the API. Each sector
+    keeps its `members` (ticker, score, write time, credit trend) sorted by
+    score; a company write applies only its own delta, dropping the old
+    entry and inserting the new one in one atomic pipeline update that also
+    recomputes the count, mean and quartiles on the server. Concurrent
+    workers thus never overwrite each other's scores, and an entry is only
+    replaced by one written later.
+    """
+
+    def __init__(self, db, companies, collection_name="sector_stats"):
+        self.collection = db[collection_name]
+        self.companies = companies
+        self._ready = False
+
+    def ensure_ready(self):
+        """Indexes member tickers and rebuilds sectors stored without `members` (once per process)."""
+        if self._ready:
+            return
+        self.collection.create_index("members.t")
+        if self.collection.find_one({"members": {"$exists": False}}, {"_id": 1}) is not None:
+            self.rebuild()
+        self._ready = True
+
+    def rebuild(self):
+        """Rebuilds every sector from `companies`; sectors that already track members are left alone."""
+        now = datetime.utcnow()
+        sectors = {}
+        for company in self.companies.find({"score": {"$ne": None}, "ticker": {"$ne": None}}, SECTOR_PROJECTION):
+            sectors.setdefault(sector_name(company), []).append(member_entry(company, now))
+        self.collection.delete_many({"members": {"$exists": False}, "_id": {"$nin": list(sectors)}})
+        for sector, members in sectors.items():
+            members.sort(key=lambda entry: entry["s"])
+            try:
+                self.collection.update_one(
+                    {"_id": sector, "members": {"$exists": False}},
+                    [{"$set": {"members": {"$literal": members}}}, _summary_stage(sector, now),
+                     {"$project": {"scores": 0, "tickers": 0, "trend": 0}}],
+                    upsert=True,
+                )
+            except DuplicateKeyError:
+                # Another process already tracks this sector's members
+                pass
+
+    def entries(self, tickers):
+        """{ticker: {sector: write time}} of the stored entries of `tickers`, filtered on the server."""
+        found = {}
+        for doc in self.collection.aggregate([
+            {"$match": {"members.t": {"$in": tickers}}},
+            {"$project": {"members": {"$filter": {"input": "$members", "as": "m", "cond": {"$in": ["$$m.t", tickers]}}}}},
+        ]):
+            for entry in doc["members"]:
+                found.setdefault(entry["t"], {})[doc["_id"]] = entry.get("at")
+        return found
+
+    def record(self, companies):
+        """
+        Applies freshly written companies to their sectors (and removes them
+        from any sector they left). A company is skipped if any sector holds
+        a later entry for it. Returns the sectors that changed.
+        """
+        self.ensure_ready()
+        now = datetime.utcnow()
+        latest = {}
+        for company in companies:
+            ticker = company.get("ticker")
+            at = company.get("lastUpdated") or now
+            if ticker and (ticker not in latest or at >= latest[ticker][0]):
+                latest[ticker] = (at, company)
+        if not latest:
+            return set()
+        current = self.entries(list(latest))
+
+        changed = set()
+        ops = []
+        for ticker, (at, company) in latest.items():
+            stored = current.get(ticker, {})
+            if any(stored_at is not None and stored_at > at for stored_at in stored.values()):
+                continue
+            entry = member_entry(company, now) if company.get("score") is not None else None
+            sector = sector_name(company) if entry else None
+            for old_sector in set(stored) - {sector}:
+                ops.append(UpdateOne(not_newer(old_sector, ticker, at), remove_member(old_sector, ticker, now)))
+                changed.add(old_sector)
+            if entry:
+                # Skipped (or a duplicate _id on upsert) if a later entry for the ticker landed meanwhile
+                ops.append(UpdateOne(not_newer(sector, ticker, at), upsert_member(sector, entry, now), upsert=True))
+                changed.add(sector)
+        if ops:
+            try:
+                self.collection.bulk_write(ops, ordered=False)
+            except BulkWriteError as e:
+                # A duplicate _id means the upsert lost to a later write, which is fine
+                if any(error.get("code") != 11000 for error in e.details.get("writeErrors", [])):
+                    raise
+            self.collection.delete_many({"_id": {"$in": list(changed)}, "count": 0})
+        return changed
+
+    def get(self, sector, include_scores=False):
+        """A sector's summary and average credit trend (plus its sorted scores if asked)."""
+        doc = self.collection.find_one({"_id": sector})
+        if not doc:
+            return None
+        members = doc.pop("members", [])
+        doc["trend"] = sector_trend([entry.get("trend") for entry in members])
+        if include_scores:
+            doc["scores"] = [entry["s"] for entry in members]
+        return doc
+
+    def list(self):
+        return list(self.collection.find({}, {"members": 0}).sort("_id", 1))
+
+    def percentile(self, sector, score):
+        """
+        A score's percentile within its sector (0-100, ties count half),
+        counted on the server so the members never leave the database, and
+        when the sector's stats were last updated.
+        """
+        if score is None:
+            return None, None
+
+        def count(op):
+            return {"$size": {"$filter": {"input": MEMBERS, "as": "m", "cond": {op: ["$$m.s", score]}}}}
+
+        result = list(self.collection.aggregate([
+            {"$match": {"_id": sector or "N/A"}},
+            {"$project": {"updatedAt": 1, "count": 1, "below": count("$lt"), "equal": count("$eq")}},
+        ]))
+        if not result or not result[0].get("count"):
+            return None, None
+        doc = result[0]
+        return (doc["below"] + 0.5 * doc["equal"]) / doc["count"] * 100, doc.get("updatedAt")
@@ -0,0 +1,130 @@
+# sentiment_engine.py
+from itertools import repeat
+import re
+import numpy as np
+
+# Base lexicon: the original keyword lists plus their common inflections.
+# Weights are per occurrence; negative terms carry negative weights.
+DEFAULT_WEIGHTS = {
+    "positive": 1.0, "up": 1.0, "growth": 1.0, "gain": 1.0, "gains": 1.0, "gained": 1.0,
+    "strong": 1.0, "stronger": 1.0, "bullish": 1.0, "increase": 1.0, "increases": 1.0,
+    "increased": 1.0, "rise": 1.0, "rises": 1.0, "rising": 1.0, "success": 1.0,
+    "successful": 1.0, "boost": 1.0, "boosts": 1.0, "boosted": 1.0, "soar": 1.0,
+    "soars": 1.0, "soared": 1.0, "rally": 1.0, "rallies": 1.0, "rallied": 1.0,
+    "negative": -1.0, "down": -1.0, "loss": -1.0, "losses": -1.0, "decline": -1.0,
+    "declines": -1.0, "declined": -1.0, "weak": -1.0, "weaker": -1.0, "bearish": -1.0,
+    "decrease": -1.0, "decreases": -1.0, "decreased": -1.0, "drop": -1.0, "drops": -1.0,
+    "dropped": -1.0, "fall": -1.0, "falls": -1.0, "fell": -1.0, "struggle": -1.0,
+    "struggles": -1.0, "struggling": -1.0, "plunge": -1.0, "plunges": -1.0,
+    "plunged": -1.0, "volatile": -1.0,
+}
+
+NEGATIONS = frozenset(["not", "no", "never", "without", "hardly", "barely", "neither", "nor"])
+
+# Number of following words a negation flips
+NEGATION_SCOPE = 3
+
+# Words (with inner apostrophes) or clause punctuation, which ends a negation scope
+TOKEN_RE = re.compile(r"[a-z0-9]+(?:'[a-z]+)*|[.,;:!?]")
+CLAUSE_BREAKS = frozenset(".,;:!?")
+# TOKEN_RE plus the newline that separates texts in score_batch
+BATCH_TOKEN_RE = re.compile(TOKEN_RE.pattern + r"|\n")
+
+
+class SentimentLexicon:
+    """
+    Precompiled keyword lexicon scorer. Text is lowercased and tokenized
+    with punctuation stripped, so "growth," and "Rise:" both match. A
+    negation word ("not", "no", "never", "...n't") flips the sign of the
+    next few words until the end of the clause.
+    """
+
+    def __init__(self, weights=None, negations=NEGATIONS, negation_scope=NEGATION_SCOPE):
+        self.weights = dict(DEFAULT_WEIGHTS if weights is None else weights)
+        self.negations = frozenset(negations)
+        self.negation_scope = negation_scope
+
+    def tokenize(self, text):
+        return TOKEN_RE.findall(text.lower().replace("’", "'"))
+
+    def score(self, text):
+        """Sum of term weights in `text` (0 for empty or non-string input)."""
+        if not text or not isinstance(text, str):
+            return 0
+        weights = self.weights
+        negations = self.negations
+        total = 0
+        negated_for = 0
+        for token in self.tokenize(text):
+            if token in CLAUSE_BREAKS:
+                negated_for = 0
+                continue
+            if token in negations or token.endswith("n't"):
+                negated_for = self.negation_scope
+                continue
+            weight = weights.get(token)
+            if weight is not None:
+                total += -weight if negated_for else weight
+            if negated_for:
+                negated_for -= 1
+        return total
+
+    def score_batch(self, texts):
+        """
+        Scores many texts at once, equal to score() of each text. All texts
+        are lowercased and tokenized in one pass (joined by newlines that mark
+        where each text ends); tokens are classified with C-level lookups and
+        the negation scopes and per-text sums are computed with NumPy.
+        """
+        if not texts:
+            return []
+        # Inside a text a newline is just whitespace, so it can't be mistaken for a boundary
+        joined = "\n".join(text.replace("\n", " ") if isinstance(text, str) else "" for text in texts)
+        tokens = BATCH_TOKEN_RE.findall(joined.lower().replace("’", "'"))
+        count = len(tokens)
+        if not count:
+            return [0] * len(texts)
+
+        # One lookup per token into a vocabulary of every token that matters (0: plain word)
+        vocabulary = ["", "\n"] + sorted(CLAUSE_BREAKS) + sorted(self.negations)
+        vocabulary += sorted(t for t in set(tokens) if t.endswith("n't") and t not in self.negations)
+        first_weighted = len(vocabulary)
+        vocabulary += [t for t in self.weights if t not in vocabulary]
+        index = {token: i for i, token in enumerate(vocabulary)}
+        ids = np.fromiter(map(index.get, tokens, repeat(0)), np.intp, count)
+
+        weight_table = np.zeros(len(vocabulary))
+        weight_table[first_weighted:] = [self.weights[t] for t in vocabulary[first_weighted:]]
+        is_end = ids == 1
+        is_break = (ids >= 2) & (ids < 2 + len(CLAUSE_BREAKS))
+        is_negation = (ids >= 2 + len(CLAUSE_BREAKS)) & (ids < first_weighted)
+        weights = weight_table[ids]
+
+        # A word is negated when the last negation, clause break or text end before
+        # it is a negation with fewer than negation_scope words in between
+        is_event = ids.astype(bool) & (ids < first_weighted)
+        is_word = ~is_event
+        last_event = np.maximum.accumulate(np.where(is_event, np.arange(count), -1))
+        words_seen = np.cumsum(is_word)
+        after_event = words_seen - 1 - np.where(last_event >= 0, words_seen[last_event], 0)
+        negated = (last_event >= 0) & is_negation[last_event] & (after_event < self.negation_scope)
+
+        contributions = np.where(is_word, np.where(negated, -weights, weights), 0.0)
+        text_ids = np.cumsum(is_end) - is_end
+        return np.bincount(text_ids, weights=contributions, minlength=len(texts)).tolist()
+
+
+default_lexicon = SentimentLexicon()
+
+
+def normalize_score(raw_score):
+    """Maps a headline score (roughly -10 to 10) onto the 0-100 sentiment scale."""
+    return 50 + (raw_score / 10) * 50
+
+
+def score(text):
+    return default_lexicon.score(text)
+
+
+def score_batch(texts):
+    return default_lexicon.score_batch(texts)
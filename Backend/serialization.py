@@ -0,0 +1,70 @@
+# serialization.py
+"""
+Lean JSON serialization for API responses. Uses orjson when it is installed
+(it handles datetimes and NumPy scalars natively) and falls back to the
+standard json module with an equivalent default hook. Datetimes are written
+as ISO-8601, or as RFC 822 HTTP dates like flask.jsonify with http_dates=True.
+"""
+from datetime import date, datetime
+import json
+
+import numpy as np
+from flask import Response
+from werkzeug.http import http_date
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+ORJSON_OPTIONS = (orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS) if orjson else 0
+# Hands datetimes to the default hook instead of writing them as ISO-8601
+ORJSON_HTTP_DATE_OPTIONS = (ORJSON_OPTIONS | orjson.OPT_PASSTHROUGH_DATETIME) if orjson else 0
+
+
+def encode_default(value):
+    """Handles the types orjson serializes natively but json does not."""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def encode_http_default(value):
+    """encode_default, but with dates as RFC 822 HTTP dates (Flask's default format)."""
+    if isinstance(value, (datetime, date)):
+        return http_date(value)
+    return encode_default(value)
+
+
+def dumps(obj, http_dates=False):
+    """Serializes `obj` to compact UTF-8 JSON bytes."""
+    default = encode_http_default if http_dates else encode_default
+    if orjson is not None:
+        return orjson.dumps(obj, default=default, option=ORJSON_HTTP_DATE_OPTIONS if http_dates else ORJSON_OPTIONS)
+    return json.dumps(obj, default=default, separators=(",", ":")).encode("utf-8")
+
+
+def json_response(obj, status=200, http_dates=False):
+    """A Flask response carrying dumps(obj, http_dates)."""
+    return Response(dumps(obj, http_dates), status=status, mimetype="application/json")
+
+
+def history_records(hist, tail=30):
+    """
+    The last `tail` bars of a price history as [{date, close, volume}] dicts.
+    Only the tail is converted, column by column from the NumPy arrays.
+    """
+    if hist is None or hist.empty:
+        return []
+    hist = hist.tail(tail)
+    dates = hist.index.strftime('%Y-%m-%d').tolist()
+    closes = hist['Close'].to_numpy(dtype=float).tolist()
+    volumes = hist['Volume'].to_numpy(dtype=np.int64).tolist()
+    return [
+        {'date': day, 'close': close, 'volume': volume}
+        for day, close, volume in zip(dates, closes, volumes)
+    ]
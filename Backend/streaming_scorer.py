@@ -0,0 +1,223 @@
+# streaming_scorer.py
+from collections import deque
+from datetime import datetime
+import math
+import pandas as pd
+from scoring import calculate_credit_score, simulated_sentiment, blend_scores
+from history_store import ADJUSTMENT_TOLERANCE
+
+MA_WINDOW = 50
+SMOOTHING_WINDOW = 30
+# Months of credit trend kept in the state
+TREND_MONTHS = 8
+
+# Running sums are rebuilt from the buffers this often to stop float drift
+RESUM_INTERVAL = 1000
+
+
+class StreamingScorer:
+    """
+    Incremental version of the MA50 / 30-bar smoothed score behind the
+    monthly credit trend. Keeps ring buffers and running sums for both
+    windows, so each new close is an O(1) update, plus the last smoothed
+    score of each of the last TREND_MONTHS months.
+
+    Calling update() again with the timestamp of the latest bar replaces that
+    bar instead of appending, which lets intraday ticks revise today's close.
+    """
+
+    def __init__(self):
+        self.closes = deque(maxlen=MA_WINDOW)
+        self.combined = deque(maxlen=SMOOTHING_WINDOW)
+        self.close_sum = 0.0
+        self.combined_sum = 0.0
+        self.last_timestamp = None
+        self.updates = 0
+        # [YYYY-MM, last smoothed score of that month]
+        self.months = deque(maxlen=TREND_MONTHS)
+        # What the latest bar evicted / added, so it can be replaced
+        self._undo = None
+
+    def _append(self, close):
+        evicted_close = self.closes[0] if len(self.closes) == MA_WINDOW else None
+        self.closes.append(close)
+        self.close_sum += close - (evicted_close or 0.0)
+
+        added_combined = False
+        evicted_combined = None
+        if len(self.closes) == MA_WINDOW:
+            ma50 = self.close_sum / MA_WINDOW
+            combined = blend_scores(calculate_credit_score(close, ma50), simulated_sentiment(close, ma50))
+            if len(self.combined) == SMOOTHING_WINDOW:
+                evicted_combined = self.combined[0]
+            self.combined.append(combined)
+            self.combined_sum += combined - (evicted_combined or 0.0)
+            added_combined = True
+
+        self._undo = (evicted_close, added_combined, evicted_combined)
+
+    def _revert_last(self):
+        evicted_close, added_combined, evicted_combined = self._undo
+        self.close_sum -= self.closes.pop()
+        if evicted_close is not None:
+            self.closes.appendleft(evicted_close)
+            self.close_sum += evicted_close
+        if added_combined:
+            self.combined_sum -= self.combined.pop()
+            if evicted_combined is not None:
+                self.combined.appendleft(evicted_combined)
+                self.combined_sum += evicted_combined
+        self._undo = None
+
+    def _resum(self):
+        self.close_sum = math.fsum(self.closes)
+        self.combined_sum = math.fsum(self.combined)
+
+    def update(self, close, timestamp=None):
+        """
+        Feeds one close price and returns the latest point. Bars older than
+        the last seen timestamp are ignored.
+        """
+        close = float(close)
+        if timestamp is not None:
+            timestamp = pd.Timestamp(timestamp).to_pydatetime()
+        if timestamp is not None and self.last_timestamp is not None:
+            if timestamp < self.last_timestamp:
+                return self.latest()
+            if timestamp == self.last_timestamp and self._undo is not None:
+                self._revert_last()
+
+        self._append(close)
+        self.last_timestamp = timestamp if timestamp is not None else self.last_timestamp
+        self.updates += 1
+        if self.updates % RESUM_INTERVAL == 0:
+            self._resum()
+        point = self.latest()
+        if point["smoothedScore"] is not None and timestamp is not None:
+            self._record_month(timestamp.strftime("%Y-%m"), point["smoothedScore"])
+        return point
+
+    def _record_month(self, period, score):
+        # A later bar in the same month (or a replaced bar) overwrites the month's score
+        if self.months and self.months[-1][0] == period:
+            self.months[-1] = [period, score]
+        else:
+            self.months.append([period, score])
+
+    def update_many(self, closes):
+        """Feeds a Close series (indexed by date) in order and returns the latest point."""
+        for timestamp, close in closes.items():
+            if pd.notna(close):
+                self.update(close, timestamp)
+        return self.latest()
+
+    @property
+    def ready(self):
+        return len(self.closes) == MA_WINDOW
+
+    def latest(self):
+        """Current MA50, price score and smoothed trend score (None until each window fills)."""
+        if not self.closes:
+            return None
+        close = self.closes[-1]
+        ma50 = self.close_sum / MA_WINDOW if self.ready else None
+        smoothed = self.combined_sum / SMOOTHING_WINDOW if len(self.combined) == SMOOTHING_WINDOW else None
+        return {
+            "timestamp": self.last_timestamp,
+            "close": close,
+            "ma50": ma50,
+            "score": calculate_credit_score(close, ma50) if ma50 is not None else None,
+            "smoothedScore": smoothed,
+        }
+
+    def credit_trend(self):
+        """
+        creditTrend entries for the last TREND_MONTHS months: each month's
+        last smoothed score, as scoring.monthly_credit_trend computes them.
+        "period" (YYYY-MM) dates the point; "month" is the display label.
+        """
+        return [
+            {"month": datetime.strptime(period, "%Y-%m").strftime("%b"), "period": period, "score": score}
+            for period, score in self.months
+        ]
+
+    def to_dict(self):
+        """Serializable state for storing between runs."""
+        return {
+            "closes": list(self.closes),
+            "combined": list(self.combined),
+            "lastTimestamp": self.last_timestamp,
+            "updates": self.updates,
+            "months": [list(month) for month in self.months],
+            "undo": list(self._undo) if self._undo is not None else None,
+        }
+
+    @classmethod
+    def from_dict(cls, state):
+        scorer = cls()
+        if "months" not in state:
+            # Saved before the monthly trend was tracked; start over so advance_scorer rebuilds it
+            return scorer
+        scorer.closes.extend(state.get("closes", []))
+        scorer.combined.extend(state.get("combined", []))
+        scorer.last_timestamp = state.get("lastTimestamp")
+        scorer.updates = state.get("updates", 0)
+        scorer.months.extend(list(month) for month in state["months"])
+        undo = state.get("undo")
+        scorer._undo = tuple(undo) if undo is not None else None
+        scorer._resum()
+        return scorer
+
+
+class ScorerStateStore:
+    """
+    Keeps each ticker's StreamingScorer state in a field of its company
+    document, so the state and the score computed from it are written by
+    one single-document (atomic) update and can never drift apart.
+    """
+
+    def __init__(self, collection, field="scorerState"):
+        self.collection = collection
+        self.field = field
+
+    def load(self, ticker):
+        doc = self.collection.find_one({"ticker": ticker}, {"_id": 0, self.field: 1})
+        state = doc.get(self.field) if doc else None
+        return StreamingScorer.from_dict(state) if state else StreamingScorer()
+
+    def fields(self, scorer):
+        """Fields to $set on the company document to store the scorer's state."""
+        return {self.field: scorer.to_dict()}
+
+
+def prices_match(scorer, closes, tolerance=ADJUSTMENT_TOLERANCE):
+    """
+    True when the scorer's last completed close agrees with the series on
+    that bar. A mismatch means a split or dividend re-adjusted the prices
+    since the state was saved (or the series skips a bar), so the buffered
+    closes can no longer be mixed with the series.
+    """
+    if len(scorer.closes) < 2:
+        return True
+    earlier = closes[closes.index < pd.Timestamp(scorer.last_timestamp)].dropna()
+    if earlier.empty:
+        return True
+    old, new = scorer.closes[-2], float(earlier.iloc[-1])
+    return abs(new - old) <= abs(old) * tolerance
+
+
+def advance_scorer(scorer, closes):
+    """
+    Brings a scorer up to date with a Close series. Only bars from the
+    scorer's last timestamp onwards are fed; if the stored state does not
+    overlap the series (new ticker or a gap) or its prices have since been
+    re-adjusted, it is rebuilt from the series.
+    """
+    if scorer.last_timestamp is not None and len(closes):
+        last = pd.Timestamp(scorer.last_timestamp)
+        if last < closes.index[0] or not prices_match(scorer, closes):
+            scorer = StreamingScorer()
+        else:
+            closes = closes[closes.index >= last]
+    scorer.update_many(closes)
+    return scorer
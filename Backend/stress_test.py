@@ -0,0 +1,230 @@
+# stress_test.py
+"""
+Universe-wide what-if scoring. The latest scoring inputs of every company are
+held in NumPy arrays so a scenario (price / leverage / margin / sentiment
+shocks, optionally per sector, and custom weights) re-scores and re-ranks the
+whole universe in one vectorized pass.
+"""
+import math
+import threading
+import time
+
+import numpy as np
+
+from scoring import PRICE_WEIGHT, SENTIMENT_WEIGHT, calculate_credit_score
+
+# Default weights reproduce the stored score: 0.7 price / 0.3 news sentiment,
+# with fundamentals available as an opt-in component
+DEFAULT_WEIGHTS = {"price": PRICE_WEIGHT, "sentiment": SENTIMENT_WEIGHT, "fundamentals": 0.0}
+
+# Shocks and how they apply: relative ones scale the input (-0.2 = 20% lower),
+# absolute ones are added to it (profitMargin -0.05 = 5 points lower)
+RELATIVE_SHOCKS = ("price", "leverage")
+ABSOLUTE_SHOCKS = ("sentiment", "profitMargin", "returnOnEquity")
+SHOCKS = RELATIVE_SHOCKS + ABSOLUTE_SHOCKS
+
+# Company fields holding the raw scoring inputs (written by refresh_company)
+INPUT_FIELDS = ("close", "ma50", "newsSentiment", "debtToEquity", "profitMargins", "returnOnEquity")
+UNIVERSE_PROJECTION = {"_id": 0, "name": 1, "ticker": 1, "sector": 1, "score": 1, "scoreInputs": 1}
+
+
+def fundamentals_score(debt_to_equity, profit_margin, return_on_equity):
+    """
+    0-100 score from leverage, margins and returns, averaged over the inputs
+    that are present (NaN when none are). Debt-to-equity is in percent, as
+    reported by Yahoo Finance (150 = 1.5x).
+    """
+    with np.errstate(invalid='ignore'):
+        leverage = 100 / (1 + np.maximum(debt_to_equity, 0) / 100)
+        margin = np.clip(50 + profit_margin * 200, 0, 100)
+        returns = np.clip(50 + return_on_equity * 100, 0, 100)
+    parts = np.vstack([leverage, margin, returns])
+    present = ~np.isnan(parts)
+    count = present.sum(axis=0)
+    total = np.where(present, parts, 0).sum(axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(count > 0, total / count, np.nan)
+
+
+def weighted_score(components, weights):
+    """
+    Weighted average of the component scores, skipping components a company
+    is missing (NaN), so a company without news scores on price alone.
+    """
+    total = np.zeros(len(next(iter(components.values()))))
+    weight_sum = np.zeros_like(total)
+    for name, values in components.items():
+        weight = weights.get(name, 0.0)
+        if not weight:
+            continue
+        present = ~np.isnan(values)
+        total += np.where(present, values * weight, 0)
+        weight_sum += np.where(present, weight, 0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(weight_sum > 0, total / weight_sum, np.nan)
+
+
+def float_array(values):
+    return np.array([np.nan if v is None else v for v in values], dtype=float)
+
+
+class ScoreUniverse:
+    """Column arrays of every scored company's latest inputs."""
+
+    def __init__(self, documents):
+        documents = [doc for doc in documents if doc.get("scoreInputs")]
+        inputs = [doc["scoreInputs"] for doc in documents]
+        self.names = [doc.get("name") for doc in documents]
+        self.tickers = [doc.get("ticker") for doc in documents]
+        self.sectors = np.array([doc.get("sector") or "N/A" for doc in documents], dtype=object)
+        self.base_score = float_array([doc.get("score") for doc in documents])
+        columns = {field: float_array([i.get(field) for i in inputs]) for field in INPUT_FIELDS}
+        self.close = columns["close"]
+        self.ma50 = columns["ma50"]
+        self.sentiment = columns["newsSentiment"]
+        self.debt_to_equity = columns["debtToEquity"]
+        self.profit_margin = columns["profitMargins"]
+        self.return_on_equity = columns["returnOnEquity"]
+        self.sector_names, self.sector_codes = np.unique(self.sectors.astype(str), return_inverse=True)
+        self.loaded_at = time.monotonic()
+
+    def __len__(self):
+        return len(self.names)
+
+    @classmethod
+    def load(cls, collection):
+        return cls(collection.find({"scoreInputs": {"$exists": True}}, UNIVERSE_PROJECTION))
+
+
+class Scenario:
+    """
+    A validated what-if scenario:
+
+        {"name": "rates shock",
+         "shocks": {"price": -0.2, "leverage": 0.3},
+         "sectorShocks": {"Technology": {"price": -0.1}},
+         "weights": {"price": 0.5, "sentiment": 0.2, "fundamentals": 0.3}}
+
+    Sector shocks are added to the universe-wide ones for that sector.
+    Raises ValueError for unknown shocks or weights and non-numeric values.
+    """
+
+    def __init__(self, spec):
+        if not isinstance(spec, dict):
+            raise ValueError("scenario must be a JSON object")
+        self.name = spec.get("name")
+        self.shocks = self._numbers(spec.get("shocks") or {}, SHOCKS, "shock")
+        self.sector_shocks = {
+            sector: self._numbers(shocks, SHOCKS, "shock")
+            for sector, shocks in (spec.get("sectorShocks") or {}).items()
+        }
+        weights = self._numbers(spec.get("weights") or {}, tuple(DEFAULT_WEIGHTS), "weight")
+        self.weights = dict(DEFAULT_WEIGHTS, **weights)
+        if any(w < 0 for w in self.weights.values()) or not any(self.weights.values()):
+            raise ValueError("weights must be non-negative and not all zero")
+
+    @staticmethod
+    def _numbers(values, allowed, kind):
+        if not isinstance(values, dict):
+            raise ValueError(f"{kind}s must be a JSON object")
+        unknown = set(values) - set(allowed)
+        if unknown:
+            raise ValueError(f"unknown {kind}(s) {', '.join(sorted(unknown))}; expected {', '.join(allowed)}")
+        numbers = {}
+        for key, value in values.items():
+            # bool is an int subclass, but true/false is not a shock or weight
+            if isinstance(value, bool):
+                raise ValueError(f"{kind} values must be numbers")
+            try:
+                numbers[key] = float(value)
+            except (TypeError, ValueError):
+                raise ValueError(f"{kind} values must be numbers")
+            if not math.isfinite(numbers[key]):
+                raise ValueError(f"{kind} values must be finite numbers")
+        return numbers
+
+    def shock_array(self, universe, shock):
+        """Per-company value of one shock: the universe-wide value plus any sector shock."""
+        values = np.full(len(universe), self.shocks.get(shock, 0.0))
+        if self.sector_shocks:
+            by_sector = np.array([self.sector_shocks.get(s, {}).get(shock, 0.0) for s in universe.sector_names])
+            values += by_sector[universe.sector_codes]
+        return values
+
+
+def run_scenario(universe, scenario):
+    """Re-scores every company in `universe` under `scenario`; returns the score array."""
+    close = universe.close * (1 + scenario.shock_array(universe, "price"))
+    price_score = calculate_credit_score(close, universe.ma50)
+    sentiment = np.clip(universe.sentiment + scenario.shock_array(universe, "sentiment"), 0, 100)
+    components = {"price": price_score, "sentiment": sentiment}
+    if scenario.weights["fundamentals"]:
+        components["fundamentals"] = fundamentals_score(
+            universe.debt_to_equity * (1 + scenario.shock_array(universe, "leverage")),
+            universe.profit_margin + scenario.shock_array(universe, "profitMargin"),
+            universe.return_on_equity + scenario.shock_array(universe, "returnOnEquity"),
+        )
+    return weighted_score(components, scenario.weights)
+
+
+def rank_results(universe, scores, limit=None):
+    """Companies ordered by scenario score (unscorable ones last) with their change from the stored score."""
+    order = np.argsort(np.where(np.isnan(scores), np.inf, -scores), kind="stable")
+    if limit is not None:
+        order = order[:limit]
+    change = scores - universe.base_score
+    return [
+        {
+            "rank": rank,
+            "name": universe.names[i],
+            "ticker": universe.tickers[i],
+            "sector": universe.sectors[i],
+            "baseScore": None if np.isnan(universe.base_score[i]) else float(universe.base_score[i]),
+            "score": None if np.isnan(scores[i]) else float(scores[i]),
+            "change": None if np.isnan(change[i]) else float(change[i]),
+        }
+        for rank, i in enumerate(order.tolist(), start=1)
+    ]
+
+
+def summarize(universe, scores):
+    change = scores - universe.base_score
+    valid = ~np.isnan(change)
+    if not valid.any():
+        return {"companies": len(universe), "meanScore": None, "meanChange": None, "worstChange": None}
+    return {
+        "companies": len(universe),
+        "meanScore": float(np.nanmean(scores)),
+        "meanChange": float(change[valid].mean()),
+        "worstChange": float(change[valid].min()),
+        "bySector": {
+            sector: float(np.nanmean(change[(universe.sector_codes == code) & valid]))
+            for code, sector in enumerate(universe.sector_names.tolist())
+            if ((universe.sector_codes == code) & valid).any()
+        },
+    }
+
+
+class UniverseCache:
+    """
+    Keeps the loaded ScoreUniverse for `ttl` seconds, so new scores show up
+    in scenarios within `ttl` without reloading on every write; invalidate()
+    drops it early (e.g. after missed changes).
+    """
+
+    def __init__(self, loader, ttl=60):
+        self.loader = loader
+        self.ttl = ttl
+        self._universe = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        with self._lock:
+            universe = self._universe
+            if universe is None or time.monotonic() - universe.loaded_at > self.ttl:
+                universe = self._universe = self.loader()
+            return universe
+
+    def invalidate(self):
+        with self._lock:
+            self._universe = None
@@ -0,0 +1,173 @@
+# sync_jobs.py
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+import threading
+import time
+import uuid
+from pymongo import ASCENDING
+from pymongo.errors import DuplicateKeyError, PyMongoError
+
+# Internal bookkeeping fields left out of job status responses
+HIDDEN_FIELDS = ("activeSymbol", "leaseUntil")
+
+
+def public_projection():
+    return {field: 0 for field in HIDDEN_FIELDS}
+
+
+class SyncJobs:
+    """
+    Background company syncs tracked as job documents in Mongo, so any API
+    process can report on a job:
+
+        {_id: job id, company, symbol, status: "queued" | "running" |
+         "succeeded" | "failed" | "skipped", createdAt, startedAt,
+         finishedAt, queuedSeconds, runSeconds, error, data,
+         activeSymbol, leaseUntil}
+
+    A unique sparse index on activeSymbol (set only while a job is queued or
+    running) makes syncs single-flight per symbol across processes: a second
+    request gets the in-flight job back instead of starting another fetch.
+    The process that accepted a job renews its lease every lease/3 seconds
+    while the job is queued or running, so only a job orphaned by a dead
+    process outlives its lease and can be replaced by a new sync.
+    Finished jobs expire after `retention_seconds`.
+    """
+
+    def __init__(self, db, collection_name="sync_jobs", max_workers=4, lease_seconds=120, retention_seconds=3600):
+        self.collection = db[collection_name]
+        self.max_workers = max_workers
+        self.lease_seconds = lease_seconds
+        self.retention_seconds = retention_seconds
+        self._executor = None
+        self._active = set()
+        self._indexed = False
+        self._lock = threading.Lock()
+
+    def ensure_indexes(self):
+        if self._indexed:
+            return
+        self.collection.create_index([("activeSymbol", ASCENDING)], unique=True, sparse=True)
+        self.collection.create_index([("finishedAt", ASCENDING)], expireAfterSeconds=self.retention_seconds)
+        self._indexed = True
+
+    @property
+    def executor(self):
+        # Created on first use, i.e. after gunicorn has forked its workers
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="sync")
+                threading.Thread(target=self._heartbeat, name="sync-lease", daemon=True).start()
+            return self._executor
+
+    def _heartbeat(self):
+        """Extends the lease of every job this process has queued or is running."""
+        while True:
+            time.sleep(self.lease_seconds / 3)
+            with self._lock:
+                job_ids = list(self._active)
+            if not job_ids:
+                continue
+            try:
+                self.collection.update_many(
+                    {"_id": {"$in": job_ids}, "activeSymbol": {"$exists": True}},
+                    {"$set": {"leaseUntil": datetime.utcnow() + timedelta(seconds=self.lease_seconds)}},
+                )
+            except PyMongoError as e:
+                print(f"Error renewing sync job leases: {e}")
+
+    def get(self, job_id):
+        return self.collection.find_one({"_id": job_id}, public_projection())
+
+    def skipped(self, company, symbol, reason):
+        """Records a sync that was not needed and returns its job."""
+        self.ensure_indexes()
+        now = datetime.utcnow()
+        job = {
+            "_id": uuid.uuid4().hex,
+            "company": company,
+            "symbol": symbol,
+            "status": "skipped",
+            "createdAt": now,
+            "finishedAt": now,
+            "error": None,
+            "data": {"reason": reason},
+        }
+        self.collection.insert_one(job)
+        return job
+
+    def submit(self, company, symbol, sync_fn):
+        """
+        Runs sync_fn() on the background executor unless `symbol` already has
+        a sync in flight. Returns (job, created); when created is False the
+        job is the in-flight one. sync_fn's return value is stored as `data`.
+        """
+        self.ensure_indexes()
+        now = datetime.utcnow()
+        job = {
+            "_id": uuid.uuid4().hex,
+            "company": company,
+            "symbol": symbol,
+            "status": "queued",
+            "createdAt": now,
+            "startedAt": None,
+            "finishedAt": None,
+            "error": None,
+            "data": None,
+            "activeSymbol": symbol,
+            "leaseUntil": now + timedelta(seconds=self.lease_seconds),
+        }
+        try:
+            self.collection.insert_one(job)
+        except DuplicateKeyError:
+            existing = self.collection.find_one({"activeSymbol": symbol})
+            if existing is not None and existing["leaseUntil"] >= now:
+                return self.get(existing["_id"]), False
+            if existing is not None:
+                self.release(existing["_id"], "failed", error="Sync lease expired")
+            try:
+                self.collection.insert_one(job)
+            except DuplicateKeyError:
+                # Another process replaced the orphaned job first
+                existing = self.collection.find_one({"activeSymbol": symbol}, public_projection())
+                if existing is None:
+                    raise
+                return existing, False
+
+        with self._lock:
+            self._active.add(job["_id"])
+        self.executor.submit(self._run, job["_id"], now, sync_fn)
+        return {k: v for k, v in job.items() if k not in HIDDEN_FIELDS}, True
+
+    def _run(self, job_id, created_at, sync_fn):
+        started_at = datetime.utcnow()
+        try:
+            self.collection.update_one(
+                {"_id": job_id},
+                {"$set": {
+                    "status": "running",
+                    "startedAt": started_at,
+                    "queuedSeconds": (started_at - created_at).total_seconds(),
+                }},
+            )
+            try:
+                data = sync_fn()
+            except Exception as e:
+                print(f"Sync job {job_id} failed: {e}")
+                self.release(job_id, "failed", error=str(e), started_at=started_at)
+                return
+            self.release(job_id, "succeeded", data=data, started_at=started_at)
+        finally:
+            with self._lock:
+                self._active.discard(job_id)
+
+    def release(self, job_id, status, data=None, error=None, started_at=None):
+        """Finishes a job and frees its symbol for the next sync."""
+        now = datetime.utcnow()
+        fields = {"status": status, "finishedAt": now, "data": data, "error": error}
+        if started_at is not None:
+            fields["runSeconds"] = (now - started_at).total_seconds()
+        self.collection.update_one(
+            {"_id": job_id},
+            {"$set": fields, "$unset": {"activeSymbol": "", "leaseUntil": ""}},
+        )
@@ -0,0 +1,218 @@
+# worker.py
+"""
+Standalone refresh worker.
+
+Claims batches of per-ticker refresh jobs from the Mongo job queue and
+refreshes each batch with one grouped download, a thread pool and bulk
+writes, outside the Flask/gunicorn processes. Any number of workers can run;
+one of them at a time (the holder of the scheduler lock) also keeps the
+queue in sync with the tracked companies.
+
+Usage:
+    python worker.py [--threads 4] [--no-scheduler] [--local] [--metrics-port 9100]
+"""
+import argparse
+from datetime import datetime, timedelta
+import os
+import socket
+import threading
+import time
+import uuid
+
+from config import Config
+from metrics import REFRESH_TICKERS, registry
+
+
+def refresh_interval(ticker_name):
+    """Seconds between refreshes for a ticker (REFRESH_INTERVALS overrides the default)."""
+    return Config.REFRESH_INTERVALS.get(ticker_name, Config.REFRESH_INTERVAL_SECONDS)
+
+
+class RefreshWorker:
+    """
+    Runs refresh jobs from `queue`, up to `batch_size` at a time. `companies`
+    maps ticker to company info and `refresh_fn(companies, max_workers=...)`
+    refreshes a batch, returning a report whose "results" map gives each
+    ticker's outcome (see app.refresh_batch); `threads` bounds its concurrency.
+    When `lock` is given, the worker also acts as scheduler while it holds it.
+    `policy` (a RefreshPolicy) decides each ticker's next run; without one
+    the fixed per-ticker interval is used.
+    """
+
+    def __init__(self, queue, companies, refresh_fn, threads=4, lock=None, worker_id=None, policy=None,
+                 batch_size=None):
+        self.queue = queue
+        self.companies = companies
+        self.refresh_fn = refresh_fn
+        self.policy = policy
+        self.threads = max(1, threads)
+        self.batch_size = max(1, batch_size or Config.JOB_BATCH_SIZE)
+        self.lock = lock
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self.stop_event = threading.Event()
+        self._threads = []
+
+    def schedule_loop(self):
+        while not self.stop_event.is_set():
+            try:
+                if self.lock.acquire():
+                    self.queue.sync(list(self.companies))
+            except Exception as e:
+                print(f"Scheduler error: {e}")
+            self.stop_event.wait(Config.SCHEDULER_TICK_SECONDS)
+        self.lock.release()
+
+    def work_loop(self):
+        while not self.stop_event.is_set():
+            try:
+                jobs = self.queue.claim_batch(self.worker_id, self.batch_size)
+            except Exception as e:
+                print(f"Error claiming refresh jobs: {e}")
+                jobs = []
+            if not jobs:
+                self.stop_event.wait(Config.JOB_POLL_SECONDS)
+                continue
+            self.run_batch(jobs)
+
+    def run_batch(self, jobs):
+        """Refreshes the claimed jobs' tickers together and completes or fails each job."""
+        batch = []
+        for job in jobs:
+            company_info = self.companies.get(job["_id"])
+            if company_info is None:
+                # No longer tracked; drop the job instead of leaving it running
+                self.queue.remove(job)
+            else:
+                batch.append((job, company_info))
+        if not batch:
+            return None
+
+        try:
+            report = self.refresh_fn([company_info for _, company_info in batch], max_workers=self.threads)
+        except Exception as e:
+            print(f"Error refreshing a batch of {len(batch)} companies: {e}")
+            for job, _ in batch:
+                self.queue.fail(job, e)
+            REFRESH_TICKERS.inc(len(batch), result="failed")
+            return None
+
+        errors = {failure["ticker"]: failure["error"] for failure in report["failures"]}
+        for job, company_info in batch:
+            ticker_name = company_info["ticker"]
+            if report["results"].get(ticker_name, "failed") == "failed":
+                self.queue.fail(job, errors.get(ticker_name, "refresh did not run"))
+            else:
+                self.queue.complete(job, self.next_run(company_info))
+        return report
+
+    def next_run(self, company_info):
+        if self.policy is not None:
+            return self.policy.next_run(company_info["ticker"], company_info["name"])
+        return datetime.utcnow() + timedelta(seconds=refresh_interval(company_info["ticker"]))
+
+    def start(self):
+        if self.lock is not None:
+            self._threads.append(threading.Thread(target=self.schedule_loop, name="scheduler", daemon=True))
+        self._threads.append(threading.Thread(target=self.work_loop, name="refresh", daemon=True))
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        self.stop_event.set()
+        for thread in self._threads:
+            thread.join(timeout)
+
+
+def serve_metrics(port):
+    """Serves the worker's Prometheus metrics on http://0.0.0.0:<port>/metrics."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("0.0.0.0", port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    return server
+
+
+def build_policy(companies_col, view_tracker=None):
+    """RefreshPolicy wired to the stored volatility/beta and dashboard view counts."""
+    from refresh_policy import RefreshPolicy, CompanyStats
+
+    return RefreshPolicy(
+        refresh_interval,
+        stats=CompanyStats(companies_col, view_tracker, ttl=Config.SCHEDULER_TICK_SECONDS),
+        reference_volatility=Config.REFERENCE_VOLATILITY,
+        min_interval=Config.MIN_REFRESH_SECONDS,
+        max_interval=Config.MAX_REFRESH_SECONDS,
+        market_hours_only=Config.REFRESH_MARKET_HOURS_ONLY,
+    )
+
+
+def start_embedded_worker(companies, refresh_fn, threads=None, policy=None):
+    """Runs a worker with the in-process queue, for single-process development setups."""
+    from job_queue import LocalJobQueue, LocalLeaderLock
+
+    worker = RefreshWorker(
+        LocalJobQueue(lease_seconds=Config.JOB_LEASE_SECONDS),
+        {c["ticker"]: c for c in companies},
+        refresh_fn,
+        threads=threads or Config.WORKER_THREADS,
+        lock=LocalLeaderLock(),
+        policy=policy,
+    )
+    return worker.start()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run credit score refresh jobs.")
+    parser.add_argument("--threads", type=int, default=Config.WORKER_THREADS, help="concurrent refresh jobs")
+    parser.add_argument("--batch-size", type=int, default=Config.JOB_BATCH_SIZE, help="jobs claimed per batch")
+    parser.add_argument("--no-scheduler", action="store_true", help="only run jobs; never enqueue")
+    parser.add_argument("--local", action="store_true", help="use the in-process queue instead of Mongo")
+    parser.add_argument("--metrics-port", type=int, help="serve Prometheus metrics on this port")
+    args = parser.parse_args(argv)
+
+    import app
+    from job_queue import MongoJobQueue, MongoLeaderLock, LocalJobQueue, LocalLeaderLock
+
+    companies = {c["ticker"]: c for c in app.COMPANIES}
+    if args.local:
+        queue, lock = LocalJobQueue(lease_seconds=Config.JOB_LEASE_SECONDS), LocalLeaderLock()
+    else:
+        queue = MongoJobQueue(app.db, lease_seconds=Config.JOB_LEASE_SECONDS)
+        lock = None
+    policy = build_policy(app.companies_col, app.view_tracker)
+    worker = RefreshWorker(
+        queue, companies, app.refresh_batch, threads=args.threads, policy=policy, batch_size=args.batch_size
+    )
+    if not args.no_scheduler:
+        worker.lock = lock or MongoLeaderLock(app.db, "refresh-scheduler", worker.worker_id, ttl=Config.SCHEDULER_LOCK_TTL)
+
+    app.ensure_indexes()
+    if args.metrics_port:
+        serve_metrics(args.metrics_port)
+    worker.start()
+    print(f"Refresh worker {worker.worker_id} started with {worker.threads} threads, batches of {worker.batch_size}.")
+    try:
+        while True:
+            time.sleep(60)
+    except KeyboardInterrupt:
+        worker.stop(timeout=30)
+
+
+if __name__ == "__main__":
+    main()
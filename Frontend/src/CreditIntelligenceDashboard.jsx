@@ -6,6 +6,9 @@ import {
   ChevronDown, TrendingUp, AlertCircle, CheckCircle, Building2
 } from 'lucide-react';
 
+// Backend base URL for the REST API and the score update stream
+const API_BASE = import.meta.env.VITE_API_BASE || "https://credtech-hackethon-1.onrender.com";
+
 const CreditIntelligenceDashboard = () => {
   // State for companies list, selected company, and loading status
   const [companies, setCompanies] = useState([]);
@@ -17,7 +20,7 @@ const CreditIntelligenceDashboard = () => {
   const fetchCompanies = async () => {
     try {
       setLoading(true);
-      const res = await fetch("https://credtech-hackethon-1.onrender.com/api/companies");
+      const res = await fetch(`${API_BASE}/api/companies`);
       if (!res.ok) {
         throw new Error(`HTTP error! status: ${res.status}`);
       }
@@ -38,7 +41,7 @@ const CreditIntelligenceDashboard = () => {
   // Function to fetch details for a specific company
   const fetchCompanyDetails = async (name) => {
     try {
-      const res = await fetch(`http://https://credtech-hackethon-1.onrender.com/api/companies/${name}`);
+      const res = await fetch(`${API_BASE}/api/companies/${name}`);
       if (!res.ok) {
         throw new Error(`HTTP error! status: ${res.status}`);
       }
@@ -55,6 +58,19 @@ const CreditIntelligenceDashboard = () => {
     fetchCompanies();
   }, []);
 
+  // Effect to apply score updates pushed by the backend while the page is open
+  useEffect(() => {
+    const source = new EventSource(`${API_BASE}/api/stream/scores`);
+    source.addEventListener("score", (e) => {
+      const update = JSON.parse(e.data);
+      setSelectedCompany((current) => {
+        if (!current || current.ticker !== update.ticker) return current;
+        return { ...current, ...update.changes, lastUpdated: update.lastUpdated };
+      });
+    });
+    return () => source.close();
+  }, []);
+
   // Memoized functions for score styling to prevent re-computation
   const getScoreColor = useMemo(() => (score) => {
     if (score >= 80) return 'text-emerald-600';
@@ -85,7 +101,7 @@ const CreditIntelligenceDashboard = () => {
   if (error) {
     return (
       <div className="min-h-screen flex items-center justify-center bg-red-50">
-        <p className="text-xl text-red-700">Error: {error}. Please ensure your backend is running at https://credtech-hackethon-1.onrender.com and has data populated.</p>
+        <p className="text-xl text-red-700">Error: {error}. Please ensure your backend is running at {API_BASE} and has data populated.</p>
       </div>
     );
   }